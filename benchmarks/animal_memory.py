@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the memory used per animal instance.
+
+Creates many herbivores and measures the memory they allocate with
+tracemalloc. For comparison, the same number of objects with the same
+attributes stored in an instance dictionary, as animals were stored before
+they got __slots__, are measured as well.
+
+Run from the repository root with::
+
+    python benchmarks/animal_memory.py --animals 200000
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import argparse
+import tracemalloc
+
+from biosim.animals import Herbivore
+
+
+class DictAnimal:
+    """
+    Animal with its attributes in an instance dictionary.
+    """
+    def __init__(self, properties):
+        self.fitness_must_be_updated = True
+        self.age = properties["age"]
+        self.weight = properties["weight"]
+        self.fitness = None
+
+
+def measure(animal_class, num_animals):
+    """
+    Creates animals of a class and measures the memory allocated by them.
+
+    :param animal_class: Class of the animals
+    :type animal_class: type
+    :param num_animals: Number of animals to create
+    :type num_animals: int
+    :return: Bytes allocated per animal
+    :rtype: float
+    """
+    properties = {"species": "Herbivore", "age": 5, "weight": 20.0}
+    tracemalloc.start()
+    animals = [animal_class(properties) for _ in range(num_animals)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del animals
+    return allocated / num_animals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--animals", type=int, default=200000,
+                        help="number of animals created of each kind")
+    num_animals = parser.parse_args().animals
+
+    slotted_bytes = measure(Herbivore, num_animals)
+    dict_bytes = measure(DictAnimal, num_animals)
+
+    print("Animals created: {}".format(num_animals))
+    print("{:<20}{:>15}".format("", "bytes/animal"))
+    print("{:<20}{:>15.1f}".format("instance dict", dict_bytes))
+    print("{:<20}{:>15.1f}".format("__slots__", slotted_bytes))
+    print("Memory saving per animal: {:.1f} bytes ({:.0%})".format(
+        dict_bytes - slotted_bytes, 1 - slotted_bytes / dict_bytes))
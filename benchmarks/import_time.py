@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the time it takes to start a process that imports biosim.
+
+Starts fresh Python interpreters that import biosim.simulation, and compares
+their wall time with interpreters that only start, and with interpreters
+that also import pandas and matplotlib, as biosim.simulation did before these
+were imported lazily. If a limit in milliseconds is given, the benchmark
+exits with status 1 when importing biosim.simulation takes longer than the
+limit, so it can guard against heavy imports creeping back in.
+
+Run from the repository root with::
+
+    python benchmarks/import_time.py --runs 10 --limit 300
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = {
+    "interpreter only": "pass",
+    "biosim.simulation": "import biosim.simulation",
+    "with pandas and pyplot": "import biosim.simulation, pandas, "
+                              "matplotlib.pyplot",
+}
+
+
+def measure(statement, num_runs):
+    """
+    Runs a statement in fresh interpreters and measures the wall time of
+    each process.
+
+    :param statement: Python statement to run
+    :type statement: str
+    :param num_runs: Number of processes to start
+    :type num_runs: int
+    :return: Median wall time in milliseconds
+    :rtype: float
+    """
+    env = dict(os.environ, MPLBACKEND="Agg")
+    times = []
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], env=env,
+                       check=True, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE)
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="number of processes started per statement")
+    parser.add_argument("--limit", type=float, default=None,
+                        help="exit with status 1 if importing "
+                             "biosim.simulation takes longer than this "
+                             "number of milliseconds")
+    args = parser.parse_args()
+
+    print("Median wall time of {} processes".format(args.runs))
+    times = {}
+    for name, statement in STATEMENTS.items():
+        times[name] = measure(statement, args.runs)
+        print("{:<25}{:>10.1f} ms".format(name, times[name]))
+
+    if args.limit is not None and times["biosim.simulation"] > args.limit:
+        print("Importing biosim.simulation takes longer than {} ms".format(
+            args.limit))
+        sys.exit(1)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the seasons of the simulation on synthetic islands.
+
+Generates square islands of given sizes, with a random mix of landscape
+types inside a boundary of Ocean, and places a given number of herbivores
+and carnivores in every cell animals can stay in, using
+examples/population_generator.py. For each island size and storage mode,
+three simulations with the same seed are timed:
+
+* every season of IslandMap, called one at a time for each year,
+* IslandMap.run_all_seasons,
+* BioSim.simulate, headless, end to end.
+
+Each is reported as years per second and animal years per second, where
+animal years are the number of animals at the start of each year, summed
+over the years. Every island size and mode is run in a fresh process, so
+that the peak resident set size reported is that of one configuration only.
+
+Run from the repository root with::
+
+    python benchmarks/season_benchmark.py --sizes 10 20 40 --years 10
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "examples"))
+
+from population_generator import Population  # noqa: E402
+from biosim.island_map import IslandMap  # noqa: E402
+from biosim.random_stream import RandomStream  # noqa: E402
+from biosim.simulation import BioSim  # noqa: E402
+
+SEASONS = ("feeding_season", "procreation_season", "migration_season",
+           "aging_season", "weight_loss_season", "dying_season")
+
+
+def make_island(size, seed):
+    """
+    Creates the geography of a square island with Ocean along the boundary
+    and mostly Jungle and Savannah inside, with some Desert and Mountain.
+
+    :param size: Number of rows and columns of the island
+    :type size: int
+    :param seed: Seed of the landscape types
+    :type seed: int
+    :return: Island geography
+    :rtype: str
+    """
+    rng = np.random.default_rng(seed)
+    inside = rng.choice(list("JSDM"), size=(size - 2, size - 2),
+                        p=[0.5, 0.3, 0.15, 0.05])
+    lines = ["O" * size]
+    lines.extend("O" + "".join(row) + "O" for row in inside)
+    lines.append("O" * size)
+    return "\n".join(lines)
+
+
+def make_population(geography, num_herbs, num_carns, seed):
+    """
+    Creates a population with the same number of animals of each species in
+    every cell of the island animals can stay in, with random ages and
+    weights.
+
+    :param geography: Island geography
+    :type geography: str
+    :param num_herbs: Number of herbivores in each cell
+    :type num_herbs: int
+    :param num_carns: Number of carnivores in each cell
+    :type num_carns: int
+    :param seed: Seed of ages and weights
+    :type seed: int
+    :return: Initial population
+    :rtype: list
+    """
+    random.seed(seed)
+    locations = [(row, col)
+                 for row, line in enumerate(geography.splitlines())
+                 for col, landscape_type in enumerate(line)
+                 if landscape_type in "JSD"]
+    return Population(num_herbs, locations, num_carns,
+                      locations).get_animals()
+
+
+def run_configuration(size, num_herbs, num_carns, num_years, vectorized,
+                      seed):
+    """
+    Times the seasons, run_all_seasons and simulate on one island, and
+    measures the peak resident set size of the process.
+
+    :param size: Number of rows and columns of the island
+    :type size: int
+    :param num_herbs: Number of herbivores in each cell at start
+    :type num_herbs: int
+    :param num_carns: Number of carnivores in each cell at start
+    :type num_carns: int
+    :param num_years: Number of years to simulate
+    :type num_years: int
+    :param vectorized: If True, the island is simulated in vectorized mode
+    :type vectorized: bool
+    :param seed: Seed of island, population and simulation
+    :type seed: int
+    :return: Results, with times in seconds and peak RSS in megabytes
+    :rtype: dict
+    """
+    geography = make_island(size, seed)
+    population = make_population(geography, num_herbs, num_carns, seed)
+    result = {"size": size, "vectorized": vectorized, "years": num_years}
+
+    island_map = IslandMap(geography, population, vectorized,
+                           RandomStream(seed))
+    island_map.create_map_dict()
+    result["animals"] = island_map.num_herbs + island_map.num_carns
+    seasons = dict.fromkeys(SEASONS, 0.0)
+    animal_years = 0
+    for _ in range(num_years):
+        animal_years += island_map.num_herbs + island_map.num_carns
+        for season in SEASONS:
+            start = time.perf_counter()
+            getattr(island_map, season)()
+            seasons[season] += time.perf_counter() - start
+    result["seasons"] = seasons
+    result["animal_years"] = animal_years
+
+    island_map = IslandMap(geography, population, vectorized,
+                           RandomStream(seed))
+    island_map.create_map_dict()
+    start = time.perf_counter()
+    for _ in range(num_years):
+        island_map.run_all_seasons()
+    result["run_all_seasons"] = time.perf_counter() - start
+
+    with BioSim(geography, population, seed, vectorized=vectorized) as sim:
+        start = time.perf_counter()
+        sim.simulate(num_years, vis_years=None)
+        result["simulate"] = time.perf_counter() - start
+
+    result["peak_rss"] = resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def print_results(results):
+    """
+    Prints a table of the time of each season, and of the throughput and
+    peak RSS of each configuration.
+
+    :param results: Results of run_configuration
+    :type results: list
+    """
+    print("Seconds per year spent in each season")
+    print("{:>6}{:>12}".format("size", "mode") + "".join(
+        "{:>13}".format(season.replace("_season", "")) for season in SEASONS
+    ))
+    for result in results:
+        mode = "vectorized" if result["vectorized"] else "object"
+        print("{:>6}{:>12}".format(result["size"], mode) + "".join(
+            "{:>13.4f}".format(result["seasons"][season] / result["years"])
+            for season in SEASONS
+        ))
+
+    print()
+    print("{:>6}{:>12}{:>10}{:>28}{:>28}{:>14}".format(
+        "size", "mode", "animals", "years/s", "animal years/s",
+        "peak RSS MB"))
+    print("{:>28}{:>14}{:>14}{:>14}{:>14}".format(
+        "", "all seasons", "simulate", "all seasons", "simulate"))
+    for result in results:
+        mode = "vectorized" if result["vectorized"] else "object"
+        print("{:>6}{:>12}{:>10}{:>14.2f}{:>14.2f}{:>14.0f}{:>14.0f}"
+              "{:>14.0f}".format(
+                  result["size"], mode, result["animals"],
+                  result["years"] / result["run_all_seasons"],
+                  result["years"] / result["simulate"],
+                  result["animal_years"] / result["run_all_seasons"],
+                  result["animal_years"] / result["simulate"],
+                  result["peak_rss"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 40],
+                        help="number of rows and columns of the islands")
+    parser.add_argument("--herbivores", type=int, default=50,
+                        help="herbivores in each cell at start")
+    parser.add_argument("--carnivores", type=int, default=5,
+                        help="carnivores in each cell at start")
+    parser.add_argument("--years", type=int, default=10,
+                        help="number of years simulated")
+    parser.add_argument("--modes", nargs="+", default=["object",
+                                                       "vectorized"],
+                        choices=["object", "vectorized"],
+                        help="storage modes of the animals")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--single", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_configuration(
+            args.sizes[0], args.herbivores, args.carnivores, args.years,
+            args.modes[0] == "vectorized", args.seed
+        )))
+        sys.exit(0)
+
+    results = []
+    for size in args.sizes:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, __file__, "--single", "--sizes", str(size),
+                 "--herbivores", str(args.herbivores),
+                 "--carnivores", str(args.carnivores),
+                 "--years", str(args.years), "--modes", mode,
+                 "--seed", str(args.seed)],
+                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True
+            ).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+    print_results(results)
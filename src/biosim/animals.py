@@ -14,7 +14,17 @@ import math
 class Animal:
     """
     Parent class for herbivores and carnivores.
+
+    The attributes of each animal are stored in slots rather than in a
+    per-instance dictionary, which makes animals smaller and attribute
+    access faster. Subclasses must also define __slots__ to keep this.
     """
+    __slots__ = ("age", "weight", "fitness", "fitness_must_be_updated")
+
+    # Number of fitness computations of animals of all classes, in this
+    # process, read by biosim.profiling.SeasonProfiler
+    num_fitness_computations = 0
+
     _DEFAULT_PARAMS = {
         "w_birth": 6.0,
         "sigma_birth": 1.0,
@@ -78,7 +88,6 @@ class Animal:
             and weight. May also contain fitness.
         :type properties: dict
         """
-        self.has_moved_this_year = False
         self.fitness_must_be_updated = True
 
         if properties["age"] < 0:
@@ -96,6 +105,24 @@ class Animal:
         else:
             self.fitness = properties["fitness"]
 
+    @classmethod
+    def newborn(cls, weight):
+        """
+        Creates a newborn animal of the class with given birth weight, without
+        the validation done by __init__. The weight is assumed to be positive.
+
+        :param weight: Birth weight
+        :type weight: float
+        :return: Newborn animal of age zero
+        :rtype: class '__main__.Herbivore' or class '__main__.Carnivore'
+        """
+        animal = cls.__new__(cls)
+        animal.fitness_must_be_updated = True
+        animal.age = 0
+        animal.weight = weight
+        animal.fitness = None
+        return animal
+
     def make_animal_one_year_older(self):
         """
         Adds 1 year to the age of the animal for each cycle.
@@ -116,7 +143,7 @@ class Animal:
     def add_eaten_fodder_to_weight(self, fodder):
         """
         Adds amount of weight to animals total body weight given by
-        :math:`\\beta \\cdot F`. Also resets have_moved_this_year to False.
+        :math:`\\beta \\cdot F`.
 
         :param fodder: Amount of fodder available to the animal
         :type fodder: float
@@ -124,7 +151,6 @@ class Animal:
         """
         self.weight += self.params['beta'] * fodder
         self.fitness_must_be_updated = True
-        self.has_moved_this_year = False
 
     def find_fitness(self):
         """
@@ -157,6 +183,32 @@ class Animal:
         else:
             self.fitness = q_plus * q_minus
         self.fitness_must_be_updated = False
+        Animal.num_fitness_computations += 1
+
+    @classmethod
+    def batch_fitness(cls, age, weight):
+        """
+        Computes fitness of several animals of the class at once, in a single
+        NumPy pass, using the same formula as find_fitness.
+
+        :param age: Age of each animal
+        :type age: array_like
+        :param weight: Weight of each animal
+        :type weight: array_like
+        :return: Fitness of each animal
+        :rtype: array
+        """
+        age = np.asarray(age, dtype=float)
+        weight = np.asarray(weight, dtype=float)
+        Animal.num_fitness_computations += weight.size
+        with np.errstate(over="ignore"):
+            q_plus = 1 / (1 + np.exp(
+                cls.params["phi_age"] * (age - cls.params["a_half"])
+            ))
+            q_minus = 1 / (1 + np.exp(
+                -cls.params["phi_weight"] * (weight - cls.params["w_half"])
+            ))
+        return np.where(weight <= 0, 0.0, q_plus * q_minus)
 
     def prob_of_animal_moving(self):
         """
@@ -171,21 +223,58 @@ class Animal:
             self.fitness_must_be_updated = False
         return self.fitness * self.params["mu"]
 
-    def will_animal_move(self):
+    def will_animal_move(self, rng=None):
         """
         Compares probability of animal moving and a random number to decide
         whether the animal should move.
 
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: True if animal will move, False if not
         :rtype: bool
         """
+        if rng is None:
+            rng = np.random
         prob = self.prob_of_animal_moving()
-        random_number = np.random.random()
+        random_number = rng.random()
 
         if random_number <= prob:
-            self.has_moved_this_year = True
             return True
 
+    @classmethod
+    def batch_move(cls, fitness, cum_probs, rng=None):
+        """
+        Decides for several animals of the class in the same cell whether they
+        move, and to which neighbour. Moves are decided by comparing one
+        vector of random numbers with the probabilities of moving, given by
+        :math:`\\mu \\cdot \\phi`, and destinations are chosen by a single
+        search of a second vector of random numbers in the cumulative
+        probabilities of moving to each neighbour.
+
+        :param fitness: Fitness of each animal
+        :type fitness: array
+        :param cum_probs: Cumulative probability of moving to each of the
+            neighbours of the cell
+        :type cum_probs: array
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
+        :return: Position of the chosen neighbour in cum_probs for each
+            animal, -1 for animals that stay
+        :rtype: array
+        """
+        if rng is None:
+            rng = np.random
+        will_move = rng.random(len(fitness)) <= cls.params["mu"] * \
+            np.asarray(fitness)
+        movers = np.flatnonzero(will_move)
+        choice = np.full(len(fitness), -1)
+        choice[movers] = np.minimum(
+            np.searchsorted(cum_probs, rng.random(len(movers)),
+                            side="right"),
+            len(cum_probs) - 1
+        )
+        return choice
+
     def find_rel_abund_of_fodder(self, landscape_cell):
         """
         Takes an instance of a landscape class and returns the relative
@@ -304,27 +393,40 @@ class Animal:
 
         return locs, probs
 
-    def find_new_coordinates(self, neighbours_of_current_cell):
+    def find_new_coordinates(self, neighbours_of_current_cell,
+                             cum_probs=None, rng=None):
         """
         Uses cumulative probability to decide which of the neighbouring cells
         the animal will move to. Returns the coordinates of that cell.
+        The cumulative probabilities are computed from the neighbours, unless
+        they are given.
 
         :param neighbours_of_current_cell: Neighbours of current cell.
             Locations as keys, instances of landscape classes as values.
         :type neighbours_of_current_cell: dict
+        :param cum_probs: Cumulative probability of moving to each of the
+            neighbours, in the order of neighbours_of_current_cell
+        :type cum_probs: array
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: The location the animal will move to.
         :rtype: tuple
 
         """
-        moving_prob_for_each_loc = self.prob_move_to_each_neighbour(
-                neighbours_of_current_cell
-        )
-        locs, probs = self.convert_dict_to_list_and_array(
-            moving_prob_for_each_loc
-        )
+        if rng is None:
+            rng = np.random
+        if cum_probs is None:
+            moving_prob_for_each_loc = self.prob_move_to_each_neighbour(
+                    neighbours_of_current_cell
+            )
+            locs, probs = self.convert_dict_to_list_and_array(
+                moving_prob_for_each_loc
+            )
+            cum_probs = np.cumsum(probs)
+        else:
+            locs = list(neighbours_of_current_cell.keys())
 
-        cum_probs = np.cumsum(probs)
-        random_number = np.random.random()
+        random_number = rng.random()
 
         if random_number < cum_probs[0]:
             return locs[0]
@@ -335,7 +437,8 @@ class Animal:
         else:
             return locs[3]
 
-    def return_new_coordinates(self, neighbours_of_current_cell):
+    def return_new_coordinates(self, neighbours_of_current_cell,
+                               cum_probs=None, rng=None):
         """
         Checks whether the animal will move or not, and if it will move,
         returns the new coordinates.
@@ -343,11 +446,17 @@ class Animal:
         :param neighbours_of_current_cell: Neighbours of current cell.
             Locations as keys, instances of landscape classes as values.
         :type neighbours_of_current_cell: dict
+        :param cum_probs: Cumulative probability of moving to each of the
+            neighbours, passed on to find_new_coordinates
+        :type cum_probs: array
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: Location animal will move to.
         :rtype: tuple or None
         """
-        if self.will_animal_move() is True:
-            return self.find_new_coordinates(neighbours_of_current_cell)
+        if self.will_animal_move(rng) is True:
+            return self.find_new_coordinates(neighbours_of_current_cell,
+                                             cum_probs, rng)
 
     def prob_give_birth(self, num_animals):
         """
@@ -377,33 +486,41 @@ class Animal:
                 1, self.params['gamma'] * self.fitness * (num_animals - 1)
             )
 
-    def will_birth_take_place(self, num_animals):
+    def will_birth_take_place(self, num_animals, rng=None):
         """
         Compares probability of giving birth with a random number,
         and returns True if a baby is to be born.
 
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: True if animal shall give birth
         :rtype: bool
         """
+        if rng is None:
+            rng = np.random
         prob = self.prob_give_birth(num_animals)
-        random_number = np.random.random()
+        random_number = rng.random()
 
         if random_number <= prob:
             return True
 
-    def birth_process(self, num_animals):
+    def birth_process(self, num_animals, rng=None):
         """
         Finds out if a birth should take place, and then draws baby's birth
         weight from normal distribution.
         If a birth should take place, the birth weight is returned and
         weight of mother is reduced by :math:`\\xi \\cdot birth weight`
 
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: Returns weight of the baby that is born, or None if no baby
                 is born.
         :rtype: float, None
         """
-        bool_birth = self.will_birth_take_place(num_animals)
-        birth_weight = np.random.normal(
+        if rng is None:
+            rng = np.random
+        bool_birth = self.will_birth_take_place(num_animals, rng)
+        birth_weight = rng.normal(
             self.params['w_birth'], self.params['sigma_birth']
         )
         if bool_birth is True and birth_weight > 0 and \
@@ -412,6 +529,41 @@ class Animal:
             self.fitness_must_be_updated = True
             return birth_weight
 
+    @classmethod
+    def batch_birth(cls, weight, fitness, rng=None):
+        """
+        Decides which of the animals of the class in a cell give birth, using
+        the same rules as birth_process. Probabilities of giving birth are
+        computed for all animals at once and compared with one vector of
+        random numbers. Birth weights are only drawn for the births that take
+        place, and births where the mother is too light for the baby are
+        discarded.
+
+        :param weight: Weight of each animal in the cell
+        :type weight: array
+        :param fitness: Fitness of each animal in the cell
+        :type fitness: array
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
+        :return: Positions of the mothers, and weight of each baby
+        :rtype: array, array
+        """
+        if rng is None:
+            rng = np.random
+        num_animals = len(weight)
+        prob = np.minimum(1, cls.params['gamma'] * fitness * (num_animals - 1))
+        prob[weight < cls.params['zeta'] * (
+            cls.params['w_birth'] + cls.params['sigma_birth']
+        )] = 0
+
+        mothers = np.flatnonzero(rng.random(num_animals) <= prob)
+        birth_weight = rng.normal(
+            cls.params['w_birth'], cls.params['sigma_birth'], len(mothers)
+        )
+        possible = (birth_weight > 0) & \
+            (weight[mothers] > birth_weight * cls.params['xi'])
+        return mothers[possible], birth_weight[possible]
+
     def prob_death(self):
         """
         If neccessary, first finds fitness of animal.
@@ -430,16 +582,35 @@ class Animal:
         else:
             return self.params['omega'] * (1 - self.fitness)
 
-    def will_animal_live(self):
+    @classmethod
+    def batch_prob_death(cls, fitness):
+        """
+        Computes probability of death for several animals of the class at
+        once, using the same rules as prob_death.
+
+        :param fitness: Fitness of each animal
+        :type fitness: array_like
+        :return: Probability of death of each animal
+        :rtype: array
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        return np.where(fitness == 0, 1.0,
+                        cls.params['omega'] * (1 - fitness))
+
+    def will_animal_live(self, rng=None):
         """
         Compares the probability of death with a random number, and returns
         True if the animal lives.
 
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: True if animal lives
         :rtype: bool
         """
+        if rng is None:
+            rng = np.random
         prob = self.prob_death()
-        random_number = np.random.random()
+        random_number = rng.random()
 
         if random_number > prob:
             return True
@@ -449,6 +620,8 @@ class Herbivore(Animal):
     """
     Class for herbivores. Herbivores feed on plant fodder.
     """
+    __slots__ = ()
+
     _DEFAULT_PARAMS = {
         "w_birth": 8.0,
         "sigma_birth": 1.5,
@@ -525,6 +698,8 @@ class Carnivore(Animal):
     """
     Class for Carnivores. Carnivores feed on herbivores.
     """
+    __slots__ = ()
+
     _DEFAULT_PARAMS = {
         "w_birth": 6.0,
         "sigma_birth": 1.0,
@@ -607,17 +782,21 @@ class Carnivore(Animal):
         else:
             return 1
 
-    def kill(self, herb):
+    def kill(self, herb, rng=None):
         """
         Implements prob_kill and a random number to decide whether a
         carnivore kills a herbivore or not.
 
         :param herb: Herbivore to be killed
         :type herb: class '__main__.Herbivore'
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: True if carnivore shall kill
         :rtype: bool
         """
-        random_number = np.random.random()
+        if rng is None:
+            rng = np.random
+        random_number = rng.random()
         prob = self.prob_kill(herb.fitness)
 
         if random_number <= prob:
@@ -625,23 +804,40 @@ class Carnivore(Animal):
         else:
             return False
 
-    def attempt_eating_all_herbivores_in_cell(self, pop_herb):
+    def attempt_eating_all_herbivores_in_cell(self, pop_herb, eaten_ids=None,
+                                              rng=None):
         """
         Iterates through list of herbivores. Implements kill method on one
         herbivore at a time until carnivore has satisfied it's appetite or
         has tried to kill all herbivores without luck. After a carnivore has
         eaten a herbivore, it's weight and fitness is updated.
 
+        If a set of eaten_ids is given, herbivores whose id is in the set
+        have already been eaten and are skipped, and the id of each killed
+        herbivore is added to the set. The carnivores of a cell can then
+        share the set, and the eaten herbivores be removed in one pass.
+
         :param pop_herb: Herbivores available to the carnivore sorted by
                 fitness
         :type pop_herb: list
+        :param eaten_ids: Identities of herbivores already eaten
+        :type eaten_ids: set
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         :return: Herbivores killed
         :rtype: list
         """
+        if eaten_ids is None:
+            eaten_ids = set()
         amount_eaten = 0
         eaten_herbivores = []
         for herb in reversed(pop_herb):
-            if amount_eaten < self.params["F"] and self.kill(herb) is True:
+            if amount_eaten >= self.params["F"]:
+                break
+            if id(herb) in eaten_ids:
+                continue
+            if self.kill(herb, rng) is True:
+                eaten_ids.add(id(herb))
                 eaten_herbivores.append(herb)
                 amount_eaten += herb.weight
                 self.weight += self.params["beta"] * amount_eaten
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides writing and reading of checkpoints of the full state of
+a simulation, used by BioSim.save_checkpoint and BioSim.load_checkpoint.
+
+A checkpoint is a single .npz file of flat arrays, not a pickle of the
+objects of the simulation. The animals of each species are stored as one
+array per property, with the index of their cell, in the order they have in
+their cells. The island geography, the fodder of every cell, the parameters
+of all landscape and animal classes, and the state of every random stream are
+stored as well, so a simulation restored from a checkpoint continues exactly
+as the simulation the checkpoint was saved from.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.animals import Herbivore, Carnivore
+from biosim.parallel import PARAM_CLASSES
+from biosim.population import Population
+import numpy as np
+import json
+import os
+
+CHECKPOINT_VERSION = 3
+
+SPECIES = (("herb", Herbivore, "pop_herb", "herbs"),
+           ("carn", Carnivore, "pop_carn", "carns"))
+
+
+def stream_arrays(streams):
+    """
+    Converts the states of random streams to arrays. The unused numbers of
+    all streams are joined, with pointers to where the numbers of each
+    stream start.
+
+    :param streams: Random streams
+    :type streams: list
+    :return: Names as keys, arrays as values
+    :rtype: dict
+    """
+    states = [stream.get_state() for stream in streams]
+    arrays = {"generators": np.array(json.dumps([
+        [state["bit_generator"], state["block_size"]] for state in states
+    ]))}
+    for name in ("uniform", "normal"):
+        arrays[name] = np.concatenate(
+            [np.zeros(0)] + [state[name] for state in states]
+        )
+        arrays[name + "_pointers"] = np.concatenate(
+            ([0], np.cumsum([len(state[name]) for state in states]))
+        )
+    return arrays
+
+
+def set_stream_states(streams, arrays):
+    """
+    Sets the states of random streams from arrays made by stream_arrays.
+
+    :param streams: Random streams, in the order given to stream_arrays
+    :type streams: list
+    :param arrays: Names as keys, arrays as values
+    :type arrays: dict
+    """
+    generators = json.loads(str(arrays["generators"]))
+    for number, (stream, (bit_generator, block_size)) in enumerate(
+            zip(streams, generators)
+    ):
+        state = {"bit_generator": bit_generator, "block_size": block_size}
+        for name in ("uniform", "normal"):
+            pointers = arrays[name + "_pointers"]
+            state[name] = arrays[name][pointers[number]:pointers[number + 1]]
+        stream.set_state(state)
+
+
+def write_checkpoint(sim, path):
+    """
+    Writes the state of a simulation to a checkpoint file. The file is
+    first written under a temporary name and then renamed, so an
+    interrupted write never replaces an earlier checkpoint with a broken
+    one.
+
+    :param sim: Simulation
+    :type sim: class 'biosim.simulation.BioSim'
+    :param path: Path of checkpoint file
+    :type path: str, os.PathLike
+    """
+    island_map = sim.island_map
+    arrays = {
+        "version": np.array(CHECKPOINT_VERSION),
+        "geography": np.array(island_map.geogr),
+        "vectorized": np.array(island_map.vectorized),
+        "year": np.array(sim.year),
+        "img_no": np.array(sim.img_no),
+        "params": np.array(json.dumps({cls.__name__: cls.params
+                                       for cls in PARAM_CLASSES})),
+        "fodder": island_map.fodder.copy(),
+        "cell_streams": np.array(island_map.executor is not None),
+    }
+
+    for prefix, _, list_name, array_name in SPECIES:
+        columns = {"cell": [], "age": [], "weight": [], "fitness": [],
+                   "fitness_must_be_updated": []}
+        for index, cell in enumerate(island_map.cells):
+            animals = getattr(cell, list_name)
+            population = getattr(cell, array_name)
+            num_animals = len(animals) + len(population)
+            if num_animals == 0:
+                continue
+            columns["cell"].append(np.full(num_animals, index))
+            columns["age"].append(np.concatenate(
+                ([animal.age for animal in animals], population.age)
+            ))
+            columns["weight"].append(np.concatenate(
+                ([animal.weight for animal in animals], population.weight)
+            ))
+            columns["fitness"].append(np.concatenate((
+                [np.nan if animal.fitness is None else animal.fitness
+                 for animal in animals],
+                population.fitness
+            )))
+            columns["fitness_must_be_updated"].append(np.concatenate((
+                np.array([animal.fitness_must_be_updated
+                          for animal in animals], dtype=bool),
+                population.fitness_must_be_updated
+            )))
+        dtypes = {"cell": int, "fitness_must_be_updated": bool}
+        for name, parts in columns.items():
+            arrays[f"{prefix}_{name}"] = np.concatenate(
+                [np.zeros(0, dtype=dtypes.get(name, float))] + parts
+            )
+
+    for name, array in stream_arrays([sim.rng]).items():
+        arrays["rng_" + name] = array
+    cell_streams = [index for index, cell in enumerate(island_map.cells)
+                    if cell.rng is not sim.rng]
+    arrays["cell_rng_indices"] = np.array(cell_streams, dtype=int)
+    for name, array in stream_arrays([island_map.cells[index].rng
+                                      for index in cell_streams]).items():
+        arrays["cell_rng_" + name] = array
+
+    temporary_path = os.fspath(path) + ".tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary_path, path)
+
+
+def read_checkpoint(path):
+    """
+    Reads all arrays of a checkpoint file.
+
+    :param path: Path of checkpoint file
+    :type path: str, os.PathLike
+    :return: Names as keys, arrays as values
+    :rtype: dict
+    :raise ValueError: if the file was written by another version of the
+        checkpoint format
+    """
+    with np.load(path) as checkpoint:
+        arrays = {name: checkpoint[name] for name in checkpoint.files}
+    if int(arrays["version"]) != CHECKPOINT_VERSION:
+        raise ValueError(f'Checkpoint version {int(arrays["version"])} is '
+                         f'not supported!')
+    return arrays
+
+
+def restore_checkpoint(sim, arrays):
+    """
+    Restores the state of a simulation from the arrays of a checkpoint. The
+    simulation must have been created with the geography and storage mode of
+    the checkpoint, and without animals. It must also run cell-local seasons
+    in worker processes if and only if the simulation of the checkpoint did,
+    since only then do the cells have random streams of their own, and the
+    simulation would otherwise not continue as the one it was saved from.
+    The parameters of all landscape and animal classes are set to those of
+    the checkpoint.
+
+    :param sim: Simulation
+    :type sim: class 'biosim.simulation.BioSim'
+    :param arrays: Names as keys, arrays as values, as returned by
+        read_checkpoint
+    :type arrays: dict
+    :raise ValueError: if the simulation runs cell-local seasons in worker
+        processes and the simulation of the checkpoint did not, or the
+        other way around
+    """
+    island_map = sim.island_map
+    if bool(arrays["cell_streams"]) != (island_map.executor is not None):
+        if bool(arrays["cell_streams"]):
+            raise ValueError("The checkpoint was saved from a simulation "
+                             "with worker processes, so num_workers must "
+                             "be given!")
+        raise ValueError("The checkpoint was saved from a simulation "
+                         "without worker processes, so num_workers must "
+                         "not be given!")
+
+    params = json.loads(str(arrays["params"]))
+    for cls in PARAM_CLASSES:
+        cls.params = params[cls.__name__]
+
+    sim.num_years_simulated = int(arrays["year"])
+    sim.img_no = int(arrays["img_no"])
+    island_map.fodder[:] = arrays["fodder"]
+
+    for prefix, species, list_name, array_name in SPECIES:
+        cell_indices = arrays[f"{prefix}_cell"]
+        bounds = np.flatnonzero(np.diff(cell_indices)) + 1
+        for part in np.split(np.arange(len(cell_indices)), bounds):
+            if len(part) == 0:
+                continue
+            cell = island_map.cells[cell_indices[part[0]]]
+            population = Population(species)
+            population.age = arrays[f"{prefix}_age"][part]
+            population.weight = arrays[f"{prefix}_weight"][part]
+            population.fitness = arrays[f"{prefix}_fitness"][part]
+            population.fitness_must_be_updated = \
+                arrays[f"{prefix}_fitness_must_be_updated"][part]
+            if island_map.vectorized:
+                setattr(cell, array_name, population)
+                continue
+            animals = population.to_animals()
+            for animal in animals:
+                animal.age = int(animal.age)
+                if np.isnan(animal.fitness):
+                    animal.fitness = None
+            setattr(cell, list_name, animals)
+    island_map.count_animals()
+
+    set_stream_states([sim.rng], {
+        name[len("rng_"):]: array for name, array in arrays.items()
+        if name.startswith("rng_")
+    })
+    cell_streams = arrays["cell_rng_indices"].tolist()
+    if len(cell_streams) > 0:
+        set_stream_states(
+            [island_map.cells[index].rng for index in cell_streams],
+            {name[len("cell_rng_"):]: array
+             for name, array in arrays.items()
+             if name.startswith("cell_rng_") and name != "cell_rng_indices"}
+        )
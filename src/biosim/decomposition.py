@@ -0,0 +1,553 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides simulation of large islands split into rectangular
+tiles, each owned by one worker process.
+
+Each tile is an island map of its own rectangle of cells, surrounded by a
+halo: a ring of one cell belonging to the neighbouring tiles. A worker runs
+all seasons for the cells of its tile. The only data exchanged between tiles
+is, once per year, the relative abundance of fodder in the cells along the
+edges of the tiles, which is needed for the migration tables of the halo, and
+the animals migrating across the edges. All animals stay in their worker
+between years.
+
+Every cell draws its random numbers from its own stream, derived from the
+seed and the position of the cell on the island, and migrants are committed
+in order of the cell they left. The result therefore does not depend on how
+the island is split into tiles.
+
+DecomposedIsland is a standalone entry point, used in place of BioSim and
+IslandMap rather than through them: neither creates tiles. It runs one year
+per call to run_all_seasons, and gives the number of animals per species
+and per cell, but has no graphics. Since its cells draw from streams of
+their own, its results differ from those of a BioSim with the same seed.
+The worker processes are stopped by close.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.animals import Herbivore, Carnivore
+from biosim.island_map import IslandMap
+from biosim.parallel import find_cell_methods, get_class_params, \
+    run_cell_methods, set_class_params
+from biosim.random_stream import RandomStream
+import multiprocessing
+import numpy as np
+import textwrap
+
+
+def split_range(length, num_parts):
+    """
+    Splits range(length) into num_parts contiguous parts of nearly equal
+    length.
+
+    :param length: Length of the range
+    :type length: int
+    :param num_parts: Number of parts
+    :type num_parts: int
+    :return: Bounds of the parts, num_parts + 1 numbers
+    :rtype: list
+    """
+    return [length * part // num_parts for part in range(num_parts + 1)]
+
+
+class Tile(IslandMap):
+    """
+    Island map of one tile of a larger island. The map covers the rows
+    first_row to last_row - 1 and columns first_col to last_col - 1 of the
+    island, and a halo of one cell around them. Cells outside the island are
+    Ocean. Only the cells inside the tile are simulated, while the halo cells
+    only provide the relative abundance of fodder received from their tiles.
+    """
+    def __init__(self, island_geography, initial_population, bounds, seed,
+                 vectorized=False):
+        """
+        Initializes tile of an island and creates its map.
+
+        :param island_geography: Specifies geography of the whole island
+        :type island_geography: multiline str
+        :param initial_population: Specifies initial population of the cells
+            of the tile, with locations on the island
+        :type initial_population: list of dicts
+        :param bounds: first_row, last_row, first_col, last_col
+        :type bounds: tuple
+        :param seed: Seed of the random streams of the cells
+        :type seed: int
+        :param vectorized: If True, the animals are stored in population
+            arrays
+        :type vectorized: bool
+        """
+        lines = textwrap.dedent(island_geography).splitlines()
+        first_row, last_row, first_col, last_col = bounds
+        self.island_shape = (len(lines), len(lines[0]))
+        self.origin = (first_row - 1, first_col - 1)
+        self.tile_shape = (last_row - first_row, last_col - first_col)
+
+        tile_lines = []
+        for row in range(first_row - 1, last_row + 1):
+            tile_lines.append("".join(
+                lines[row][col] if 0 <= row < len(lines) and
+                0 <= col < len(lines[0]) else "O"
+                for col in range(first_col - 1, last_col + 1)
+            ))
+        tile_population = [
+            {"loc": self.to_tile_location(cell_info["loc"]),
+             "pop": cell_info["pop"]}
+            for cell_info in initial_population
+        ]
+        super().__init__("\n".join(tile_lines), tile_population, vectorized)
+        self.create_map_dict()
+
+        self.owned_indices = []
+        self.edge_indices = []
+        self.halo_indices = []
+        for index in self.passable_indices.tolist():
+            row, col = self.locations[index]
+            if 1 <= row <= self.tile_shape[0] and \
+                    1 <= col <= self.tile_shape[1]:
+                self.owned_indices.append(index)
+                if row in (1, self.tile_shape[0]) or \
+                        col in (1, self.tile_shape[1]):
+                    self.edge_indices.append(index)
+            else:
+                self.halo_indices.append(index)
+        self._halo_index_set = set(self.halo_indices)
+        for index in self.owned_indices:
+            self.cells[index].rng = RandomStream(np.random.SeedSequence(
+                seed, spawn_key=(self.to_island_index(index),)
+            ), block_size=64)
+
+        self.rel_abund_fodder = None
+        self.buffers = {}
+
+    def check_boundaries_are_ocean(self):
+        """
+        The boundary of a tile is the halo, which belongs to other tiles, so
+        it need not be Ocean. The boundary of the whole island is checked by
+        DecomposedIsland.
+        """
+
+    def to_tile_location(self, location):
+        """
+        Converts a location on the island to a location on the tile map.
+
+        :param location: Row and column on the island
+        :type location: tuple
+        :return: Row and column on the tile map
+        :rtype: tuple
+        """
+        return location[0] - self.origin[0], location[1] - self.origin[1]
+
+    def to_island_index(self, index):
+        """
+        Converts the index of a cell of the tile map to the index of the cell
+        on the island, where cells are numbered in row-major order.
+
+        :param index: Index of cell on the tile map
+        :type index: int
+        :return: Index of cell on the island
+        :rtype: int
+        """
+        row, col = self.locations[index]
+        return (row + self.origin[0]) * self.island_shape[1] + \
+            col + self.origin[1]
+
+    def to_tile_index(self, island_index):
+        """
+        Converts the index of a cell on the island to the index of the cell
+        on the tile map.
+
+        :param island_index: Index of cell on the island
+        :type island_index: int
+        :return: Index of cell on the tile map
+        :rtype: int
+        """
+        row, col = divmod(island_index, self.island_shape[1])
+        return self.location_index[self.to_tile_location((row, col))]
+
+    def run_owned_seasons(self, *seasons):
+        """
+        Runs cell-local seasons for the cells of the tile, and updates their
+        counts.
+
+        :param seasons: Names of seasons, as given in
+            biosim.parallel.CELL_SEASONS
+        :type seasons: str
+        """
+        run_cell_methods([self.cells[index] for index in self.owned_indices],
+                         find_cell_methods(seasons, self.vectorized))
+        for index in self.owned_indices:
+            self.update_counts(index)
+
+    def halo_island_indices(self):
+        """
+        Returns the island indices of the cells in the halo of the tile
+        animals can stay in.
+
+        :return: Island indices of halo cells
+        :rtype: list
+        """
+        return [self.to_island_index(index) for index in self.halo_indices]
+
+    def before_migration(self, class_params):
+        """
+        Runs feeding and procreation for the cells of the tile, and finds the
+        relative abundance of fodder in all its cells.
+
+        :param class_params: Parameters of landscape and animal classes, as
+            returned by biosim.parallel.get_class_params
+        :type class_params: dict
+        :return: Island indices of edge cells as keys, relative abundance of
+            fodder for herbivores and carnivores as values
+        :rtype: dict
+        """
+        set_class_params(class_params)
+        self.run_owned_seasons("feeding", "procreation")
+        self.rel_abund_fodder = self.find_rel_abund_of_fodder()
+        return {
+            self.to_island_index(index): (
+                self.rel_abund_fodder[Herbivore][index],
+                self.rel_abund_fodder[Carnivore][index]
+            ) for index in self.edge_indices
+        }
+
+    def emigrate(self, halo_rel_abund):
+        """
+        Finds the migration tables of the tile, with the relative abundance
+        of fodder in the halo received from the other tiles, and moves the
+        animals of all cells of the tile. Movers staying in the tile are kept
+        in buffers until after_migration, while movers leaving it are
+        returned.
+
+        :param halo_rel_abund: Island indices of halo cells as keys,
+            relative abundance of fodder for herbivores and carnivores as
+            values
+        :type halo_rel_abund: dict
+        :return: Island indices of cells outside the tile as keys, lists of
+            tuples with island index of old cell, name of population and
+            arriving animals as values
+        :rtype: dict
+        """
+        for island_index, (herb, carn) in halo_rel_abund.items():
+            index = self.to_tile_index(island_index)
+            self.rel_abund_fodder[Herbivore][index] = herb
+            self.rel_abund_fodder[Carnivore][index] = carn
+        migration_tables = self.migration_probability_tables(
+            self.rel_abund_fodder
+        )
+
+        buffers = {}
+        for index in self.owned_indices:
+            if self.vectorized:
+                self.move_all_animals_in_cell_vectorized(
+                    self.locations[index], self.cells[index],
+                    migration_tables, buffers
+                )
+            else:
+                self.move_all_animals_in_cell(
+                    self.locations[index], self.cells[index],
+                    migration_tables, buffers
+                )
+
+        self.buffers = {}
+        leaving = {}
+        for destination, arrivals in buffers.items():
+            arrivals = [(self.to_island_index(source), name, movers)
+                        for source, name, movers in arrivals]
+            if destination in self._halo_index_set:
+                leaving[self.to_island_index(destination)] = arrivals
+            else:
+                self.buffers[destination] = arrivals
+        return leaving
+
+    def after_migration(self, arriving):
+        """
+        Commits the movers staying in the tile together with the movers
+        arriving from other tiles, in order of the island index of the cell
+        they left. Then runs aging, weight loss and dying for the cells of
+        the tile.
+
+        :param arriving: Island indices of cells in the tile as keys, lists
+            of arrivals as returned by emigrate of other tiles as values
+        :type arriving: dict
+        :return: Number of herbivores and carnivores in the tile
+        :rtype: tuple
+        """
+        for island_index, arrivals in arriving.items():
+            self.buffers.setdefault(self.to_tile_index(island_index),
+                                    []).extend(arrivals)
+        self.commit_migration_buffers(self.buffers)
+        self.buffers = {}
+        self.run_owned_seasons("aging", "weight_loss", "dying")
+        return self.num_herbs, self.num_carns
+
+    def animal_counts(self):
+        """
+        Returns the number of animals of each species in the cells of the
+        tile that have animals.
+
+        :return: Locations on the island as keys, number of herbivores and
+            carnivores as values
+        :rtype: dict
+        """
+        counts = {}
+        for index in self.owned_indices:
+            num_herbs, num_carns = self.cell_counts[index].tolist()
+            if num_herbs + num_carns > 0:
+                row, col = self.locations[index]
+                counts[(row + self.origin[0], col + self.origin[1])] = \
+                    (num_herbs, num_carns)
+        return counts
+
+
+def serve_tile(connection):
+    """
+    Runs in a worker process. Creates a tile from the arguments received
+    first, and then calls the methods of the tile requested through the
+    connection and sends back their results, until None is received.
+
+    :param connection: End of a pipe to the main process
+    :type connection: class 'multiprocessing.connection.Connection'
+    """
+    tile = Tile(*connection.recv())
+    connection.send(tile.halo_island_indices())
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        name, args = request
+        connection.send(getattr(tile, name)(*args))
+    connection.close()
+
+
+class TileProcess:
+    """
+    Tile owned by a worker process. Requests are sent to all tiles before
+    their results are received, so that the workers run at the same time.
+    """
+    def __init__(self, tile_args):
+        """
+        Starts worker process and creates its tile.
+
+        :param tile_args: Arguments of Tile
+        :type tile_args: tuple
+        """
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve_tile,
+                                               args=(worker_connection,),
+                                               daemon=True)
+        self.process.start()
+        self.connection.send(tile_args)
+        self.halo = self.connection.recv()
+
+    def send(self, name, *args):
+        """
+        Requests a call of a method of the tile.
+
+        :param name: Name of method
+        :type name: str
+        """
+        self.connection.send((name, args))
+
+    def receive(self):
+        """
+        Returns the result of the last requested call.
+        """
+        return self.connection.recv()
+
+    def close(self):
+        """
+        Stops the worker process.
+        """
+        self.connection.send(None)
+        self.process.join()
+
+
+class LocalTile:
+    """
+    Tile in this process, with the same interface as TileProcess.
+    """
+    def __init__(self, tile_args):
+        """
+        Creates tile.
+
+        :param tile_args: Arguments of Tile
+        :type tile_args: tuple
+        """
+        self.tile = Tile(*tile_args)
+        self.halo = self.tile.halo_island_indices()
+        self._result = None
+
+    def send(self, name, *args):
+        """
+        Calls a method of the tile.
+
+        :param name: Name of method
+        :type name: str
+        """
+        self._result = getattr(self.tile, name)(*args)
+
+    def receive(self):
+        """
+        Returns the result of the last call.
+        """
+        return self._result
+
+    def close(self):
+        """
+        Does nothing, since there is no worker to stop.
+        """
+
+
+class DecomposedIsland:
+    """
+    Island split into a grid of tiles, each run by its own worker process.
+    Runs all seasons of the island, exchanging only the relative abundance
+    of fodder along the edges of the tiles and the animals migrating between
+    tiles.
+    """
+    def __init__(self, island_geography, initial_population, seed,
+                 tiles=(2, 2), vectorized=False, processes=True):
+        """
+        Initializes island and creates one tile per worker.
+
+        :param island_geography: Specifies island geography
+        :type island_geography: multiline str
+        :param initial_population: Specifies initial population of each cell
+        :type initial_population: list of dicts
+        :param seed: Seed of the random streams of the cells. Drawn from the
+            operating system if None.
+        :type seed: int, None
+        :param tiles: Number of tiles along the rows and columns
+        :type tiles: tuple
+        :param vectorized: If True, the animals are stored in population
+            arrays
+        :type vectorized: bool
+        :param processes: If False, all tiles are run in this process
+        :type processes: bool
+        :raise ValueError: if geography is invalid
+        """
+        island_geography = textwrap.dedent(island_geography)
+        island = IslandMap(island_geography, [])
+        island.check_boundaries_are_ocean()
+        island.check_map_lines_have_equal_length()
+        lines = island_geography.splitlines()
+        invalid_types = set("".join(lines)) - set("JSDMO")
+        if len(invalid_types) > 0:
+            raise ValueError(f"Invalid landscape type {invalid_types.pop()}")
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.island_shape = (len(lines), len(lines[0]))
+        self.row_bounds = split_range(self.island_shape[0], tiles[0])
+        self.col_bounds = split_range(self.island_shape[1], tiles[1])
+
+        tile_populations = {}
+        for cell_info in initial_population:
+            tile_populations.setdefault(self.find_tile(cell_info["loc"]),
+                                        []).append(cell_info)
+
+        tile_class = TileProcess if processes else LocalTile
+        self.tiles = {}
+        for tile_row in range(tiles[0]):
+            for tile_col in range(tiles[1]):
+                bounds = (self.row_bounds[tile_row],
+                          self.row_bounds[tile_row + 1],
+                          self.col_bounds[tile_col],
+                          self.col_bounds[tile_col + 1])
+                self.tiles[(tile_row, tile_col)] = tile_class((
+                    island_geography,
+                    tile_populations.get((tile_row, tile_col), []),
+                    bounds, seed, vectorized
+                ))
+        self.num_herbs, self.num_carns = 0, 0
+        self.year = 0
+
+    def find_tile(self, location):
+        """
+        Finds the tile a location on the island belongs to.
+
+        :param location: Row and column on the island
+        :type location: tuple
+        :return: Row and column of the tile
+        :rtype: tuple
+        """
+        return (int(np.searchsorted(self.row_bounds, location[0],
+                                    side="right")) - 1,
+                int(np.searchsorted(self.col_bounds, location[1],
+                                    side="right")) - 1)
+
+    def find_tile_of_index(self, island_index):
+        """
+        Finds the tile a cell on the island belongs to.
+
+        :param island_index: Index of cell on the island
+        :type island_index: int
+        :return: Row and column of the tile
+        :rtype: tuple
+        """
+        return self.find_tile(divmod(island_index, self.island_shape[1]))
+
+    def run_all_seasons(self):
+        """
+        Runs all seasons for all tiles. Feeding and procreation run first,
+        and the relative abundance of fodder in the edge cells of each tile
+        is sent to the tiles that have them in their halo. Then all tiles
+        move their animals, and the animals leaving a tile are sent to the
+        tile of their new cell, before aging, weight loss and dying run.
+        """
+        class_params = get_class_params()
+        for tile in self.tiles.values():
+            tile.send("before_migration", class_params)
+        edge_rel_abund = {}
+        for tile in self.tiles.values():
+            edge_rel_abund.update(tile.receive())
+
+        for tile in self.tiles.values():
+            tile.send("emigrate", {island_index: edge_rel_abund[island_index]
+                                   for island_index in tile.halo})
+        arriving = {key: {} for key in self.tiles}
+        for tile in self.tiles.values():
+            for island_index, arrivals in tile.receive().items():
+                arriving[self.find_tile_of_index(island_index)].setdefault(
+                    island_index, []).extend(arrivals)
+
+        for key, tile in self.tiles.items():
+            tile.send("after_migration", arriving[key])
+        self.num_herbs, self.num_carns = 0, 0
+        for tile in self.tiles.values():
+            num_herbs, num_carns = tile.receive()
+            self.num_herbs += num_herbs
+            self.num_carns += num_carns
+        self.year += 1
+
+    @property
+    def num_animals_per_species(self):
+        """
+        Number of animals per species on the island after the last year.
+        """
+        return {"Herbivore": self.num_herbs, "Carnivore": self.num_carns}
+
+    def animal_counts(self):
+        """
+        Returns the number of animals of each species in all cells with
+        animals.
+
+        :return: Locations on the island as keys, number of herbivores and
+            carnivores as values
+        :rtype: dict
+        """
+        for tile in self.tiles.values():
+            tile.send("animal_counts")
+        counts = {}
+        for tile in self.tiles.values():
+            counts.update(tile.receive())
+        return counts
+
+    def close(self):
+        """
+        Stops the worker processes of all tiles.
+        """
+        for tile in self.tiles.values():
+            tile.close()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides running the same simulation with many seeds, in a pool
+of worker processes.
+
+Each member of the ensemble is a headless BioSim simulation with its own
+seed. The parameters of the landscape and animal classes are class
+attributes shared by all simulations in a process, so every member resets
+them to the defaults, applies the parameters of the ensemble, and restores
+the parameters it found when it is done. Members therefore never see the
+parameters of another member or of the process that started them, whichever
+worker they run in.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.parallel import get_class_params, set_class_params
+from biosim.simulation import BioSim
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+
+
+def run_member(island_geography, initial_population, seed, num_years,
+               animal_params=None, landscape_params=None, vectorized=False,
+               density_grids=False):
+    """
+    Runs one headless simulation with default parameters changed by the
+    given parameters, and records the number of animals of each species
+    after every year. The class parameters are restored afterwards.
+
+    :param island_geography: Specifies island geography
+    :type island_geography: multiline str
+    :param initial_population: Specifies initial population of each cell
+    :type initial_population: list of dicts
+    :param seed: Seed of the simulation
+    :type seed: int
+    :param num_years: Number of years to simulate
+    :type num_years: int
+    :param animal_params: Names of species as keys, parameters as values, as
+        given to BioSim.set_animal_parameters
+    :type animal_params: dict, None
+    :param landscape_params: Landscape letters as keys, parameters as values,
+        as given to BioSim.set_landscape_parameters
+    :type landscape_params: dict, None
+    :param vectorized: If True, the simulation is run in vectorized mode
+    :type vectorized: bool
+    :param density_grids: If True, the density grid of each species is
+        recorded after every year as well
+    :type density_grids: bool
+    :return: Number of herbivores and carnivores after each year as
+        'num_herbs' and 'num_carns', and if density_grids is True the
+        density grids after each year as 'herbs' and 'carns'
+    :rtype: dict
+    :raise ValueError: if a parameter has an invalid name or value
+    """
+    class_params = get_class_params()
+    try:
+        BioSim.reset_params()
+        for species, params in (animal_params or {}).items():
+            BioSim.set_animal_parameters(species, params)
+        for landscape, params in (landscape_params or {}).items():
+            BioSim.set_landscape_parameters(landscape, params)
+
+        sim = BioSim(island_geography, initial_population, seed,
+                     vectorized=vectorized)
+        result = {"num_herbs": np.zeros(num_years, dtype=int),
+                  "num_carns": np.zeros(num_years, dtype=int)}
+        if density_grids:
+            shape = (num_years,) + sim.density_grid("Herbivore").shape
+            result["herbs"] = np.zeros(shape, dtype=int)
+            result["carns"] = np.zeros(shape, dtype=int)
+        for year in range(num_years):
+            sim.run_year()
+            result["num_herbs"][year] = sim.island_map.num_herbs
+            result["num_carns"][year] = sim.island_map.num_carns
+            if density_grids:
+                result["herbs"][year] = sim.density_grid("Herbivore")
+                result["carns"][year] = sim.density_grid("Carnivore")
+        return result
+    finally:
+        set_class_params(class_params)
+
+
+def run_ensemble(island_geography, initial_population, seeds, num_years,
+                 animal_params=None, landscape_params=None, vectorized=False,
+                 density_grids=False, num_workers=None):
+    """
+    Runs one headless simulation per seed in a pool of worker processes,
+    all with the same island, initial population and parameters, and stacks
+    their results.
+
+    :param island_geography: Specifies island geography
+    :type island_geography: multiline str
+    :param initial_population: Specifies initial population of each cell
+    :type initial_population: list of dicts
+    :param seeds: Seed of each simulation
+    :type seeds: list
+    :param num_years: Number of years to simulate
+    :type num_years: int
+    :param animal_params: Names of species as keys, parameters as values, as
+        given to BioSim.set_animal_parameters
+    :type animal_params: dict, None
+    :param landscape_params: Landscape letters as keys, parameters as values,
+        as given to BioSim.set_landscape_parameters
+    :type landscape_params: dict, None
+    :param vectorized: If True, the simulations are run in vectorized mode
+    :type vectorized: bool
+    :param density_grids: If True, the density grid of each species is
+        recorded after every year as well
+    :type density_grids: bool
+    :param num_workers: Number of worker processes, the number of CPUs if
+        not given
+    :type num_workers: int, None
+    :return: Seeds as 'seed', years as 'year', and the results of
+        run_member stacked with one row per seed
+    :rtype: dict
+    :raise ValueError: if no seeds are given, or if a parameter has an
+        invalid name or value
+    """
+    if len(seeds) == 0:
+        raise ValueError("At least one seed must be given!")
+    num_workers = num_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(min(num_workers, len(seeds))) as pool:
+        futures = [pool.submit(run_member, island_geography,
+                               initial_population, seed, num_years,
+                               animal_params, landscape_params, vectorized,
+                               density_grids)
+                   for seed in seeds]
+        results = [future.result() for future in futures]
+
+    ensemble = {"seed": np.array(seeds),
+                "year": np.arange(1, num_years + 1)}
+    for name in results[0]:
+        ensemble[name] = np.stack([result[name] for result in results])
+    return ensemble
@@ -7,8 +7,13 @@ This module provides the class for implementing the island.
 __author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
 __email__ = "idna@nmbu.no & kjkv@nmbu.no"
 
-from biosim.landscape import Jungle, Savannah, Desert, Mountain, Ocean
+from biosim.landscape import Landscape, Jungle, Savannah, Desert, Mountain, \
+    Ocean
 from biosim.animals import Herbivore, Carnivore
+from biosim.parallel import CellExecutor, find_cell_methods, \
+    run_cell_methods
+from biosim.random_stream import RandomStream
+import numpy as np
 import textwrap
 
 
@@ -19,7 +24,8 @@ class IslandMap:
     on the island, e.g. for feeding and procreating, and all seasons run
     from the Island Map class.
     """
-    def __init__(self, island_geography, initial_population):
+    def __init__(self, island_geography, initial_population,
+                 vectorized=False, rng=None, num_workers=None):
         """
         Initialize map class with given island geography and initial population
         of the various cells.
@@ -28,12 +34,54 @@ class IslandMap:
         :type island_geography: multiline str
         :param initial_population: Specifies initial population of each cell
         :type initial_population: list of dicts
+        :param vectorized: If True, the animals of each cell are stored in
+            population arrays, and all seasons use the vectorized methods of
+            the landscape cells.
+        :type vectorized: bool
+        :param rng: Random number generator shared by all cells of the map,
+            numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
+        :param num_workers: If given, feeding, procreation, aging, weight
+            loss and dying are run for all cells in this number of worker
+            processes, and each cell draws random numbers from its own
+            stream, spawned from rng. Results do not depend on the number of
+            workers.
+        :type num_workers: int, None
         """
         self.geography = {}
         self.population = {}
         self.map = {}
         self.geogr = textwrap.dedent(island_geography)
         self.ini_pop = initial_population
+        self.vectorized = vectorized
+        self.rng = np.random if rng is None else rng
+        self.executor = None
+        if num_workers is not None:
+            self.executor = CellExecutor(num_workers)
+
+        # The following are created by create_adjacency_table
+        self.locations = []
+        self.location_index = {}
+        self.cells = []
+        self.neighbour_pointers = np.zeros(1, dtype=int)
+        self.neighbour_indices = np.zeros(0, dtype=int)
+        self.passable_indices = np.zeros(0, dtype=int)
+
+        # The following are created by create_fodder_array
+        self.fodder = np.zeros(0)
+        self.fodder_indices = {}
+
+        # The following are created by count_animals, and kept up to date
+        # by update_counts as animals are born, die, are eaten and move
+        self.cell_counts = np.zeros((0, 2), dtype=int)
+        self.num_herbs = 0
+        self.num_carns = 0
+
+        # Number of animals moved in the last migration season
+        self.num_migrants = 0
+        # If set to a biosim.profiling.SeasonProfiler, run_all_seasons runs
+        # every season through it
+        self.profiler = None
 
     def check_boundaries_are_ocean(self):
         """
@@ -125,6 +173,9 @@ class IslandMap:
                     self.map[location].pop_carn.append(Carnivore(animal_info))
                 else:
                     self.map[location].pop_herb.append(Herbivore(animal_info))
+            if self.vectorized:
+                self.map[location].pack_population()
+            self.update_counts(self.location_index[location])
 
     def create_map_dict(self):
         """
@@ -140,155 +191,698 @@ class IslandMap:
         self.create_population_dict()
 
         for location, landscape_type in self.geography.items():
-            if landscape_type is "J":
+            if landscape_type == "J":
                 if location in self.population.keys():
-                    self.map[location] = Jungle(self.population[location])
+                    self.map[location] = Jungle(self.population[location],
+                                                self.rng)
                 else:
-                    self.map[location] = Jungle([])
-            elif landscape_type is "S":
+                    self.map[location] = Jungle([], self.rng)
+            elif landscape_type == "S":
                 if location in self.population.keys():
-                    self.map[location] = Savannah(self.population[location])
+                    self.map[location] = Savannah(self.population[location],
+                                                  self.rng)
                 else:
-                    self.map[location] = Savannah([])
-            elif landscape_type is "D":
+                    self.map[location] = Savannah([], self.rng)
+            elif landscape_type == "D":
                 if location in self.population.keys():
-                    self.map[location] = Desert(self.population[location])
+                    self.map[location] = Desert(self.population[location],
+                                                self.rng)
                 else:
-                    self.map[location] = Desert([])
-            elif landscape_type is "O":
-                self.map[location] = Ocean([])
-            elif landscape_type is "M":
-                self.map[location] = Mountain([])
+                    self.map[location] = Desert([], self.rng)
+            elif landscape_type == "O":
+                self.map[location] = Ocean([], self.rng)
+            elif landscape_type == "M":
+                self.map[location] = Mountain([], self.rng)
             else:
                 raise ValueError(f"Invalid landscape type {landscape_type}")
 
+        if self.vectorized:
+            for landscape in self.map.values():
+                landscape.pack_population()
+        self.create_adjacency_table()
+        self.create_fodder_array()
+        self.count_animals()
+        if self.executor is not None:
+            self.create_cell_streams()
+
+    def create_adjacency_table(self):
+        """
+        Numbers all cells of the map in row-major order, and finds the
+        neighbouring cells an animal can move to from each cell, that is the
+        neighbours that are not Mountain or Ocean. The neighbours are stored
+        in compressed sparse row format: the indices of the neighbours of cell
+        i are neighbour_indices[neighbour_pointers[i]:neighbour_pointers[i+1]],
+        in the order north, west, east, south.
+        Geography never changes, so the table is only created once.
+        """
+        self.locations = list(self.map.keys())
+        self.location_index = {location: index for index, location
+                               in enumerate(self.locations)}
+        self.cells = list(self.map.values())
+
+        lines = self.geogr.splitlines()
+        num_rows, num_cols = len(lines), len(lines[0])
+        passable = np.array([[landscape_type in "JSD"
+                              for landscape_type in line] for line in lines])
+        index = np.arange(num_rows * num_cols).reshape(num_rows, num_cols)
+
+        neighbours = np.full((num_rows, num_cols, 4), -1)
+        neighbours[1:, :, 0] = np.where(passable[:-1, :], index[:-1, :], -1)
+        neighbours[:, 1:, 1] = np.where(passable[:, :-1], index[:, :-1], -1)
+        neighbours[:, :-1, 2] = np.where(passable[:, 1:], index[:, 1:], -1)
+        neighbours[:-1, :, 3] = np.where(passable[1:, :], index[1:, :], -1)
+        neighbours = neighbours.reshape(num_rows * num_cols, 4)
+
+        is_neighbour = neighbours >= 0
+        self.neighbour_pointers = np.concatenate(
+            ([0], np.cumsum(is_neighbour.sum(axis=1)))
+        )
+        self.neighbour_indices = neighbours[is_neighbour]
+        self.passable_indices = np.flatnonzero(passable)
+
+    def create_fodder_array(self):
+        """
+        Creates the fodder array of the map, with the amount of fodder for
+        herbivores of each cell, and binds every cell to its element, so
+        that the cells read and write their fodder in the array. The indices
+        of the cells animals can stay in are grouped by landscape class in
+        fodder_indices, for the fodder update of regrow_fodder.
+        """
+        self.fodder = np.zeros(len(self.cells))
+        for index, cell in enumerate(self.cells):
+            cell.bind_fodder(self.fodder, index)
+        fodder_indices = {}
+        for index in self.passable_indices.tolist():
+            fodder_indices.setdefault(type(self.cells[index]),
+                                      []).append(index)
+        self.fodder_indices = {landscape_class: np.array(indices)
+                               for landscape_class, indices
+                               in fodder_indices.items()}
+
+    def count_animals(self):
+        """
+        Counts the animals of each species in every cell of the map, and on
+        the whole island. The counts are stored in cell_counts, with one row
+        per cell and the number of herbivores and carnivores as columns, and
+        the totals in num_herbs and num_carns.
+        """
+        self.cell_counts = np.array(
+            [(cell.num_herbs, cell.num_carns) for cell in self.cells],
+            dtype=int
+        ).reshape(len(self.cells), 2)
+        self.num_herbs, self.num_carns = \
+            self.cell_counts.sum(axis=0).tolist()
+
+    def update_counts(self, index):
+        """
+        Updates the counts of a cell, and the totals of the island by the
+        change in the cell. Called by the seasons for every cell whose
+        animals they may have changed, so that the totals never need to be
+        found by counting the animals of all cells.
+
+        :param index: Index of cell
+        :type index: int
+        """
+        cell = self.cells[index]
+        num_herbs, num_carns = cell.num_herbs, cell.num_carns
+        counts = self.cell_counts[index]
+        old_herbs, old_carns = counts.tolist()
+        self.num_herbs += num_herbs - old_herbs
+        self.num_carns += num_carns - old_carns
+        counts[0], counts[1] = num_herbs, num_carns
+
+    def active_indices(self):
+        """
+        Returns the indices of the cells that have animals, in row-major
+        order, found from the counts kept by update_counts. Cells without
+        animals, which include all Ocean and Mountain cells, have nothing
+        to do in any season but feeding, where their fodder is updated by
+        regrow_fodder, so the seasons only visit these cells.
+
+        The counts are not checked against the cells here. Instead, every
+        way of adding animals to a cell updates them: add_population,
+        migration, move_single_animal and the cells returned by worker
+        processes call update_counts for every cell they change, and
+        procreation only adds animals to cells that are already active.
+        Animals must therefore not be added to the cells of the map
+        directly, without calling update_counts or count_animals.
+
+        :return: Indices of cells with animals
+        :rtype: list
+        """
+        return np.flatnonzero(self.cell_counts.any(axis=1)).tolist()
+
+    def regrow_fodder(self):
+        """
+        Updates the fodder of all cells animals can stay in, whether they
+        have animals or not, in the fodder array of the map, with one call
+        to batch_regrowth per landscape class. The herbivores are then fed
+        without updating the fodder again.
+        """
+        for landscape_class, indices in self.fodder_indices.items():
+            self.fodder[indices] = landscape_class.batch_regrowth(
+                self.fodder[indices]
+            )
+
+    @property
+    def num_animals_per_species(self):
+        """
+        Number of animals per species on the island, as dictionary.
+        """
+        return {"Herbivore": self.num_herbs, "Carnivore": self.num_carns}
+
+    def density_grid(self, species):
+        """
+        Returns the number of animals of a species in every cell, arranged
+        as the map, taken directly from the counts of the cells.
+
+        :param species: Name of species, "Herbivore" or "Carnivore"
+        :type species: str
+        :return: Number of animals, with one row per row of the map and one
+            column per column of the map
+        :rtype: ndarray
+        :raise ValueError: if species is not a valid species name
+        """
+        columns = {"Herbivore": 0, "Carnivore": 1}
+        if species not in columns:
+            raise ValueError(f"{species} is an invalid species name!")
+        lines = self.geogr.splitlines()
+        return self.cell_counts[:, columns[species]].reshape(
+            len(lines), len(lines[0])
+        ).copy()
+
+    def create_cell_streams(self):
+        """
+        Gives each cell animals can stay in its own random stream, spawned
+        from the random number generator of the map, so that the random
+        numbers of a cell do not depend on where its seasons are run.
+        If the map uses numpy.random, the streams are spawned from a stream
+        seeded by it. The streams use small blocks, since cells are sent
+        to and from the worker processes with their streams.
+        """
+        rng = self.rng
+        if not isinstance(rng, RandomStream):
+            rng = RandomStream(rng.randint(2 ** 31))
+        streams = rng.spawn(len(self.passable_indices), block_size=64)
+        for index, stream in zip(self.passable_indices.tolist(), streams):
+            self.cells[index].rng = stream
+
+    def run_cell_seasons(self, *seasons):
+        """
+        Runs cell-local seasons for all cells animals can stay in. Cells with
+        animals are sent to the worker processes of the executor, and the
+        cells returned by the workers replace the old cells on the map. Cells
+        without animals only need their fodder updated, and are handled in
+        this process, since sending them would cost more than updating them.
+
+        :param seasons: Names of seasons, as given in
+            biosim.parallel.CELL_SEASONS
+        :type seasons: str
+        """
+        method_names = find_cell_methods(seasons, self.vectorized)
+        occupied = []
+        empty_cells = []
+        for index in self.passable_indices.tolist():
+            cell = self.cells[index]
+            if cell.num_herbs + cell.num_carns > 0:
+                occupied.append(index)
+            else:
+                empty_cells.append(cell)
+        run_cell_methods(empty_cells, method_names)
+        cells = self.executor.run([self.cells[index] for index in occupied],
+                                  method_names)
+        for index, cell in zip(occupied, cells):
+            self.cells[index] = cell
+            self.map[self.locations[index]] = cell
+            cell.bind_fodder(self.fodder, index)
+            self.update_counts(index)
+
+    def shutdown_executor(self):
+        """
+        Stops the worker processes of the executor, if any. They are started
+        again when needed.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def update_fitness(self):
+        """
+        Updates fitness of all animals on the island whose fitness must be
+        updated. The animals of each species in all cells are gathered, so
+        that fitness is computed in a single NumPy pass per species.
+        """
+        active = [self.cells[index] for index in self.active_indices()]
+        if not self.vectorized:
+            for species, name in ((Herbivore, "pop_herb"),
+                                  (Carnivore, "pop_carn")):
+                animals = []
+                for landscape in active:
+                    animals.extend(getattr(landscape, name))
+                Landscape.update_fitness_of_animals(species, animals)
+            return
+
+        for species, name in ((Herbivore, "herbs"), (Carnivore, "carns")):
+            populations = [getattr(landscape, name) for landscape in active
+                           if len(getattr(landscape, name)) > 0]
+            if len(populations) == 0:
+                continue
+            dirty = np.concatenate([population.fitness_must_be_updated
+                                    for population in populations])
+            if not dirty.any():
+                continue
+            fitness = np.concatenate([population.fitness
+                                      for population in populations])
+            fitness[dirty] = species.batch_fitness(
+                np.concatenate([population.age
+                                for population in populations])[dirty],
+                np.concatenate([population.weight
+                                for population in populations])[dirty]
+            )
+            splits = np.cumsum([len(population)
+                                for population in populations])[:-1]
+            for population, population_fitness in zip(
+                    populations, np.split(fitness, splits)
+            ):
+                population.fitness = population_fitness
+                population.fitness_must_be_updated[:] = False
+
     def feeding_season(self):
         """
-        Iterates through all landscape cells on the map,
-        and feeds all herbivores and carnivores in each cell.
-        """
-        for landscape in self.map.values():
-            landscape.feed_all_herbivores()
+        Updates the fodder of all cells animals can stay in, then iterates
+        through the cells with animals, and feeds all herbivores and
+        carnivores in each cell.
+        In vectorized mode, all herbivores on the island are fed before the
+        carnivores, so that fitness can be updated for the whole island in
+        between.
+        """
+        if self.executor is not None:
+            self.run_cell_seasons("feeding")
+            return
+        self.regrow_fodder()
+        active = self.active_indices()
+        if self.vectorized:
+            self.update_fitness()
+            for index in active:
+                self.cells[index].feed_all_herbivores_vectorized(regrow=False)
+            self.update_fitness()
+            for index in active:
+                self.cells[index].feed_all_carnivores_vectorized()
+                self.update_counts(index)
+            return
+
+        for index in active:
+            landscape = self.cells[index]
+            landscape.feed_all_herbivores(regrow=False)
             landscape.feed_all_carnivores()
+            self.update_counts(index)
 
     def procreation_season(self):
         """
-        Iterates through all landscape cells on the map,
+        Iterates through the landscape cells with animals,
         and tries to procreate with all animals in each cell.
         """
-        for landscape in self.map.values():
-            landscape.add_newborn_animals()
+        if self.executor is not None:
+            self.run_cell_seasons("procreation")
+            return
+        if self.vectorized:
+            self.update_fitness()
+        for index in self.active_indices():
+            landscape = self.cells[index]
+            if self.vectorized:
+                landscape.add_newborn_animals_vectorized()
+            else:
+                landscape.add_newborn_animals()
+            self.update_counts(index)
 
     def neighbours_of_current_cell(self, current_coordinates):
         """
-        Finds all neighbouring coordinates of a given cell. Checks the
-        landscape type of each coordinate. The neighbours
-        with landscape types an animal can move to, are returned.
+        Finds all neighbouring cells of a given cell that an animal can move
+        to, that is neighbours with other landscape types than Mountain and
+        Ocean. The neighbours are looked up in the adjacency table created
+        by create_map_dict.
 
         :param current_coordinates: Location of current cell
         :type current_coordinates: tuple
         :return: Locations as keys and landscape class instance as values
         :rtype: dict
         """
-        neighbours_of_current_cell = {}
-        n, m = current_coordinates[0], current_coordinates[1]
-        neighbours = [(n-1, m), (n, m-1), (n, m+1), (n+1, m)]
-        for neighbour_cell in neighbours:
-            if neighbour_cell in self.map.keys():
-                landscape_type = type(self.map[neighbour_cell]).__name__
-                if landscape_type is not "Mountain":
-                    if landscape_type is not "Ocean":
-                        neighbours_of_current_cell[neighbour_cell] = \
-                            self.map[neighbour_cell]
-        return neighbours_of_current_cell
-
-    def move_single_animal(self, current_coordinates, single_animal):
-        """
-        If the animal has not moved so far this year, it's neighbours are
-        found. Then, the new coordinates of the animal are chosen.
+        index = self.location_index.get(current_coordinates)
+        if index is None:
+            return {}
+        neighbour_indices = self.neighbour_indices[
+            self.neighbour_pointers[index]:self.neighbour_pointers[index + 1]
+        ]
+        return {self.locations[neighbour]: self.cells[neighbour]
+                for neighbour in neighbour_indices.tolist()}
+
+    def find_rel_abund_of_fodder(self):
+        """
+        Finds the relative abundance of fodder in every cell of the map for
+        each species, given by
+
+        .. math::
+
+            \\epsilon = \\frac{f_k}{(n_k + 1)F^{'}}
+
+        where :math:`f_k` is the amount of relevant fodder and :math:`n_k` is
+        the number of animals of same species in cell k. Relevant fodder is
+        the plant fodder for herbivores, and the total weight of the
+        herbivores for carnivores. The plant fodder is read from the fodder
+        array of the map. Only cells with herbivores have fodder for
+        carnivores, so only those cells are visited.
+
+        :return: Animal classes as keys, arrays with the relative abundance
+            of fodder in each cell as values
+        :rtype: dict
+        """
+        num_herbs, num_carns = self.cell_counts.T
+        fodder_carn = np.zeros(len(self.cells))
+        herb_indices = np.flatnonzero(num_herbs)
+        fodder_carn[herb_indices] = [
+            self.cells[index].available_fodder_carnivore()
+            for index in herb_indices.tolist()
+        ]
+        return {
+            Herbivore: self.fodder / ((num_herbs + 1) * Herbivore.params["F"]),
+            Carnivore: fodder_carn / ((num_carns + 1) * Carnivore.params["F"])
+        }
+
+    def migration_probability_tables(self, rel_abund_fodder=None):
+        """
+        Finds the cumulative probability of moving from each cell to each of
+        it's neighbours, for each species. The probabilities only depend on
+        the state of the neighbours, so one table per cell and species is
+        shared by all animals moving from that cell during a migration season.
+        The tables are aligned with neighbour_indices, so that the cumulative
+        probabilities for cell i are
+        table[neighbour_pointers[i]:neighbour_pointers[i+1]].
+
+        :param rel_abund_fodder: Relative abundance of fodder in each cell for
+            each species, as returned by find_rel_abund_of_fodder. Found from
+            the current state of the map if not given.
+        :type rel_abund_fodder: dict
+        :return: Animal classes as keys, cumulative probabilities as values
+        :rtype: dict
+        """
+        if rel_abund_fodder is None:
+            rel_abund_fodder = self.find_rel_abund_of_fodder()
+
+        num_neighbours = np.diff(self.neighbour_pointers)
+        rows = np.repeat(np.arange(len(num_neighbours)), num_neighbours)
+        cols = np.arange(len(self.neighbour_indices)) - \
+            self.neighbour_pointers[rows]
+
+        tables = {}
+        for species, abundance in rel_abund_fodder.items():
+            propensity = np.zeros((len(num_neighbours), 4))
+            propensity[rows, cols] = np.exp(
+                species.params["lambda"] * abundance[self.neighbour_indices]
+            )
+            cum_propensity = np.cumsum(propensity, axis=1)
+            tables[species] = cum_propensity[rows, cols] / \
+                cum_propensity[rows, -1]
+        return tables
+
+    def move_single_animal(self, current_coordinates, single_animal,
+                           neighbours_of_current_cell=None, cum_probs=None):
+        """
+        The neighbours of the animal are found, unless they are given. Then,
+        the new coordinates of the animal are chosen.
         If they are None, the animal does not move.
-        If they are a tuple, the animal is moved to the chosen cell.
-        The new cell receives updated population lists.
+        If they are a tuple, the animal is moved from the population list of
+        its current cell to that of the chosen cell, and the counts of both
+        cells are updated.
 
         :param current_coordinates: x coordinate, y coordinate
         :type current_coordinates: tuple
         :param single_animal: Animal that tries to move
         :type single_animal: class '__main__.Herbivore' or
             class '__main__.Carnivore'
-        :return: True if animal has moved, False if not
+        :param neighbours_of_current_cell: Neighbours of current cell, as
+            returned by neighbours_of_current_cell
+        :type neighbours_of_current_cell: dict
+        :param cum_probs: Cumulative probability of moving to each of the
+            neighbours, from migration_probability_tables
+        :type cum_probs: array
+        :return: True if animal has moved, None if not
         :rtype: bool
         """
-        if single_animal.has_moved_this_year is False:
+        if neighbours_of_current_cell is None:
             neighbours_of_current_cell = self.neighbours_of_current_cell(
                 current_coordinates
             )
-            new_coordinates = single_animal.return_new_coordinates(
-                neighbours_of_current_cell
+        new_coordinates = single_animal.return_new_coordinates(
+            neighbours_of_current_cell, cum_probs, self.rng
+        )
+        if new_coordinates is not None:
+            if type(single_animal).__name__ == "Herbivore":
+                name = "pop_herb"
+            else:
+                name = "pop_carn"
+            getattr(self.map[current_coordinates], name).remove(single_animal)
+            getattr(self.map[new_coordinates], name).append(single_animal)
+            self.update_counts(self.location_index[current_coordinates])
+            self.update_counts(self.location_index[new_coordinates])
+            return True
+
+    def move_all_animals_in_cell(self, current_coordinates, current_landscape,
+                                 migration_tables=None, buffers=None):
+        """
+        Moves the animals in the population lists of a cell. For each
+        species, batch_move of the animal class decides for all animals in
+        the cell at once whether they move and where, using the cell's
+        migration table and random number generator. Moving animals are
+        removed from the cell. If buffers are given, the movers are added to
+        the buffer of their new cell, to be committed by
+        commit_migration_buffers when all cells have been handled. Otherwise
+        they are moved at once. Animals in cells without neighbours to move
+        to stay.
+
+        :param current_coordinates: x coordinate, y coordinate
+        :type current_coordinates: tuple
+        :param current_landscape: Landscape type of current cell
+        :type current_landscape: class '__main__.Jungle',
+            class '__main__.Desert', class '__main__.Savannah'
+        :param migration_tables: Cumulative probabilities, as returned by
+            migration_probability_tables. Found from the current state of
+            the map if not given.
+        :type migration_tables: dict
+        :param buffers: Index of new cell as keys, lists of arriving
+            animals as values
+        :type buffers: dict
+        """
+        index = self.location_index[current_coordinates]
+        start = self.neighbour_pointers[index]
+        stop = self.neighbour_pointers[index + 1]
+        if start == stop:
+            return
+        if migration_tables is None:
+            migration_tables = self.migration_probability_tables()
+        commit = buffers is None
+        if commit:
+            buffers = {}
+        current_landscape.update_fitness()
+        destinations = self.neighbour_indices[start:stop].tolist()
+
+        for species, name in ((Herbivore, "pop_herb"),
+                              (Carnivore, "pop_carn")):
+            animals = getattr(current_landscape, name)
+            if len(animals) == 0:
+                continue
+            choice = species.batch_move(
+                [animal.fitness for animal in animals],
+                migration_tables[species][start:stop],
+                current_landscape.rng
             )
-            if new_coordinates is not None:
-                if type(single_animal).__name__ is "Herbivore":
-                    self.map[new_coordinates].pop_herb.append(single_animal)
-                    return True
+            movers = [[] for _ in destinations]
+            staying = []
+            for animal, neighbour in zip(animals, choice.tolist()):
+                if neighbour < 0:
+                    staying.append(animal)
                 else:
-                    self.map[new_coordinates].pop_carn.append(single_animal)
-                    return True
-
-    def move_all_animals_in_cell(self, current_coordinates, current_landscape):
-        """
-        Iterates through the population lists of a cell. Attempts to move all
-        animals, and updates animal population lists if an animal moved.
+                    movers[neighbour].append(animal)
+            setattr(current_landscape, name, staying)
+            for destination, arrivals in zip(destinations, movers):
+                if len(arrivals) > 0:
+                    buffers.setdefault(destination, []).append(
+                        (index, name, arrivals)
+                    )
+        self.update_counts(index)
+
+        if commit:
+            self.commit_migration_buffers(buffers)
+
+    def move_all_animals_in_cell_vectorized(
+            self, current_coordinates, current_landscape,
+            migration_tables=None, buffers=None
+    ):
+        """
+        Vectorized version of move_all_animals_in_cell, for animals stored in
+        the population arrays. Moves and destinations are decided for the
+        whole population of each species with batch_move of the animal class,
+        and the movers bound for each neighbour are taken out of the
+        population in bulk, so the work scales with the number of cells
+        rather than the number of animals. If buffers are given, the movers
+        are added to the buffer of their new cell, otherwise they are moved
+        at once. Animals that have no neighbouring cell to move to stay.
 
         :param current_coordinates: x coordinate, y coordinate
         :type current_coordinates: tuple
         :param current_landscape: Landscape type of current cell
         :type current_landscape: class '__main__.Jungle',
             class '__main__.Desert', class '__main__.Savannah'
-        """
-        current_landscape.pop_herb = [
-            animal for animal in current_landscape.pop_herb
-            if not self.move_single_animal(current_coordinates, animal)
-        ]
-        current_landscape.pop_carn = [
-            animal for animal in current_landscape.pop_carn
-            if not self.move_single_animal(current_coordinates, animal)
-        ]
+        :param migration_tables: Cumulative probabilities, as returned by
+            migration_probability_tables. Found from the current state of
+            the map if not given.
+        :type migration_tables: dict
+        :param buffers: Index of new cell as keys, lists of arriving
+            populations as values
+        :type buffers: dict
+        """
+        index = self.location_index[current_coordinates]
+        start = self.neighbour_pointers[index]
+        stop = self.neighbour_pointers[index + 1]
+        if start == stop:
+            return
+        if migration_tables is None:
+            migration_tables = self.migration_probability_tables()
+        commit = buffers is None
+        if commit:
+            buffers = {}
+        destinations = self.neighbour_indices[start:stop].tolist()
+
+        for name in ("herbs", "carns"):
+            population = getattr(current_landscape, name)
+            if len(population) == 0:
+                continue
+            population.update_fitness()
+            choice = population.species.batch_move(
+                population.fitness,
+                migration_tables[population.species][start:stop],
+                current_landscape.rng
+            )
+            for neighbour, destination in enumerate(destinations):
+                movers = population.select(choice == neighbour)
+                if len(movers) > 0:
+                    buffers.setdefault(destination, []).append(
+                        (index, name, movers)
+                    )
+            population.keep(choice < 0)
+        self.update_counts(index)
+
+        if commit:
+            self.commit_migration_buffers(buffers)
+
+    def commit_migration_buffers(self, buffers):
+        """
+        Adds all buffered movers to the populations of their new cells. The
+        arrivals to each cell are added in order of the index of the cell
+        they left, so the result does not depend on the order in which the
+        cells were emptied.
+
+        :param buffers: Index of new cell as keys, lists of tuples with index
+            of old cell, name of population and arriving animals as values
+        :type buffers: dict
+        :return: Number of animals added
+        :rtype: int
+        """
+        num_movers = 0
+        for destination, arrivals in buffers.items():
+            cell = self.cells[destination]
+            for _, name, movers in sorted(arrivals,
+                                          key=lambda arrival: arrival[0]):
+                getattr(cell, name).extend(movers)
+                num_movers += len(movers)
+            self.update_counts(destination)
+        return num_movers
 
     def migration_season(self):
         """
-        Iterates through all landscape cells on the map,
-        and moves all animals in each cell.
-        """
-        for location, landscape in self.map.items():
-            self.move_all_animals_in_cell(location, landscape)
+        Moves the animals on the island in two phases. First, the migration
+        tables are found, and the movers of all cells are collected in one
+        buffer per new cell. Then, all buffers are committed in one pass.
+        Since no mover arrives before all cells have been handled, no animal
+        can move twice, and the result does not depend on the order of the
+        cells. Only cells with animals are visited.
+        """
+        if self.vectorized:
+            self.update_fitness()
+        migration_tables = self.migration_probability_tables()
+        buffers = {}
+        for index in self.active_indices():
+            location, landscape = self.locations[index], self.cells[index]
+            if self.vectorized:
+                self.move_all_animals_in_cell_vectorized(
+                    location, landscape, migration_tables, buffers
+                )
+            else:
+                self.move_all_animals_in_cell(location, landscape,
+                                              migration_tables, buffers)
+        self.num_migrants = self.commit_migration_buffers(buffers)
 
     def aging_season(self):
         """
-        Iterates through all landscape cells on the map,
+        Iterates through the landscape cells with animals,
         and makes all animals in each cell older.
         """
-        for landscape in self.map.values():
-            landscape.make_all_animals_older()
+        if self.executor is not None:
+            self.run_cell_seasons("aging")
+            return
+        for index in self.active_indices():
+            landscape = self.cells[index]
+            if self.vectorized:
+                landscape.make_all_animals_older_vectorized()
+            else:
+                landscape.make_all_animals_older()
 
     def weight_loss_season(self):
         """
-        Iterates through all landscape cells on the map,
+        Iterates through the landscape cells with animals,
         and makes all animals in each cell lose weight.
         """
-        for landscape in self.map.values():
-            landscape.make_all_animals_lose_weight()
+        if self.executor is not None:
+            self.run_cell_seasons("weight_loss")
+            return
+        for index in self.active_indices():
+            landscape = self.cells[index]
+            if self.vectorized:
+                landscape.make_all_animals_lose_weight_vectorized()
+            else:
+                landscape.make_all_animals_lose_weight()
 
     def dying_season(self):
         """
-        Iterates through all landscape cells on the map,
+        Iterates through the landscape cells with animals,
         and removes all dead animals in each cell.
         """
-        for landscape in self.map.values():
-            landscape.remove_all_dead_animals()
+        if self.executor is not None:
+            self.run_cell_seasons("dying")
+            return
+        if self.vectorized:
+            self.update_fitness()
+        for index in self.active_indices():
+            landscape = self.cells[index]
+            if self.vectorized:
+                landscape.remove_all_dead_animals_vectorized()
+            else:
+                landscape.remove_all_dead_animals()
+            self.update_counts(index)
 
     def run_all_seasons(self):
         """
-        Runs all seasons for all landscape cells on the map.
-        """
+        Runs all seasons for all landscape cells on the map. With an
+        executor, the cell-local seasons before and after migration are each
+        run in one round of the worker processes. With a profiler, every
+        season is run and recorded by the profiler.
+        """
+        if self.profiler is not None:
+            self.profiler.run_year(self)
+            return
+        if self.executor is not None:
+            self.run_cell_seasons("feeding", "procreation")
+            self.migration_season()
+            self.run_cell_seasons("aging", "weight_loss", "dying")
+            return
         self.feeding_season()
         self.procreation_season()
         self.migration_season()
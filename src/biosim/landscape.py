@@ -8,6 +8,8 @@ __author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
 __email__ = "idaln@hotmail.com & kjkv@nmbu.no"
 
 from biosim.animals import Herbivore, Carnivore
+from biosim.population import Population
+import numpy as np
 
 
 class Landscape:
@@ -15,6 +17,10 @@ class Landscape:
     Parent class for all landscape types. Landscape cell stores the instances
     of all animals in the cell, and has methods for running all animal methods
     for each animal.
+
+    All random numbers of the cell are drawn from its random number
+    generator rng, which is the numpy.random module unless another generator
+    is given.
     """
     _DEFAULT_PARAMS = {
         "f_max": 800,
@@ -43,7 +49,7 @@ class Landscape:
         """
         cls.params = cls.GET_DEFAULT_PARAMS()
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class with given population. Creates instances of
         correct species for all elements in population list, and adds the
@@ -52,25 +58,126 @@ class Landscape:
         :param population: Contains dictionaries containing
             information about each animal
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        self.fodder_amount = 0
+        self.rng = np.random if rng is None else rng
+        self._fodder = np.zeros(1)
         self.pop_carn = []
         self.pop_herb = []
-        
+        self.herbs = Population(Herbivore)
+        self.carns = Population(Carnivore)
+
         for animal_info in population:
-            if animal_info["species"] is "Herbivore":
+            if animal_info["species"] == "Herbivore":
                 self.pop_herb.append(Herbivore(animal_info))
             else:
                 self.pop_carn.append(Carnivore(animal_info))
 
+    @property
+    def fodder_amount(self):
+        """
+        Amount of fodder for herbivores in the cell. It is stored in an
+        array of one element, which is a view of the fodder array of the
+        island map when the cell is bound to one by bind_fodder.
+        """
+        return self._fodder.item()
+
+    @fodder_amount.setter
+    def fodder_amount(self, fodder_amount):
+        self._fodder[0] = fodder_amount
+
+    def bind_fodder(self, fodder, index):
+        """
+        Stores the fodder of the cell in an element of an array shared by
+        all cells of an island map, keeping its current amount. A cell that
+        is pickled, e.g. to run in a worker process, gets an array of its
+        own, and must be bound again when it returns.
+
+        :param fodder: Amount of fodder of each cell of the map
+        :type fodder: ndarray
+        :param index: Index of the cell in the fodder array
+        :type index: int
+        """
+        fodder[index] = self._fodder[0]
+        self._fodder = fodder[index:index + 1]
+
+    @property
+    def num_herbs(self):
+        """
+        Number of herbivores in the cell, whether they are stored as
+        instances in pop_herb or as arrays in herbs.
+        """
+        return len(self.pop_herb) + len(self.herbs)
+
+    @property
+    def num_carns(self):
+        """
+        Number of carnivores in the cell, whether they are stored as
+        instances in pop_carn or as arrays in carns.
+        """
+        return len(self.pop_carn) + len(self.carns)
+
+    def pack_population(self):
+        """
+        Moves all animals in the cell from the population lists pop_herb and
+        pop_carn to the population arrays herbs and carns. Used when the
+        island is simulated in vectorized mode.
+        """
+        self.herbs.extend(Population.from_animals(Herbivore, self.pop_herb))
+        self.carns.extend(Population.from_animals(Carnivore, self.pop_carn))
+        self.pop_herb = []
+        self.pop_carn = []
+
+    def unpack_population(self):
+        """
+        Moves all animals in the cell from the population arrays herbs and
+        carns to the population lists pop_herb and pop_carn, creating one
+        animal class instance per animal.
+        """
+        self.pop_herb.extend(self.herbs.to_animals())
+        self.pop_carn.extend(self.carns.to_animals())
+        self.herbs = Population(Herbivore)
+        self.carns = Population(Carnivore)
+
+    @staticmethod
+    def update_fitness_of_animals(species, animals):
+        """
+        Updates fitness of the animals whose fitness must be updated, with one
+        call to batch_fitness of the animal class.
+
+        :param species: Animal class of the animals
+        :type species: class 'biosim.animals.Herbivore' or
+            class 'biosim.animals.Carnivore'
+        :param animals: Instances of the animal class
+        :type animals: list
+        """
+        dirty = [animal for animal in animals
+                 if animal.fitness_must_be_updated is True]
+        if len(dirty) == 0:
+            return
+        fitness = species.batch_fitness([animal.age for animal in dirty],
+                                        [animal.weight for animal in dirty])
+        for animal, animal_fitness in zip(dirty, fitness.tolist()):
+            animal.fitness = animal_fitness
+            animal.fitness_must_be_updated = False
+
+    def update_fitness(self):
+        """
+        Updates fitness of all animals in the cell whose fitness must be
+        updated, in one batch per species and storage.
+        """
+        self.update_fitness_of_animals(Herbivore, self.pop_herb)
+        self.update_fitness_of_animals(Carnivore, self.pop_carn)
+        self.herbs.update_fitness()
+        self.carns.update_fitness()
+
     def sort_herb_population_by_fitness(self):
         """
         Sorts herbivore population by fitness, from highest to
         lowest. Uses lambda sorting.
         """
-        for herb in self.pop_herb:
-            if herb.fitness_must_be_updated is True:
-                herb.find_fitness()
+        self.update_fitness_of_animals(Herbivore, self.pop_herb)
         self.pop_herb = sorted(self.pop_herb, key=lambda x: x.fitness,
                                reverse=True)
 
@@ -79,9 +186,7 @@ class Landscape:
         Sorts carnivore population by fitness, from highest to
         lowest. Uses lambda sorting.
         """
-        for carn in self.pop_carn:
-            if carn.fitness_must_be_updated is True:
-                carn.find_fitness()
+        self.update_fitness_of_animals(Carnivore, self.pop_carn)
         self.pop_carn = sorted(self.pop_carn, key=lambda x: x.fitness,
                                reverse=True)
 
@@ -91,6 +196,19 @@ class Landscape:
         """
         self.fodder_amount = self.params["f_max"]
 
+    @classmethod
+    def batch_regrowth(cls, fodder_amount):
+        """
+        Returns the amount of fodder for herbivores after regrowth for many
+        cells of this landscape type at once, as regrowth does for one cell.
+
+        :param fodder_amount: Amount of fodder of each cell
+        :type fodder_amount: ndarray
+        :return: Amount of fodder of each cell after regrowth
+        :rtype: ndarray
+        """
+        return np.full(len(fodder_amount), cls.params["f_max"], dtype=float)
+
     def available_fodder_herbivore(self):
         """
         Returns amount of fodder available to an herbivore. If plenty of fodder
@@ -122,32 +240,57 @@ class Landscape:
         available_fodder_amount = 0
         for herb in self.pop_herb:
             available_fodder_amount += herb.weight
+        if len(self.herbs) > 0:
+            available_fodder_amount += self.herbs.weight.sum()
         return available_fodder_amount
 
-    def feed_all_herbivores(self):
+    def feed_all_herbivores(self, regrow=True):
         """
         Updates fodder amount of the cell and sorts the herbivore population by
         fitness. Then, iterates over the population of herbivores and feeds
         all, utilizing the eating method.
+
+        :param regrow: If False, the fodder is not updated, since the island
+            has already updated the fodder of all cells
+        :type regrow: bool
         """
-        self.regrowth()
+        if regrow:
+            self.regrowth()
         self.sort_herb_population_by_fitness()
         for herb in self.pop_herb:
             herb.add_eaten_fodder_to_weight(self.available_fodder_herbivore())
 
     def feed_all_carnivores(self):
         """
-        Sorts carnivore population in the cell by fitness. Then, iterates over
-        the carnivores and feeds them all, using their eating method,
-        attempt_eating_all_herbivores_in_cell. Lastly it removes eaten
-        herbivores from herbivore population, with remove_all_eaten_herbivores.
+        Sorts carnivore and herbivore populations in the cell by fitness.
+        Then, iterates over the carnivores and feeds them all, using their
+        eating method, attempt_eating_all_herbivores_in_cell. The carnivores
+        share one set with the identities of eaten herbivores, which they
+        skip and add their kills to. Lastly it removes all eaten herbivores
+        from herbivore population in one pass. Since the fitness of
+        herbivores does not change while carnivores eat, the herbivores are
+        sorted only once.
         """
         self.sort_carn_population_by_fitness()
+        self.sort_herb_population_by_fitness()
+        eaten_ids = set()
         for carn in self.pop_carn:
-            self.sort_herb_population_by_fitness()
-            eaten_herbivores = carn.attempt_eating_all_herbivores_in_cell(
-                self.pop_herb)
-            self.remove_all_eaten_herbivores(eaten_herbivores)
+            carn.attempt_eating_all_herbivores_in_cell(self.pop_herb,
+                                                       eaten_ids, self.rng)
+        if len(eaten_ids) > 0:
+            self.remove_herbivores_by_id(eaten_ids)
+
+    def remove_herbivores_by_id(self, eaten_ids):
+        """
+        Removes herbivores whose identity is in a set from the herbivore
+        population of the cell, keeping the order of the others.
+
+        :param eaten_ids: Identities of herbivores that have been eaten, as
+            given by id
+        :type eaten_ids: set
+        """
+        self.pop_herb = [herb for herb in self.pop_herb
+                         if id(herb) not in eaten_ids]
 
     def remove_all_eaten_herbivores(self, eaten_herbivores):
         """
@@ -158,38 +301,53 @@ class Landscape:
             during feeding of a carnivore.
         :type eaten_herbivores: list
         """
-        self.pop_herb = [herb for herb in self.pop_herb
-                         if herb not in eaten_herbivores]
+        self.remove_herbivores_by_id({id(herb) for herb in eaten_herbivores})
+
+    @staticmethod
+    def find_newborn_animals(species, animals, rng=None):
+        """
+        Makes all animals in a list procreate at once, using batch_birth of
+        the animal class. Mothers lose :math:`\\xi \\cdot birth weight`,
+        and one newborn instance is created per birth.
+
+        :param species: Animal class of the animals
+        :type species: class 'biosim.animals.Herbivore' or
+            class 'biosim.animals.Carnivore'
+        :param animals: Instances of the animal class, with updated fitness
+        :type animals: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
+        :return: Newborn animals
+        :rtype: list
+        """
+        if len(animals) == 0:
+            return []
+        weight = np.array([animal.weight for animal in animals])
+        mothers, birth_weight = species.batch_birth(
+            weight, np.array([animal.fitness for animal in animals]), rng
+        )
+        new_weight = weight[mothers] - birth_weight * species.params['xi']
+        for mother, mother_weight in zip(mothers.tolist(),
+                                         new_weight.tolist()):
+            animals[mother].weight = mother_weight
+            animals[mother].fitness_must_be_updated = True
+        return [species.newborn(baby_weight)
+                for baby_weight in birth_weight.tolist()]
 
     def add_newborn_animals(self):
         """
-        Iterates over both population lists of grown animals, in turn, and
-        makes all animals procreate using the animal's birth_process_method.
-        If birth_process returns a weight, a new animal will be born.
-        Thus, a new class instance is added to the
-        correct population list.
-        """
-        initial_num_herbs = len(self.pop_herb)
-        for animal in self.pop_herb[:initial_num_herbs]:
-            baby_weight = animal.birth_process(initial_num_herbs)
-            if type(baby_weight) is (float or int):
-                self.pop_herb.append(
-                    Herbivore({"species": "Herbivore",
-                               "age": 0,
-                               "weight": baby_weight})
-                )
-                self.pop_herb[-1].fitness_must_be_updated = True
-
-        initial_num_carns = len(self.pop_carn)
-        for animal in self.pop_carn[:initial_num_carns]:
-            baby_weight = animal.birth_process(initial_num_carns)
-            if type(baby_weight) is (float or int):
-                self.pop_carn.append(
-                    Carnivore({"species": "Carnivore",
-                               "age": 0,
-                               "weight": baby_weight})
-                )
-                self.pop_carn[-1].fitness_must_be_updated = True
+        Makes all grown animals in both population lists procreate, deciding
+        all births of a population list at once with find_newborn_animals.
+        The newborn animals are added to the end of the correct population
+        list.
+        """
+        self.update_fitness()
+        self.pop_herb.extend(self.find_newborn_animals(Herbivore,
+                                                       self.pop_herb,
+                                                       self.rng))
+        self.pop_carn.extend(self.find_newborn_animals(Carnivore,
+                                                       self.pop_carn,
+                                                       self.rng))
 
     def make_all_animals_older(self):
         """
@@ -205,15 +363,184 @@ class Landscape:
         for animal in self.pop_herb + self.pop_carn:
             animal.weight_loss()
 
+    @staticmethod
+    def find_surviving_animals(species, animals, rng=None):
+        """
+        Decides which animals in a list survive, by computing the probability
+        of death of all animals as an array and comparing it with one vector
+        of random numbers.
+
+        :param species: Animal class of the animals
+        :type species: class 'biosim.animals.Herbivore' or
+            class 'biosim.animals.Carnivore'
+        :param animals: Instances of the animal class, with updated fitness
+        :type animals: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
+        :return: Animals that survive
+        :rtype: list
+        """
+        if len(animals) == 0:
+            return animals
+        if rng is None:
+            rng = np.random
+        prob = species.batch_prob_death([animal.fitness for animal in animals])
+        survives = rng.random(len(animals)) > prob
+        return [animal for animal, lives in zip(animals, survives.tolist())
+                if lives]
+
     def remove_all_dead_animals(self):
         """
-        Iterates over population lists and runs the death method of all the
-        animals. Updates the population lists to only contain living animals.
-        """
-        self.pop_herb = [herb for herb in self.pop_herb
-                         if herb.will_animal_live() is True]
-        self.pop_carn = [carn for carn in self.pop_carn
-                         if carn.will_animal_live() is True]
+        Updates fitness of all animals in the cell, and decides which animals
+        die with one vector of random numbers per population list. Updates the
+        population lists to only contain living animals.
+        """
+        self.update_fitness()
+        self.pop_herb = self.find_surviving_animals(Herbivore, self.pop_herb,
+                                                    self.rng)
+        self.pop_carn = self.find_surviving_animals(Carnivore, self.pop_carn,
+                                                    self.rng)
+
+    def feed_all_herbivores_vectorized(self, regrow=True):
+        """
+        Vectorized version of feed_all_herbivores, for animals stored in the
+        population arrays. Updates fodder amount of the cell and sorts the
+        herbivores by fitness. Each herbivore in turn eats its appetite F, or
+        what is left of the fodder.
+
+        :param regrow: If False, the fodder is not updated, since the island
+            has already updated the fodder of all cells
+        :type regrow: bool
+        """
+        if regrow:
+            self.regrowth()
+        herbs = self.herbs
+        herbs.update_fitness()
+        herbs.keep(np.argsort(-herbs.fitness, kind="stable"))
+
+        appetite = herbs.params["F"]
+        eaten = np.clip(
+            self.fodder_amount - appetite * np.arange(len(herbs)),
+            0, appetite
+        )
+        herbs.weight += herbs.params["beta"] * eaten
+        herbs.fitness_must_be_updated |= eaten > 0
+        self.fodder_amount -= eaten.sum()
+
+    def feed_all_carnivores_vectorized(self, chunk_size=64):
+        """
+        Vectorized version of feed_all_carnivores, for animals stored in the
+        population arrays. Carnivores eat in order of fitness, from highest to
+        lowest. Each carnivore attempts to kill herbivores from the weakest to
+        the strongest, until its appetite F is satisfied, using the same rules
+        as attempt_eating_all_herbivores_in_cell of the Carnivore class.
+        Eaten herbivores are removed from the population.
+
+        The herbivores are sorted once, and a carnivore only attempts to kill
+        the herbivores with lower fitness than itself, found by a binary
+        search. Kill attempts are drawn for up to chunk_size herbivores at a
+        time, and the first successful one is the kill. Killed herbivores are
+        dropped from the index array of remaining herbivores, which keeps its
+        order.
+
+        :param chunk_size: Maximum number of kill attempts drawn at once
+        :type chunk_size: int
+        """
+        herbs, carns = self.herbs, self.carns
+        if len(herbs) == 0 or len(carns) == 0:
+            return
+        herbs.update_fitness()
+        herbs.keep(np.argsort(-herbs.fitness, kind="stable"))
+        carns.update_fitness()
+        carns.keep(np.argsort(-carns.fitness, kind="stable"))
+
+        params = carns.params
+        # Positions of remaining herbivores, from the weakest to the strongest
+        remaining = np.arange(len(herbs))[::-1]
+        remaining_fitness = herbs.fitness[remaining]
+        alive = np.ones(len(herbs), dtype=bool)
+        for carn in range(len(carns)):
+            amount_eaten = 0
+            killed = []
+            start = 0
+            while amount_eaten < params["F"]:
+                weaker = np.searchsorted(remaining_fitness,
+                                         carns.fitness[carn], side="left")
+                stop = min(weaker, start + chunk_size)
+                if start >= stop:
+                    break
+                diff = carns.fitness[carn] - remaining_fitness[start:stop]
+                prob = np.minimum(diff / params["DeltaPhiMax"], 1)
+                kills = np.flatnonzero(self.rng.random(stop - start) <= prob)
+                if len(kills) == 0:
+                    start = stop
+                    continue
+                kill = start + kills[0]
+                killed.append(kill)
+                amount_eaten += herbs.weight[remaining[kill]]
+                carns.weight[carn] += params["beta"] * amount_eaten
+                carns.fitness[carn] = carns.species.batch_fitness(
+                    carns.age[carn], carns.weight[carn]
+                )
+                start = kill + 1
+            if len(killed) > 0:
+                alive[remaining[killed]] = False
+                keep = np.ones(len(remaining), dtype=bool)
+                keep[killed] = False
+                remaining = remaining[keep]
+                remaining_fitness = remaining_fitness[keep]
+        herbs.keep(alive)
+
+    def add_newborn_animals_vectorized(self):
+        """
+        Vectorized version of add_newborn_animals, for animals stored in the
+        population arrays. Births are decided for the whole population of each
+        species with batch_birth of the animal class. Mothers lose weight in
+        bulk, and all newborns are added to the end of the population at once.
+        """
+        for population in (self.herbs, self.carns):
+            if len(population) == 0:
+                continue
+            population.update_fitness()
+            mothers, birth_weight = population.species.batch_birth(
+                population.weight, population.fitness, self.rng
+            )
+            population.weight[mothers] -= \
+                birth_weight * population.params["xi"]
+            population.fitness_must_be_updated[mothers] = True
+            population.append(np.zeros(len(mothers)), birth_weight)
+
+    def make_all_animals_older_vectorized(self):
+        """
+        Vectorized version of make_all_animals_older, for animals stored in
+        the population arrays.
+        """
+        for population in (self.herbs, self.carns):
+            population.age += 1
+            population.fitness_must_be_updated[:] = True
+
+    def make_all_animals_lose_weight_vectorized(self):
+        """
+        Vectorized version of make_all_animals_lose_weight, for animals stored
+        in the population arrays.
+        """
+        for population in (self.herbs, self.carns):
+            population.weight *= 1 - population.params["eta"]
+            population.fitness_must_be_updated[:] = True
+
+    def remove_all_dead_animals_vectorized(self):
+        """
+        Vectorized version of remove_all_dead_animals, for animals stored in
+        the population arrays. Probability of death is computed for the whole
+        population of each species, and survivors are kept with a boolean
+        mask from one vector of random numbers.
+        """
+        for population in (self.herbs, self.carns):
+            if len(population) == 0:
+                continue
+            population.update_fitness()
+            prob = population.species.batch_prob_death(population.fitness)
+            population.keep(self.rng.random(len(population)) > prob)
 
 
 class Jungle(Landscape):
@@ -229,15 +556,17 @@ class Jungle(Landscape):
         "f_max": 800,
     }
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class as subclass of Landscape.
 
         :param population: Contains dictionaries with
             information about each animal.
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        super().__init__(population)
+        super().__init__(population, rng)
 
 
 class Savannah(Landscape):
@@ -255,15 +584,17 @@ class Savannah(Landscape):
         "alpha": 0.3
     }
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class as subclass of Landscape.
 
         :param population: Contains dictionaries with
             information about each animal.
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        super().__init__(population)
+        super().__init__(population, rng)
         self.fodder_amount = self.params["f_max"]
 
     def regrowth(self):
@@ -279,6 +610,20 @@ class Savannah(Landscape):
         self.fodder_amount = ((1 - self.params["alpha"]) * self.fodder_amount)\
             + (self.params["alpha"] * self.params["f_max"])
 
+    @classmethod
+    def batch_regrowth(cls, fodder_amount):
+        """
+        Returns the amount of fodder for herbivores after regrowth for many
+        savannah cells at once, as regrowth does for one cell.
+
+        :param fodder_amount: Amount of fodder of each cell
+        :type fodder_amount: ndarray
+        :return: Amount of fodder of each cell after regrowth
+        :rtype: ndarray
+        """
+        return ((1 - cls.params["alpha"]) * fodder_amount) \
+            + (cls.params["alpha"] * cls.params["f_max"])
+
 
 class Desert(Landscape):
     """
@@ -293,15 +638,17 @@ class Desert(Landscape):
         "f_max": 0
     }
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class as subclass of Landscape.
 
         :param population: Contains dictionaries with
             information about each animal.
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        super().__init__(population)
+        super().__init__(population, rng)
 
 
 class Mountain(Landscape):
@@ -317,15 +664,17 @@ class Mountain(Landscape):
         "f_max": 0
     }
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class as subclass of Landscape.
 
         :param population: Contains dictionaries with
             information about each animal. Should be empty.
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        super().__init__(population)
+        super().__init__(population, rng)
 
 
 class Ocean(Landscape):
@@ -341,12 +690,14 @@ class Ocean(Landscape):
         "f_max": 0
     }
 
-    def __init__(self, population):
+    def __init__(self, population, rng=None):
         """
         Initializes class as subclass of Landscape.
 
         :param population: Contains dictionaries with
             information about each animal. Should be empty.
         :type population: list
+        :param rng: Random number generator, numpy.random if not given
+        :type rng: class 'biosim.random_stream.RandomStream'
         """
-        super().__init__(population)
+        super().__init__(population, rng)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides execution of the cell-local seasons of an island in a
+pool of worker processes.
+
+Feeding, procreation, aging, weight loss and dying only involve the animals
+of one cell at a time. The passable cells of the island are therefore split
+into contiguous chunks, and each chunk is sent to a worker process, which
+runs the seasons on its cells and returns them. Each cell draws its random
+numbers from its own stream, which travels with the cell, so the result does
+not depend on the number of workers or on how the cells are split.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.animals import Animal, Herbivore, Carnivore
+from biosim.landscape import Landscape, Jungle, Savannah, Desert, Mountain, \
+    Ocean
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+PARAM_CLASSES = (Landscape, Jungle, Savannah, Desert, Mountain, Ocean,
+                 Animal, Herbivore, Carnivore)
+
+CELL_SEASONS = {
+    "feeding": ("feed_all_herbivores", "feed_all_carnivores"),
+    "procreation": ("add_newborn_animals",),
+    "aging": ("make_all_animals_older",),
+    "weight_loss": ("make_all_animals_lose_weight",),
+    "dying": ("remove_all_dead_animals",),
+}
+
+
+def find_cell_methods(seasons, vectorized):
+    """
+    Returns the names of the landscape methods that run the given cell-local
+    seasons, in order.
+
+    :param seasons: Names of seasons, keys of CELL_SEASONS
+    :type seasons: list
+    :param vectorized: If True, the vectorized methods are used
+    :type vectorized: bool
+    :return: Names of landscape methods
+    :rtype: list
+    """
+    suffix = "_vectorized" if vectorized else ""
+    return [method + suffix for season in seasons
+            for method in CELL_SEASONS[season]]
+
+
+def get_class_params():
+    """
+    Returns a copy of the parameters of all landscape and animal classes.
+
+    :return: Classes as keys, parameters as values
+    :rtype: dict
+    """
+    return {cls: cls.params.copy() for cls in PARAM_CLASSES}
+
+
+def set_class_params(class_params):
+    """
+    Sets the parameters of landscape and animal classes, as returned by
+    get_class_params.
+
+    :param class_params: Classes as keys, parameters as values
+    :type class_params: dict
+    """
+    for cls, params in class_params.items():
+        cls.params = params
+
+
+def run_cell_methods(cells, method_names, class_params=None):
+    """
+    Runs landscape methods on a chunk of cells. Called in the worker
+    processes, which get the class parameters of the main process with every
+    chunk, since they may have been changed after the workers were started.
+    The parameters are left unchanged if not given.
+
+    :param cells: Landscape cells
+    :type cells: list
+    :param method_names: Names of the landscape methods to run on each cell
+    :type method_names: list
+    :param class_params: Parameters of landscape and animal classes
+    :type class_params: dict, None
+    :return: The cells, after the methods have been run
+    :rtype: list
+    """
+    if class_params is not None:
+        set_class_params(class_params)
+    for cell in cells:
+        for name in method_names:
+            getattr(cell, name)()
+    return cells
+
+
+class CellExecutor:
+    """
+    Runs cell-local seasons on the cells of an island in a pool of worker
+    processes.
+    """
+    def __init__(self, num_workers=None, chunks_per_worker=4):
+        """
+        Initializes executor. The worker processes are started when the first
+        season is run.
+
+        :param num_workers: Number of worker processes, the number of CPUs
+            if not given
+        :type num_workers: int, None
+        :param chunks_per_worker: Number of chunks of cells per worker, for
+            balancing the load between workers
+        :type chunks_per_worker: int
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self._pool = None
+
+    def split_cells(self, cells):
+        """
+        Splits cells into contiguous chunks, at most chunks_per_worker
+        chunks per worker.
+
+        :param cells: Landscape cells
+        :type cells: list
+        :return: Chunks of cells
+        :rtype: list
+        """
+        num_chunks = min(len(cells), self.num_workers * self.chunks_per_worker)
+        bounds = [len(cells) * chunk // num_chunks
+                  for chunk in range(num_chunks + 1)]
+        return [cells[start:stop] for start, stop in zip(bounds[:-1],
+                                                         bounds[1:])]
+
+    def run(self, cells, method_names):
+        """
+        Runs landscape methods on all cells in the worker processes, and
+        returns the updated cells, in the same order as given.
+
+        :param cells: Landscape cells
+        :type cells: list
+        :param method_names: Names of the landscape methods to run on each
+            cell
+        :type method_names: list
+        :return: Updated cells
+        :rtype: list
+        """
+        if len(cells) == 0:
+            return []
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.num_workers)
+        class_params = get_class_params()
+        futures = [self._pool.submit(run_cell_methods, chunk, method_names,
+                                     class_params)
+                   for chunk in self.split_cells(cells)]
+        updated_cells = []
+        for future in futures:
+            updated_cells.extend(future.result())
+        return updated_cells
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a structure-of-arrays container for the animals of one
+species in one landscape cell.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import numpy as np
+
+
+class Population:
+    """
+    Population of one species in one landscape cell. Instead of one instance
+    of an animal class per animal, the age, weight and fitness of all
+    animals are kept in contiguous NumPy arrays, with one element per
+    animal. Parameters are read from the animal class given as species.
+
+    Methods changing age or weight must set fitness_must_be_updated for the
+    changed animals, and update_fitness recomputes their fitness in one pass.
+    """
+    def __init__(self, species, age=(), weight=()):
+        """
+        Initializes population of given species with given ages and weights.
+        Fitness is computed from age and weight.
+
+        :param species: Animal class of the population
+        :type species: class 'biosim.animals.Herbivore' or
+            class 'biosim.animals.Carnivore'
+        :param age: Age of each animal
+        :type age: array_like
+        :param weight: Weight of each animal
+        :type weight: array_like
+        """
+        self.species = species
+        self.age = np.array(age, dtype=float)
+        self.weight = np.array(weight, dtype=float)
+        if self.age.shape != self.weight.shape:
+            raise ValueError('Age and weight must have equal length')
+        self.fitness = np.zeros(len(self.age))
+        self.fitness_must_be_updated = np.zeros(len(self.age), dtype=bool)
+        self.find_fitness()
+
+    @classmethod
+    def from_animals(cls, species, animals):
+        """
+        Creates a population from a list of animal class instances.
+
+        :param species: Animal class of the population
+        :type species: class 'biosim.animals.Herbivore' or
+            class 'biosim.animals.Carnivore'
+        :param animals: Instances of the animal class
+        :type animals: list
+        :return: Population containing the given animals
+        :rtype: class 'biosim.population.Population'
+        """
+        return cls(species,
+                   [animal.age for animal in animals],
+                   [animal.weight for animal in animals])
+
+    def to_animals(self):
+        """
+        Creates one instance of the animal class per animal in the population.
+
+        :return: Instances of the animal class
+        :rtype: list
+        """
+        animals = []
+        for age, weight, fitness, must_be_updated in zip(
+                self.age.tolist(), self.weight.tolist(),
+                self.fitness.tolist(), self.fitness_must_be_updated.tolist()
+        ):
+            animal = self.species({"age": age, "weight": weight})
+            animal.fitness = fitness
+            animal.fitness_must_be_updated = must_be_updated
+            animals.append(animal)
+        return animals
+
+    @property
+    def params(self):
+        """
+        Parameters of the animal class of the population.
+        """
+        return self.species.params
+
+    def __len__(self):
+        """
+        Number of animals in the population.
+        """
+        return len(self.age)
+
+    def find_fitness(self):
+        """
+        Updates fitness of all animals in the population, using
+        batch_fitness of the animal class.
+        """
+        self.fitness = self.species.batch_fitness(self.age, self.weight)
+        self.fitness_must_be_updated[:] = False
+
+    def update_fitness(self):
+        """
+        Updates fitness of the animals whose fitness must be updated, in a
+        single pass.
+        """
+        dirty = self.fitness_must_be_updated
+        if dirty.any():
+            self.fitness[dirty] = self.species.batch_fitness(
+                self.age[dirty], self.weight[dirty]
+            )
+            dirty[:] = False
+
+    def append(self, age, weight):
+        """
+        Adds animals with given ages and weights to the end of the population.
+
+        :param age: Age of each new animal
+        :type age: array_like
+        :param weight: Weight of each new animal
+        :type weight: array_like
+        """
+        self.extend(Population(self.species, age, weight))
+
+    def extend(self, other):
+        """
+        Adds all animals of another population of the same species to the end
+        of this population.
+
+        :param other: Population to add
+        :type other: class 'biosim.population.Population'
+        """
+        self.age = np.concatenate((self.age, other.age))
+        self.weight = np.concatenate((self.weight, other.weight))
+        self.fitness = np.concatenate((self.fitness, other.fitness))
+        self.fitness_must_be_updated = np.concatenate(
+            (self.fitness_must_be_updated, other.fitness_must_be_updated)
+        )
+
+    def select(self, index):
+        """
+        Returns a new population with the selected animals. Index may be a
+        boolean mask or an array of positions, and the order of the positions
+        is kept.
+
+        :param index: Animals to select
+        :type index: array
+        :return: Population with the selected animals
+        :rtype: class 'biosim.population.Population'
+        """
+        selected = Population(self.species)
+        selected.age = self.age[index]
+        selected.weight = self.weight[index]
+        selected.fitness = self.fitness[index]
+        selected.fitness_must_be_updated = self.fitness_must_be_updated[index]
+        return selected
+
+    def keep(self, index):
+        """
+        Keeps only the selected animals in the population, in the order given
+        by index.
+
+        :param index: Animals to keep, as a boolean mask or array of positions
+        :type index: array
+        """
+        self.age = self.age[index]
+        self.weight = self.weight[index]
+        self.fitness = self.fitness[index]
+        self.fitness_must_be_updated = self.fitness_must_be_updated[index]
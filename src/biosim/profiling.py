@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides opt-in profiling of the seasons of an island.
+
+When an IslandMap has a SeasonProfiler as its profiler, run_all_seasons runs
+every season through the profiler, which records for each year and season
+the wall time, the number of animals at the start of the season, the number
+of fitness computations and random numbers drawn, and the births, deaths,
+kills and migrants of the season. Births, deaths and kills are found from the
+animal counts kept by the map, so profiling adds no work to the seasons
+themselves.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.animals import Animal
+import numpy as np
+import time
+
+SEASONS = ("feeding", "procreation", "migration", "aging", "weight_loss",
+           "dying")
+
+FIELDS = ("time", "animals", "fitness_computations", "random_draws",
+          "births", "deaths", "kills", "migrants")
+
+
+def count_random_draws(island_map):
+    """
+    Returns the number of random numbers drawn so far from the random
+    streams of the map and its cells. Generators that do not count their
+    numbers, such as numpy.random, are not included.
+
+    :param island_map: Island map
+    :type island_map: class 'biosim.island_map.IslandMap'
+    :return: Number of random numbers drawn
+    :rtype: int
+    """
+    streams = {id(cell.rng): cell.rng for cell in island_map.cells}
+    streams[id(island_map.rng)] = island_map.rng
+    return sum(stream.num_draws for stream in streams.values()
+               if hasattr(stream, "num_draws"))
+
+
+class SeasonProfiler:
+    """
+    Records counters for every season of every year run through it. The
+    records are available as arrays from as_arrays, and can be passed to a
+    callback after each season.
+
+    Fitness computations in worker processes are not counted, since the
+    counter belongs to the process running the season.
+    """
+    def __init__(self, callback=None):
+        """
+        Initializes profiler without any records.
+
+        :param callback: Called after every season with the year, counted
+            from zero when the profiler was created, the name of the season
+            and a dict with the fields of FIELDS as keys
+        :type callback: callable, None
+        """
+        self.callback = callback
+        self.records = []
+
+    def run_season(self, island_map, season, year_record):
+        """
+        Runs one season of the map, and records its counters.
+
+        :param island_map: Island map
+        :type island_map: class 'biosim.island_map.IslandMap'
+        :param season: Name of season, one of SEASONS
+        :type season: str
+        :param year_record: Records of the year, to which the record of the
+            season is added
+        :type year_record: list
+        """
+        num_herbs, num_carns = island_map.num_herbs, island_map.num_carns
+        fitness_computations = Animal.num_fitness_computations
+        random_draws = count_random_draws(island_map)
+
+        start = time.perf_counter()
+        getattr(island_map, season + "_season")()
+        elapsed = time.perf_counter() - start
+
+        change = island_map.num_herbs + island_map.num_carns - \
+            num_herbs - num_carns
+        record = {
+            "time": elapsed,
+            "animals": num_herbs + num_carns,
+            "fitness_computations":
+                Animal.num_fitness_computations - fitness_computations,
+            "random_draws": count_random_draws(island_map) - random_draws,
+            "births": change if season == "procreation" else 0,
+            "deaths": -change if season == "dying" else 0,
+            "kills": num_herbs - island_map.num_herbs
+            if season == "feeding" else 0,
+            "migrants": island_map.num_migrants
+            if season == "migration" else 0,
+        }
+        year_record.append(record)
+        if self.callback is not None:
+            self.callback(len(self.records), season, record)
+
+    def run_year(self, island_map):
+        """
+        Runs all seasons of one year of the map, one at a time, and records
+        their counters.
+
+        :param island_map: Island map
+        :type island_map: class 'biosim.island_map.IslandMap'
+        """
+        year_record = []
+        for season in SEASONS:
+            self.run_season(island_map, season, year_record)
+        self.records.append(year_record)
+
+    def as_arrays(self):
+        """
+        Returns the records as arrays.
+
+        :return: Fields of FIELDS as keys, arrays with one row per year and
+            one column per season of SEASONS as values
+        :rtype: dict
+        """
+        return {field: np.array([[record[field] for record in year_record]
+                                 for year_record in self.records],
+                                dtype=float if field == "time" else int
+                                ).reshape(len(self.records), len(SEASONS))
+                for field in FIELDS}
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a stream of random numbers for one simulation, drawn in
+blocks from its own NumPy random number generator.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import numpy as np
+
+
+class RandomStream:
+    """
+    Random numbers for one simulation. Uniform and standard normal numbers
+    are generated by a numpy.random.Generator in blocks of block_size, and
+    handed out one at a time or as arrays until the block is used up and
+    refilled. This makes the cost of a single random number close to that of
+    indexing an array, and since the generator belongs to the stream,
+    several simulations with their own streams can run in one process
+    without affecting each other.
+
+    The methods random and normal take the same arguments as the functions
+    with the same names in numpy.random, so a stream can be used wherever
+    the numpy.random module is used.
+    """
+    def __init__(self, seed=None, block_size=4096):
+        """
+        Initializes stream with a new generator. The seed is kept as a
+        numpy.random.SeedSequence, from which spawn creates the seeds of
+        child streams.
+
+        :param seed: Seed of the generator. May also be a
+            numpy.random.SeedSequence.
+        :type seed: int, None
+        :param block_size: Number of random numbers generated at once
+        :type block_size: int
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._uniform = np.zeros(0)
+        self._uniform_pos = 0
+        self._normal = np.zeros(0)
+        self._normal_pos = 0
+        self._num_generated = 0
+
+    @property
+    def num_draws(self):
+        """
+        Number of random numbers handed out by the stream so far. Counted
+        when blocks are refilled, so drawing numbers costs nothing extra.
+        """
+        return self._num_generated - (len(self._uniform) - self._uniform_pos) \
+            - (len(self._normal) - self._normal_pos)
+
+    def __getstate__(self):
+        """
+        Returns the state of the stream for pickling. Only the numbers of the
+        blocks that have not been used are included.
+
+        :return: State of the stream
+        :rtype: dict
+        """
+        state = self.__dict__.copy()
+        state["_uniform"] = self._uniform[self._uniform_pos:].copy()
+        state["_uniform_pos"] = 0
+        state["_normal"] = self._normal[self._normal_pos:].copy()
+        state["_normal_pos"] = 0
+        return state
+
+    def get_state(self):
+        """
+        Returns the state of the stream: the state of the bit generator, the
+        block size, which decides how many numbers are drawn from the
+        generator at a time, and the numbers of the blocks that have not been
+        used.
+
+        :return: State of the bit generator as 'bit_generator', block size as
+            'block_size', unused uniform and normal numbers as 'uniform' and
+            'normal'
+        :rtype: dict
+        """
+        return {
+            "bit_generator": self.generator.bit_generator.state,
+            "block_size": self.block_size,
+            "uniform": self._uniform[self._uniform_pos:].copy(),
+            "normal": self._normal[self._normal_pos:].copy(),
+        }
+
+    def set_state(self, state):
+        """
+        Sets the state of the stream, as returned by get_state, so that it
+        continues with the same numbers as the stream the state was taken
+        from.
+
+        :param state: State of the stream
+        :type state: dict
+        """
+        self.generator.bit_generator.state = state["bit_generator"]
+        self.block_size = int(state["block_size"])
+        self._uniform = np.array(state["uniform"], dtype=float)
+        self._uniform_pos = 0
+        self._normal = np.array(state["normal"], dtype=float)
+        self._normal_pos = 0
+        self._num_generated = len(self._uniform) + len(self._normal)
+
+    def spawn(self, num_streams, block_size=None):
+        """
+        Creates independent child streams, whose seeds are spawned from the
+        seed sequence of this stream. The child streams depend only on the
+        seed of this stream and the number of streams spawned before.
+
+        :param num_streams: Number of streams to create
+        :type num_streams: int
+        :param block_size: Block size of the new streams, the block size of
+            this stream if not given
+        :type block_size: int, None
+        :return: New streams
+        :rtype: list
+        """
+        if block_size is None:
+            block_size = self.block_size
+        return [RandomStream(seed_sequence, block_size)
+                for seed_sequence in self.seed_sequence.spawn(num_streams)]
+
+    def _take_uniform(self, num):
+        """
+        Returns the next num uniform random numbers, refilling the block if
+        needed.
+
+        :param num: Number of random numbers
+        :type num: int
+        :return: Random numbers in [0, 1)
+        :rtype: array
+        """
+        stop = self._uniform_pos + num
+        if stop > len(self._uniform):
+            rest = self._uniform[self._uniform_pos:]
+            size = max(self.block_size, num - len(rest))
+            self._uniform = np.concatenate((rest, self.generator.random(size)))
+            self._num_generated += size
+            self._uniform_pos, stop = 0, num
+        numbers = self._uniform[self._uniform_pos:stop]
+        self._uniform_pos = stop
+        return numbers
+
+    def _take_normal(self, num):
+        """
+        Returns the next num standard normal random numbers, refilling the
+        block if needed.
+
+        :param num: Number of random numbers
+        :type num: int
+        :return: Standard normal random numbers
+        :rtype: array
+        """
+        stop = self._normal_pos + num
+        if stop > len(self._normal):
+            rest = self._normal[self._normal_pos:]
+            size = max(self.block_size, num - len(rest))
+            self._normal = np.concatenate((
+                rest, self.generator.standard_normal(size)
+            ))
+            self._num_generated += size
+            self._normal_pos, stop = 0, num
+        numbers = self._normal[self._normal_pos:stop]
+        self._normal_pos = stop
+        return numbers
+
+    @staticmethod
+    def _shape(numbers, size):
+        """
+        Returns numbers as an array of given shape.
+
+        :param numbers: Random numbers
+        :type numbers: array
+        :param size: Shape of the array
+        :type size: int, tuple
+        :return: Random numbers with given shape
+        :rtype: array
+        """
+        if isinstance(size, (int, np.integer)):
+            return numbers
+        return numbers.reshape(size)
+
+    @staticmethod
+    def _num(size):
+        """
+        Returns the number of elements in an array of given shape.
+
+        :param size: Shape of the array
+        :type size: int, tuple
+        :return: Number of elements
+        :rtype: int
+        """
+        if isinstance(size, (int, np.integer)):
+            return int(size)
+        num = 1
+        for length in size:
+            num *= int(length)
+        return num
+
+    def random(self, size=None):
+        """
+        Returns uniform random numbers in [0, 1).
+
+        :param size: Shape of the array returned. A single float is returned
+            if size is None.
+        :type size: int, tuple, None
+        :return: Random numbers
+        :rtype: float or array
+        """
+        if size is None:
+            if self._uniform_pos == len(self._uniform):
+                self._uniform = self.generator.random(self.block_size)
+                self._uniform_pos = 0
+                self._num_generated += self.block_size
+            number = self._uniform.item(self._uniform_pos)
+            self._uniform_pos += 1
+            return number
+        return self._shape(self._take_uniform(self._num(size)), size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        """
+        Returns random numbers from a normal distribution.
+
+        :param loc: Mean of the distribution
+        :type loc: float
+        :param scale: Standard deviation of the distribution
+        :type scale: float
+        :param size: Shape of the array returned. A single float is returned
+            if size is None.
+        :type size: int, tuple, None
+        :return: Random numbers
+        :rtype: float or array
+        """
+        if size is None:
+            if self._normal_pos == len(self._normal):
+                self._normal = self.generator.standard_normal(self.block_size)
+                self._normal_pos = 0
+                self._num_generated += self.block_size
+            number = self._normal.item(self._normal_pos)
+            self._normal_pos += 1
+            return loc + scale * number
+        return loc + scale * self._shape(self._take_normal(self._num(size)),
+                                         size)
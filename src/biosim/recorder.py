@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides recording of the state of the island after every
+simulated year to disk.
+
+The recorder keeps the results of at most chunk_years years in preallocated
+arrays, and writes them to a compressed .npz file in its directory when the
+chunk is full or the simulation ends. Each file holds one array per column:
+the year, the number of animals per species, the density grid of each
+species and, if requested, the mean weight, age and fitness of each species
+in every cell. The history of a long simulation therefore never has to be
+kept in memory, and load_trajectory joins the chunks when it is needed.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+import numpy as np
+import glob
+import os
+
+SPECIES = (("herb", "pop_herb", "herbs"),
+           ("carn", "pop_carn", "carns"))
+
+PROPERTIES = ("weight", "age", "fitness")
+
+
+class TrajectoryRecorder:
+    """
+    Streams the state of the island after every year to chunked .npz files.
+    """
+    def __init__(self, directory, chunk_years=100, cell_properties=False):
+        """
+        Initializes recorder. Chunks already in the directory are kept, and
+        new chunks are numbered after them, so several simulations of the
+        same island can be recorded to one directory.
+
+        :param directory: Path of directory for the chunk files, created if
+            it does not exist
+        :type directory: str
+        :param chunk_years: Number of years in each chunk file
+        :type chunk_years: int
+        :param cell_properties: If True, the mean weight, age and fitness of
+            each species in every cell are recorded as well
+        :type cell_properties: bool
+        :raise ValueError: if chunk_years is not positive
+        """
+        if chunk_years < 1:
+            raise ValueError('Number of years in each chunk must be '
+                             'positive')
+        self.directory = directory
+        self.chunk_years = chunk_years
+        self.cell_properties = cell_properties
+        os.makedirs(directory, exist_ok=True)
+        self.num_chunks = len(find_chunk_files(directory))
+        self.num_years = 0
+        self.columns = None
+
+    def create_columns(self, grid_shape):
+        """
+        Allocates the arrays of one chunk.
+
+        :param grid_shape: Number of rows and columns of the island map
+        :type grid_shape: tuple
+        """
+        shape = (self.chunk_years,) + grid_shape
+        self.columns = {
+            "year": np.zeros(self.chunk_years, dtype=int),
+            "num_herbs": np.zeros(self.chunk_years, dtype=int),
+            "num_carns": np.zeros(self.chunk_years, dtype=int),
+            "herbs": np.zeros(shape, dtype=int),
+            "carns": np.zeros(shape, dtype=int),
+        }
+        if self.cell_properties:
+            for prefix, _, _ in SPECIES:
+                for name in PROPERTIES:
+                    self.columns[f"{prefix}_{name}"] = np.zeros(shape)
+
+    def record(self, island_map, year):
+        """
+        Records the state of the island in a year. The chunk is written to
+        file when it is full.
+
+        :param island_map: Island map of the simulation
+        :type island_map: class 'biosim.island_map.IslandMap'
+        :param year: Year of the state
+        :type year: int
+        """
+        herbs = island_map.density_grid("Herbivore")
+        if self.columns is None:
+            self.create_columns(herbs.shape)
+        row = self.num_years
+        self.columns["year"][row] = year
+        self.columns["num_herbs"][row] = island_map.num_herbs
+        self.columns["num_carns"][row] = island_map.num_carns
+        self.columns["herbs"][row] = herbs
+        self.columns["carns"][row] = island_map.density_grid("Carnivore")
+        if self.cell_properties:
+            island_map.update_fitness()
+            for prefix, list_name, array_name in SPECIES:
+                means = mean_cell_properties(island_map, list_name,
+                                             array_name)
+                for name, mean in zip(PROPERTIES, means):
+                    self.columns[f"{prefix}_{name}"][row] = mean.reshape(
+                        herbs.shape
+                    )
+        self.num_years += 1
+        if self.num_years == self.chunk_years:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the years recorded since the last chunk file to a new chunk
+        file. Nothing is written if no years have been recorded.
+        """
+        if self.num_years == 0:
+            return
+        path = os.path.join(self.directory,
+                            f"chunk_{self.num_chunks:05d}.npz")
+        np.savez_compressed(path, **{
+            name: column[:self.num_years]
+            for name, column in self.columns.items()
+        })
+        self.num_chunks += 1
+        self.num_years = 0
+
+
+def mean_cell_properties(island_map, list_name, array_name):
+    """
+    Finds the mean weight, age and fitness of the animals of a species in
+    every cell of the map, whether the animals are stored as instances or as
+    population arrays. Cells without animals of the species get NaN.
+
+    :param island_map: Island map of the simulation
+    :type island_map: class 'biosim.island_map.IslandMap'
+    :param list_name: Name of the population list of the species in the
+        landscape cells, e.g. 'pop_herb'
+    :type list_name: str
+    :param array_name: Name of the population arrays of the species in the
+        landscape cells, e.g. 'herbs'
+    :type array_name: str
+    :return: Mean weight, mean age and mean fitness, with one element per
+        cell
+    :rtype: tuple
+    """
+    means = np.full((len(PROPERTIES), len(island_map.cells)), np.nan)
+    for index, cell in enumerate(island_map.cells):
+        animals = getattr(cell, list_name)
+        population = getattr(cell, array_name)
+        num_animals = len(animals) + len(population)
+        if num_animals == 0:
+            continue
+        for row, name in enumerate(PROPERTIES):
+            total = getattr(population, name).sum() + \
+                sum(getattr(animal, name) for animal in animals)
+            means[row, index] = total / num_animals
+    return tuple(means)
+
+
+def find_chunk_files(directory):
+    """
+    Returns the paths of the chunk files in a directory, in order.
+
+    :param directory: Path of directory
+    :type directory: str
+    :return: Paths of chunk files
+    :rtype: list
+    """
+    return sorted(glob.glob(os.path.join(directory, "chunk_*.npz")))
+
+
+def load_trajectory(directory):
+    """
+    Loads all chunks recorded in a directory and joins them.
+
+    :param directory: Path of directory written by a TrajectoryRecorder
+    :type directory: str
+    :return: Names of columns as keys, arrays with one element per recorded
+        year along the first axis as values
+    :rtype: dict
+    :raise FileNotFoundError: if the directory has no chunk files
+    """
+    paths = find_chunk_files(directory)
+    if len(paths) == 0:
+        raise FileNotFoundError(f'No recorded chunks in {directory}')
+    chunks = []
+    for path in paths:
+        with np.load(path) as chunk:
+            chunks.append({name: chunk[name] for name in chunk.files})
+    return {name: np.concatenate([chunk[name] for chunk in chunks])
+            for name in chunks[0]}
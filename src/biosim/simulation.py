@@ -3,15 +3,19 @@
 """
 This module provides classes organizing entire simulation, including
 visualization and saving graphics.
+
+Pandas and matplotlib are only imported by the methods that use them, so
+importing this module and running headless simulations stays fast.
 """
 
 from biosim.animals import Animal, Herbivore, Carnivore
 from biosim.landscape import Landscape, Jungle, Savannah, Desert, Mountain, \
     Ocean
 from biosim.island_map import IslandMap
-import pandas
+from biosim.random_stream import RandomStream
+from biosim.checkpoint import write_checkpoint, read_checkpoint, \
+    restore_checkpoint
 import numpy
-import matplotlib.pyplot as plt
 import subprocess
 
 __author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
@@ -35,13 +39,16 @@ class BioSim:
         cmax_animals=None,
         img_base=None,
         img_fmt="png",
+        vectorized=False,
+        num_workers=None,
     ):
         """
         :param island_geography: Multi-line string specifying island
             geography
         :param initial_population: List of dictionaries specifying
             initial population
-        :param seed: Integer used as random number seed
+        :param seed: Integer used as seed of the random number generator of
+            the simulation
         :param ymax_animals: Number specifying y-axis limit for graph showing
             animal numbers
         :param cmax_animals: Dict specifying color-code limits for animal
@@ -49,6 +56,12 @@ class BioSim:
         :param img_base: String with beginning of file name for figures,
             including path
         :param img_fmt: String with file type for figures, e.g. 'png'
+        :param vectorized: If True, animals are stored in population arrays
+            and the island is simulated with vectorized seasons
+        :param num_workers: If given, the seasons that only involve one cell
+            at a time are run in this number of worker processes, which are
+            stopped by close, or when the simulation is used as a context
+            manager, at the end of the with block
 
         If ymax_animals is None, the y-axis limit should be adjusted
         automatically.
@@ -64,8 +77,11 @@ class BioSim:
 
         where img_no are consecutive image numbers starting from 0.
         img_base should contain a path and beginning of a file name.
+
+        Each simulation draws all random numbers from its own generator,
+        rng, so the global random state of NumPy is neither used nor changed.
         """
-        numpy.random.seed(seed)
+        self.rng = RandomStream(seed)
         self.img_base = img_base
         self.img_fmt = img_fmt
         self.img_no = 0
@@ -76,7 +92,8 @@ class BioSim:
         else:
             self.cmax = cmax_animals
 
-        self.island_map = IslandMap(island_geography, initial_population)
+        self.island_map = IslandMap(island_geography, initial_population,
+                                    vectorized, self.rng, num_workers)
         self.island_map.create_map_dict()
         self.num_years_simulated = 0
         self.final_year = None
@@ -117,20 +134,20 @@ class BioSim:
                        "Carnivore": Carnivore}
         for param_name in params.keys():
             if param_name in class_names[species].params:
-                if params[param_name] >= 0 and param_name is not "DeltaPhiMax"\
-                        and param_name is not "eta" and param_name is not "F":
+                if params[param_name] >= 0 and param_name != "DeltaPhiMax"\
+                        and param_name != "eta" and param_name != "F":
                     class_names[species].params[param_name] = params[
                         param_name]
                 # checks special criteria for eta
-                elif param_name is "eta" and 0 <= params[param_name] <= 1:
+                elif param_name == "eta" and 0 <= params[param_name] <= 1:
                     class_names[species].params[param_name] = params[
                         param_name]
                 # checks special criteria for F
-                elif param_name is "F" and 0 < params[param_name]:
+                elif param_name == "F" and 0 < params[param_name]:
                     class_names[species].params[param_name] = params[
                         param_name]
                 # checks special criteria for DeltaPhiMax
-                elif param_name is "DeltaPhiMax" and params[param_name] > 0:
+                elif param_name == "DeltaPhiMax" and params[param_name] > 0:
                     class_names[species].params[param_name] = params[
                         param_name]
                 else:
@@ -153,10 +170,10 @@ class BioSim:
                        'O': Ocean}
         for param_name in params.keys():
             if param_name in class_names[landscape].params.keys():
-                if param_name is "f_max" and params[param_name] >= 0:
+                if param_name == "f_max" and params[param_name] >= 0:
                     class_names[landscape].params[param_name] = params[
                         param_name]
-                elif param_name is "alpha":
+                elif param_name == "alpha":
                     class_names[landscape].params[param_name] = params[
                         param_name]
                 else:
@@ -165,6 +182,77 @@ class BioSim:
             else:
                 raise ValueError(f'{param_name} is an invalid parameter name!')
 
+    def save_checkpoint(self, path):
+        """
+        Saves the full state of the simulation to a binary checkpoint file:
+        the island geography, the fodder and animals of every cell, the
+        parameters of all landscape and animal classes and the state of the
+        random number generators. Graphics are not saved.
+
+        :param path: String or path-like object with path of checkpoint
+            file
+        """
+        write_checkpoint(self, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, ymax_animals=None, cmax_animals=None,
+                        img_base=None, img_fmt="png", num_workers=None):
+        """
+        Creates a simulation from a checkpoint file written by
+        save_checkpoint. The parameters of all landscape and animal classes
+        are set to those saved in the checkpoint, and the simulation
+        continues exactly as the simulation the checkpoint was saved from.
+        If that simulation ran cell-local seasons in worker processes,
+        num_workers must be given here as well, but may be a different
+        number, and if it did not, num_workers must not be given.
+
+        :param path: String or path-like object with path of checkpoint
+            file
+        :param ymax_animals: Number specifying y-axis limit for graph showing
+            animal numbers
+        :param cmax_animals: Dict specifying color-code limits for animal
+            densities
+        :param img_base: String with beginning of file name for figures,
+            including path. Image numbers continue from the checkpoint.
+        :param img_fmt: String with file type for figures, e.g. 'png'
+        :param num_workers: Number of worker processes for cell-local
+            seasons, or None
+        :return: Restored simulation
+        :raise ValueError: if the checkpoint format is not supported, or
+            num_workers is given for a checkpoint saved without worker
+            processes, or not given for one saved with them
+        """
+        arrays = read_checkpoint(path)
+        sim = cls(str(arrays["geography"]), [], seed=None,
+                  ymax_animals=ymax_animals, cmax_animals=cmax_animals,
+                  img_base=img_base, img_fmt=img_fmt,
+                  vectorized=bool(arrays["vectorized"]),
+                  num_workers=num_workers)
+        restore_checkpoint(sim, arrays)
+        return sim
+
+    def close(self):
+        """
+        Stops the worker processes of the simulation, if any. They are started
+        again if the simulation continues.
+        """
+        self.island_map.shutdown_executor()
+
+    def __enter__(self):
+        """
+        Returns the simulation, for use in a with statement.
+
+        :return: The simulation itself
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Stops the worker processes of the simulation at the end of a with
+        statement.
+        """
+        self.close()
+
     def add_population(self, population):
         """
         Add a population to the island during simulation.
@@ -185,55 +273,68 @@ class BioSim:
         """
         Total number of animals on island.
         """
-        num_animals = 0
-        for cell in self.island_map.map.values():
-            num_animals += len(cell.pop_herb)
-            num_animals += len(cell.pop_carn)
-        return num_animals
+        return self.island_map.num_herbs + self.island_map.num_carns
 
     @property
     def num_animals_per_species(self):
         """
         Number of animals per species in island, as dictionary.
         """
-        num_animals_per_species = {"Herbivore": 0, "Carnivore": 0}
-        for cell in self.island_map.map.values():
-            num_animals_per_species["Herbivore"] += len(cell.pop_herb)
-            num_animals_per_species["Carnivore"] += len(cell.pop_carn)
-        return num_animals_per_species
+        return self.island_map.num_animals_per_species
 
     @property
     def animal_distribution(self):
         """
         Pandas DataFrame with animal count per species for each cell on island.
         """
+        import pandas
+
         data_all_cells = []
         i = 0
         for coord, cell in self.island_map.map.items():
             row = coord[0]
             col = coord[1]
-            herb = len(cell.pop_herb)
-            carn = len(cell.pop_carn)
+            herb = cell.num_herbs
+            carn = cell.num_carns
             data_all_cells.append([row, col, herb, carn])
             i += 1
         return pandas.DataFrame(data=data_all_cells, columns=[
             'Row', 'Col', 'Herbivore', 'Carnivore'])
 
-    def simulate(self, num_years, vis_years=1, img_years=None):
+    def simulate(self, num_years, vis_years=1, img_years=None,
+                 recorder=None):
         """
         Run simulation while visualizing the result.
 
         :param num_years: number of years to simulate
-        :param vis_years: years between visualization updates
+        :param vis_years: years between visualization updates, or None to
+            run the simulation headless, without creating any graphics
         :param img_years: years between visualizations saved to files
             (default: vis_years)
+        :param recorder: biosim.recorder.TrajectoryRecorder the state of the
+            island is recorded to after every year, if given. The recorded
+            years are written to file before simulate returns.
 
         Image files will be numbered consecutively.
+
+        :raise ValueError: if img_years is given for a headless simulation
         """
+        if vis_years is None and img_years is not None:
+            raise ValueError("Images can not be saved from a headless "
+                             "simulation!")
+
+        self.final_year = self.year + num_years
+
+        if vis_years is None:
+            while self.year < self.final_year:
+                self.run_year(recorder)
+            if recorder is not None:
+                recorder.flush()
+            return
+
         if img_years is None:
             img_years = vis_years
 
-        self.final_year = self.year + num_years
         self.setup_graphics()
 
         while self.year < self.final_year:
@@ -244,14 +345,30 @@ class BioSim:
             if self.year % img_years == 0:
                 self.save_graphics()
 
-            self.island_map.run_all_seasons()
-            self.num_years_simulated += 1
+            self.run_year(recorder)
+
+        if recorder is not None:
+            recorder.flush()
+
+    def run_year(self, recorder=None):
+        """
+        Runs all seasons of one year, and records the state of the island
+        after the year if a recorder is given.
+
+        :param recorder: biosim.recorder.TrajectoryRecorder, or None
+        """
+        self.island_map.run_all_seasons()
+        self.num_years_simulated += 1
+        if recorder is not None:
+            recorder.record(self.island_map, self.year)
 
     def setup_graphics(self):
         """
         Creates four subplots for visualization of geography, number of
         animals per species and distribution of each species.
         """
+        import matplotlib.pyplot as plt
+
         # Create new figure window
         if self._fig is None:
             self._fig = plt.figure(figsize=(13, 8))
@@ -341,6 +458,8 @@ class BioSim:
         island map is static and the different landscape types are represented
         by different colours.
         """
+        import matplotlib.pyplot as plt
+
         #                   R    G    B
         rgb_value = {'O': (0.0, 0.0, 1.0),  # blue
                      'M': (0.5, 0.5, 0.5),  # grey
@@ -393,33 +512,38 @@ class BioSim:
         else:
             self._line_graph_ax.set_ylim(0, self.num_animals * 1.3)
 
+    def density_grid(self, species):
+        """
+        Array with the number of animals of a species in each cell on
+        island, arranged as the island map. Filled from the animal counts
+        kept by the island map, without building animal_distribution.
+
+        :param species: String, name of animal species
+        :return: Array with one row per row and one column per column of
+            the island map
+        :raise ValueError: if species is not a valid species name
+        """
+        return self.island_map.density_grid(species)
+
     def create_array_herbs(self):
         """
         Creates array used to create heat map of herbivore population. Each
         cell in the array represents a cell on the island map and contains
         number of herbivores at that location.
         """
-        df = self.animal_distribution
-        num_rows = df["Row"].iloc[-1] + 1
-        num_cols = df["Col"].iloc[-1] + 1
-
-        index = 0
-        array_herbs = numpy.zeros(shape=(num_rows, num_cols))
-        for row in range(num_rows):
-            for col in range(num_cols):
-                array_herbs[row, col] = df["Herbivore"].iloc[index]
-                index += 1
-        return array_herbs
+        return self.density_grid("Herbivore")
 
     def update_heat_map_herbs(self):
         """
         Updates visualization of heat map for herbivores.
         """
+        import matplotlib.pyplot as plt
+
         if self._img_herb_axis is not None:
-            self._img_herb_axis.set_data(self.create_array_herbs())
+            self._img_herb_axis.set_data(self.density_grid("Herbivore"))
         else:
             self._img_herb_axis = self._heat_map_herb_ax.imshow(
-                self.create_array_herbs(),
+                self.density_grid("Herbivore"),
                 interpolation='nearest',
                 vmin=0,
                 vmax=self.cmax["Herbivore"]
@@ -434,27 +558,19 @@ class BioSim:
         cell in the array represents a cell on the island map and contains
         number of carnivores at that location.
         """
-        df = self.animal_distribution
-        num_rows = df["Row"].iloc[-1] + 1
-        num_cols = df["Col"].iloc[-1] + 1
-
-        index = 0
-        array_carns = numpy.zeros(shape=(num_rows, num_cols))
-        for row in range(num_rows):
-            for col in range(num_cols):
-                array_carns[row, col] = df["Carnivore"].iloc[index]
-                index += 1
-        return array_carns
+        return self.density_grid("Carnivore")
 
     def update_heat_map_carns(self):
         """
         Updates visualization of heat map for carnivores.
         """
+        import matplotlib.pyplot as plt
+
         if self._img_carn_axis is not None:
-            self._img_carn_axis.set_data(self.create_array_carns())
+            self._img_carn_axis.set_data(self.density_grid("Carnivore"))
         else:
             self._img_carn_axis = self._heat_map_carn_ax.imshow(
-                self.create_array_carns(),
+                self.density_grid("Carnivore"),
                 interpolation='nearest',
                 vmin=0,
                 vmax=self.cmax["Carnivore"]
@@ -466,6 +582,8 @@ class BioSim:
         """
         Updates all graphics with current data and title.
         """
+        import matplotlib.pyplot as plt
+
         self.update_line_graph()
         self.update_heat_map_herbs()
         self.update_heat_map_carns()
@@ -481,6 +599,8 @@ class BioSim:
         if self.img_base is None:
             return
 
+        import matplotlib.pyplot as plt
+
         plt.savefig(f"{self.img_base}_{self.img_no:05d}.{self.img_fmt}")
 
         self.img_no += 1
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides sweeps over grids of parameters, with the result of
+every simulation cached on disk.
+
+A point of a sweep is a set of animal and landscape parameters, given as to
+BioSim.set_animal_parameters and BioSim.set_landscape_parameters. Every point
+is simulated once per seed by biosim.ensemble.run_member, in a pool of worker
+processes. The result of each simulation is stored in a file named by a hash
+of everything the result depends on: the geography, the initial population,
+the parameters, the seed, the number of years and the options of the run.
+Simulations whose file exists are not run again, so a sweep that was
+interrupted continues where it stopped, and a sweep with some points changed
+only runs the changed points.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.ensemble import run_member
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import hashlib
+import itertools
+import json
+import os
+import textwrap
+
+SWEEP_VERSION = 1
+
+
+def grid_points(animal_grid=None, landscape_grid=None):
+    """
+    Returns all combinations of the given values of animal and landscape
+    parameters, as points of a sweep.
+
+    :param animal_grid: Names of species as keys, dicts with parameter names
+        as keys and lists of values as values
+    :type animal_grid: dict, None
+    :param landscape_grid: Landscape letters as keys, dicts with parameter
+        names as keys and lists of values as values
+    :type landscape_grid: dict, None
+    :return: Points, dicts with 'animal_params' and 'landscape_params'
+    :rtype: list
+    """
+    axes = []
+    for kind, grid in (("animal_params", animal_grid),
+                       ("landscape_params", landscape_grid)):
+        for owner, params in (grid or {}).items():
+            for name, values in params.items():
+                axes.append(((kind, owner, name), values))
+
+    points = []
+    for values in itertools.product(*[values for _, values in axes]):
+        point = {"animal_params": {}, "landscape_params": {}}
+        for ((kind, owner, name), _), value in zip(axes, values):
+            point[kind].setdefault(owner, {})[name] = value
+        points.append(point)
+    return points
+
+
+class ParameterSweep:
+    """
+    Runs the points of parameter sweeps for one island and initial
+    population, with results cached in a directory.
+    """
+    def __init__(self, island_geography, initial_population, num_years,
+                 cache_dir, vectorized=False, density_grids=False):
+        """
+        Initializes sweep. The cache directory is created if it does not
+        exist.
+
+        :param island_geography: Specifies island geography
+        :type island_geography: multiline str
+        :param initial_population: Specifies initial population of each cell
+        :type initial_population: list of dicts
+        :param num_years: Number of years to simulate
+        :type num_years: int
+        :param cache_dir: Path of directory for the cached results
+        :type cache_dir: str
+        :param vectorized: If True, the simulations are run in vectorized
+            mode
+        :type vectorized: bool
+        :param density_grids: If True, the density grid of each species is
+            recorded after every year as well
+        :type density_grids: bool
+        """
+        self.geogr = textwrap.dedent(island_geography)
+        self.ini_pop = initial_population
+        self.num_years = num_years
+        self.cache_dir = cache_dir
+        self.vectorized = vectorized
+        self.density_grids = density_grids
+        os.makedirs(cache_dir, exist_ok=True)
+        self.num_computed = 0
+        self.num_cached = 0
+
+    @staticmethod
+    def normalize_params(params):
+        """
+        Returns parameters with all values as floats, so that for instance
+        20 and 20.0 give the same key.
+
+        :param params: Owners of parameters as keys, dicts with parameter
+            names and values as values
+        :type params: dict, None
+        :return: Parameters with float values
+        :rtype: dict
+        """
+        return {owner: {name: float(value) for name, value in values.items()}
+                for owner, values in (params or {}).items()}
+
+    def key(self, point, seed):
+        """
+        Returns the cache key of a simulation, a hash of everything its
+        result depends on. The order of keys in dicts does not matter.
+
+        :param point: Point with 'animal_params' and 'landscape_params'
+        :type point: dict
+        :param seed: Seed of the simulation
+        :type seed: int
+        :return: Cache key
+        :rtype: str
+        """
+        description = json.dumps({
+            "version": SWEEP_VERSION,
+            "geography": self.geogr,
+            "population": self.ini_pop,
+            "animal_params": self.normalize_params(
+                point.get("animal_params")),
+            "landscape_params": self.normalize_params(
+                point.get("landscape_params")),
+            "seed": seed,
+            "num_years": self.num_years,
+            "vectorized": self.vectorized,
+            "density_grids": self.density_grids,
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def cache_path(self, key):
+        """
+        Returns the path of the cache file of a key.
+
+        :param key: Cache key
+        :type key: str
+        :return: Path of cache file
+        :rtype: str
+        """
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def load(self, key):
+        """
+        Loads a cached result.
+
+        :param key: Cache key
+        :type key: str
+        :return: Result as returned by run_member, or None if not cached
+        :rtype: dict, None
+        """
+        path = self.cache_path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as cached:
+            return {name: cached[name] for name in cached.files}
+
+    def save(self, key, result):
+        """
+        Stores a result in the cache. The file is written under a temporary
+        name and then renamed, so an interrupted sweep never leaves a broken
+        result behind.
+
+        :param key: Cache key
+        :type key: str
+        :param result: Result as returned by run_member
+        :type result: dict
+        """
+        path = self.cache_path(key)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(file, **result)
+        os.replace(temporary_path, path)
+
+    def run(self, points, seeds, num_workers=None):
+        """
+        Runs every point once per seed, except the simulations whose result
+        is cached, and stores each result as soon as it is done. If a
+        simulation fails, the others are still run and stored before the
+        error is raised. If the sweep is interrupted, for instance by
+        KeyboardInterrupt, simulations not yet started are cancelled, and
+        the results of all simulations that finished are stored before the
+        interruption is passed on, so that running the sweep again resumes
+        it. The number of simulations run and found in the cache are stored
+        in num_computed and num_cached.
+
+        :param points: Points with 'animal_params' and 'landscape_params',
+            e.g. from grid_points
+        :type points: list
+        :param seeds: Seeds of the simulations of each point
+        :type seeds: list
+        :param num_workers: Number of worker processes, the number of CPUs
+            if not given
+        :type num_workers: int, None
+        :return: For each point, the results of run_member stacked with one
+            row per seed
+        :rtype: list
+        :raise ValueError: if no seeds are given, or if a parameter has an
+            invalid name or value
+        """
+        if len(seeds) == 0:
+            raise ValueError("At least one seed must be given!")
+        keys = [[self.key(point, seed) for seed in seeds] for point in points]
+        results = {}
+        missing = {}
+        for point, point_keys in zip(points, keys):
+            for seed, key in zip(seeds, point_keys):
+                if key in results or key in missing:
+                    continue
+                cached = self.load(key)
+                if cached is None:
+                    missing[key] = (point, seed)
+                else:
+                    results[key] = cached
+        self.num_cached = len(results)
+        self.num_computed = 0
+
+        if len(missing) > 0:
+            error = None
+            num_workers = num_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(min(num_workers, len(missing))) as pool:
+                futures = {
+                    pool.submit(run_member, self.geogr, self.ini_pop, seed,
+                                self.num_years, point.get("animal_params"),
+                                point.get("landscape_params"),
+                                self.vectorized, self.density_grids): key
+                    for key, (point, seed) in missing.items()
+                }
+                try:
+                    for future in as_completed(futures):
+                        if future.exception() is not None:
+                            error = error or future.exception()
+                            continue
+                        self.store(futures[future], future.result(),
+                                   results)
+                finally:
+                    for future in futures:
+                        future.cancel()
+                    pool.shutdown()
+                    for future, key in futures.items():
+                        if key not in results and not future.cancelled() \
+                                and future.exception() is None:
+                            self.store(key, future.result(), results)
+            if error is not None:
+                raise error
+
+        return [{name: np.stack([results[key][name] for key in point_keys])
+                 for name in results[point_keys[0]]}
+                for point_keys in keys]
+
+    def store(self, key, result, results):
+        """
+        Saves the result of a simulation run by the sweep, adds it to the
+        results of the sweep and counts it in num_computed.
+
+        :param key: Cache key
+        :type key: str
+        :param result: Result as returned by run_member
+        :type result: dict
+        :param results: Results of the sweep, cache keys as keys
+        :type results: dict
+        """
+        self.save(key, result)
+        results[key] = result
+        self.num_computed += 1
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""
+Fixtures shared by the tests of whole simulations.
+
+The island and population are small enough for simulations of a few years
+to run quickly, and have every landscape type and both species.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.simulation import BioSim
+import pytest
+
+
+@pytest.fixture
+def teardown_params():
+    """
+    Resets the parameters of all landscape and animal classes after a test.
+    """
+    yield None
+    BioSim.reset_params()
+
+
+@pytest.fixture
+def example_geogr():
+    return """\
+            OOOOOOO
+            OJJSJJO
+            OJDJSMO
+            OSJJJJO
+            OOOOOOO
+            """
+
+
+@pytest.fixture
+def example_ini_pop():
+    return [
+        {
+            "loc": (2, 2),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20}
+                    for _ in range(40)]
+            + [{"species": "Carnivore", "age": 5, "weight": 20}
+               for _ in range(8)]
+        }
+    ]
@@ -55,6 +55,18 @@ class TestAnimal:
         assert animal.params['a_half'] == 60
         assert animal.params['omega'] == 0.9
 
+    @pytest.mark.parametrize("species", [Animal, Herbivore, Carnivore])
+    def test_animal_attributes_stored_in_slots(self, example_properties_w_20,
+                                               species):
+        """
+        Asserts that animals have no instance dictionary, so attributes not
+        declared in __slots__ cannot be set.
+        """
+        animal = species(example_properties_w_20)
+        assert not hasattr(animal, "__dict__")
+        with pytest.raises(AttributeError):
+            animal.colour = "brown"
+
     def test_error_raised_from_invalid_age(self):
         """
         Tests that ValueError is raised if animal with negative age is
@@ -155,6 +167,20 @@ class TestAnimal:
         # Value for fitness was calculated by hand using formula in
         # find_fitness using the example properties.
 
+    def test_batch_fitness_equal_to_find_fitness(self):
+        """
+        Checks that batch_fitness calculates the same fitness as find_fitness
+        for each animal, including zero fitness for zero weight.
+        """
+        ages = [0, 5, 30, 100]
+        weights = [0, 20, 3.5, 60]
+        batch = Animal.batch_fitness(ages, weights)
+        for age, weight, fitness in zip(ages, weights, batch):
+            animal = Animal({"species": "animal", "age": age, "weight": 1})
+            animal.weight = weight
+            animal.find_fitness()
+            assert fitness == approx(animal.fitness)
+
     def test_correct_prob_of_moving(self, example_properties_w_20):
         """
         Asserts that prob_of_animal_moving calculates the correct probability
@@ -176,6 +202,20 @@ class TestAnimal:
         animal.fitness = 1
         assert animal.will_animal_move() is True
 
+    def test_batch_move_chooses_neighbours_from_cum_probs(self, mocker):
+        """
+        Tests batch_move method.
+        Asserts that animals whose random number is higher than their
+        probability of moving stay, and that movers get the neighbour found
+        from the cumulative probabilities.
+        """
+        mocker.patch('numpy.random.random', side_effect=[
+            numpy.array([0.0, 1.0, 0.0]), numpy.array([0.6, 0.1])
+        ])
+        choice = Animal.batch_move(numpy.array([0.5, 0.5, 0.5]),
+                                   numpy.array([0.25, 0.5, 0.75, 1.0]))
+        assert list(choice) == [2, -1, 0]
+
     def test_prob_of_birth_with_one_animal_in_cell(self,
                                                    example_properties_w_20
                                                    ):
@@ -304,6 +344,35 @@ class TestAnimal:
         animal.find_fitness()
         assert animal.birth_process(num_animals=6) is None
 
+    def test_birth_weights_only_drawn_for_births(self, mocker):
+        """
+        Tests batch_birth method.
+        Asserts that birth weights are drawn only for the animals that give
+        birth, and that the mothers are returned with their babies' weights.
+        The second animal is too light to give birth.
+        """
+        mocker.patch('numpy.random.random',
+                     return_value=numpy.array([0.0, 0.5, 0.0]))
+        normal = mocker.patch('numpy.random.normal',
+                              return_value=numpy.array([5.0, 6.0]))
+        weight = numpy.array([40.0, 10.0, 40.0])
+        mothers, birth_weight = Animal.batch_birth(
+            weight, Animal.batch_fitness([5, 5, 5], weight)
+        )
+        assert normal.call_args[0][2] == 2
+        assert list(mothers) == [0, 2]
+        assert list(birth_weight) == [5.0, 6.0]
+
+    def test_newborn_has_age_zero(self):
+        """
+        Asserts that newborn creates an animal of age zero with given weight,
+        whose fitness must be updated.
+        """
+        baby = Herbivore.newborn(7.5)
+        assert type(baby) is Herbivore
+        assert baby.age == 0 and baby.weight == 7.5
+        assert baby.fitness_must_be_updated is True
+
     def test_prob_death_is_one_if_fitness_zero(self, example_properties_w_20):
         """
         Asserts that the probability calculated from prob_death is one
@@ -324,6 +393,18 @@ class TestAnimal:
         # Probability of dying was calculated by hand from formula in
         # prob_death using example properties.
 
+    def test_batch_prob_death_equal_to_prob_death(self):
+        """
+        Checks that batch_prob_death calculates the same probabilities as
+        prob_death, including probability one when fitness is zero.
+        """
+        animal = Animal({"species": "animal", "age": 5, "weight": 20})
+        for fitness in [0, 0.3, 1]:
+            animal.fitness = fitness
+            animal.fitness_must_be_updated = False
+            assert Animal.batch_prob_death([fitness])[0] == approx(
+                animal.prob_death())
+
     def test_not_true_if_death_prob_is_one(self, example_properties_w_20):
         """
         Assert that will_animal_live does not return True if probability of
@@ -658,6 +739,26 @@ class TestCarnivore:
         eaten_herbs = carnivore.attempt_eating_all_herbivores_in_cell([herb])
         assert type(eaten_herbs) is list
 
+    def test_eaten_herbs_skipped_and_added_to_ids(self, example_properties,
+                                                  teardown_carnivore_tests):
+        """
+        Asserts that herbivores whose id is in the given set are not eaten
+        again, and that the id of each killed herbivore is added to the set.
+        """
+        carnivore = Carnivore(example_properties)
+        carnivore.find_fitness()
+        carnivore.params["DeltaPhiMax"] = 0.1
+        eaten_herb = Herbivore(example_properties)
+        herb = Herbivore(example_properties)
+        for animal in eaten_herb, herb:
+            animal.find_fitness()
+        eaten_ids = {id(eaten_herb)}
+        eaten_herbs = carnivore.attempt_eating_all_herbivores_in_cell(
+            [herb, eaten_herb], eaten_ids
+        )
+        assert eaten_herbs == [herb]
+        assert eaten_ids == {id(eaten_herb), id(herb)}
+
     def test_correct_rel_abund_fodder_carn(self, example_population_carn,
                                            example_properties):
         """
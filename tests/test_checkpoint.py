@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for checkpoints of simulations.
+
+This set of tests checks the save_checkpoint and load_checkpoint methods of
+the BioSim class, and the checkpoint module of the biosim package they use.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.simulation import BioSim
+from biosim.animals import Herbivore
+from biosim.landscape import Jungle
+import pytest
+import numpy
+import os
+
+
+@pytest.mark.usefixtures("teardown_params")
+class TestCheckpoint:
+    """
+    Tests for checkpoints of simulations. The island and population are the
+    shared fixtures of conftest.py.
+    """
+    @staticmethod
+    def animal_properties(sim):
+        """
+        Returns the age, weight and fitness of all animals in each cell, in
+        the order they have in the cell.
+        """
+        properties = []
+        for cell in sim.island_map.cells:
+            cell.unpack_population()
+            properties.append([(animal.age, animal.weight, animal.fitness)
+                               for animal in cell.pop_herb + cell.pop_carn])
+        return properties
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_restored_simulation_continues_same_trajectory(
+            self, tmp_path, example_geogr, example_ini_pop, vectorized
+    ):
+        """
+        Asserts that a simulation restored from a checkpoint gives the same
+        animals, fodder and year as the simulation it was saved from, when
+        both continue for some years.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        sim = BioSim(example_geogr, example_ini_pop, seed=5,
+                     vectorized=vectorized)
+        sim.simulate(num_years=5, vis_years=None)
+        sim.save_checkpoint(path)
+        sim.simulate(num_years=5, vis_years=None)
+
+        restored = BioSim.load_checkpoint(path)
+        assert restored.year == 5
+        restored.simulate(num_years=5, vis_years=None)
+        assert restored.year == sim.year
+        assert restored.num_animals_per_species == \
+            sim.num_animals_per_species
+        assert [cell.fodder_amount for cell in restored.island_map.cells] \
+            == [cell.fodder_amount for cell in sim.island_map.cells]
+        assert self.animal_properties(restored) == \
+            self.animal_properties(sim)
+
+    def test_class_params_restored(self, tmp_path, example_geogr):
+        """
+        Asserts that the parameters of animal and landscape classes are set
+        to those of the simulation the checkpoint was saved from.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        sim = BioSim(example_geogr, [], seed=1)
+        sim.set_animal_parameters("Herbivore", {"zeta": 3.2})
+        sim.set_landscape_parameters("J", {"f_max": 700})
+        sim.save_checkpoint(path)
+        BioSim.reset_params()
+        BioSim.load_checkpoint(path)
+        assert Herbivore.params["zeta"] == 3.2
+        assert Jungle.params["f_max"] == 700
+
+    def test_checkpoint_replaced_in_one_step(self, tmp_path, example_geogr):
+        """
+        Asserts that saving a checkpoint again replaces the file, and leaves
+        no temporary file behind, with the path given as a pathlib.Path.
+        """
+        path = tmp_path / "checkpoint.npz"
+        sim = BioSim(example_geogr, [], seed=1)
+        sim.save_checkpoint(path)
+        sim.simulate(num_years=1, vis_years=None)
+        sim.save_checkpoint(path)
+        assert os.listdir(str(tmp_path)) == ["checkpoint.npz"]
+        assert BioSim.load_checkpoint(path).year == 1
+
+    def test_error_raised_for_unknown_version(self, tmp_path, example_geogr):
+        """
+        Asserts that ValueError is raised when loading a checkpoint of
+        another version of the format.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        BioSim(example_geogr, [], seed=1).save_checkpoint(path)
+        with numpy.load(path) as checkpoint:
+            arrays = dict(checkpoint)
+        arrays["version"] = numpy.array(99)
+        with open(path, "wb") as file:
+            numpy.savez(file, **arrays)
+        with pytest.raises(ValueError):
+            BioSim.load_checkpoint(path)
+
+    def test_error_raised_for_workers_not_given(self, tmp_path,
+                                                example_geogr,
+                                                example_ini_pop):
+        """
+        Asserts that ValueError is raised when a checkpoint saved from a
+        simulation with worker processes is loaded without num_workers.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        with BioSim(example_geogr, example_ini_pop, seed=5,
+                    num_workers=2) as sim:
+            sim.save_checkpoint(path)
+        with pytest.raises(ValueError):
+            BioSim.load_checkpoint(path)
+
+    def test_error_raised_for_workers_given(self, tmp_path, example_geogr,
+                                            example_ini_pop):
+        """
+        Asserts that ValueError is raised when a checkpoint saved from a
+        simulation without worker processes is loaded with num_workers.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        BioSim(example_geogr, example_ini_pop, seed=5).save_checkpoint(path)
+        with pytest.raises(ValueError):
+            BioSim.load_checkpoint(path, num_workers=2)
+
+    def test_animal_ages_restored_as_int(self, tmp_path, example_geogr,
+                                         example_ini_pop):
+        """
+        Asserts that the animals of a simulation restored from a checkpoint
+        have ages of type int, as the animals they were saved from.
+        """
+        path = str(tmp_path / "checkpoint.npz")
+        BioSim(example_geogr, example_ini_pop, seed=5).save_checkpoint(path)
+        restored = BioSim.load_checkpoint(path)
+        ages = [animal.age for cell in restored.island_map.cells
+                for animal in cell.pop_herb + cell.pop_carn]
+        assert len(ages) > 0
+        assert all(type(age) is int for age in ages)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the decomposition module.
+
+This set of tests checks the interface and functionality of the Tile and
+DecomposedIsland classes provided by the decomposition module of the biosim
+package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.decomposition import DecomposedIsland, Tile, split_range
+import pytest
+
+
+class TestDecomposition:
+    """
+    Tests for the decomposition module.
+    """
+    @pytest.fixture
+    def example_geogr(self):
+        return """\
+                OOOOOOOO
+                OJJSJJJO
+                OJDJSMJO
+                OSJJJJJO
+                OJJMJSSO
+                OOOOOOOO
+                """
+
+    @pytest.fixture
+    def example_ini_pop(self):
+        return [
+            {
+                "loc": (2, 3),
+                "pop": [{"species": "Herbivore", "age": 5, "weight": 20}
+                        for _ in range(40)]
+                + [{"species": "Carnivore", "age": 5, "weight": 20}
+                   for _ in range(8)]
+            },
+            {
+                "loc": (4, 5),
+                "pop": [{"species": "Herbivore", "age": 5, "weight": 20}
+                        for _ in range(20)]
+            }
+        ]
+
+    def test_range_split_in_nearly_equal_parts(self):
+        """
+        Asserts that split_range gives bounds of parts that cover the range
+        and differ in length by at most one.
+        """
+        bounds = split_range(10, 3)
+        assert bounds[0] == 0 and bounds[-1] == 10
+        lengths = [stop - start for start, stop in zip(bounds[:-1],
+                                                       bounds[1:])]
+        assert max(lengths) - min(lengths) <= 1
+
+    def test_tile_has_halo_from_island(self, example_geogr):
+        """
+        Asserts that a tile map covers its rectangle and a halo of one cell,
+        with the landscape types of the island, and that only cells in the
+        rectangle are owned by the tile.
+        """
+        tile = Tile(example_geogr, [], (1, 3, 1, 4), seed=1)
+        assert tile.geogr.splitlines() == ["OOOOO", "OJJSJ", "OJDJS",
+                                           "OSJJJ"]
+        owned = {tile.locations[index] for index in tile.owned_indices}
+        assert owned == {(1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (2, 3)}
+        assert sorted(tile.halo_island_indices()) == [12, 20, 25, 26, 27, 28]
+
+    def test_error_raised_from_invalid_landscape(self):
+        """
+        Asserts that ValueError is raised for an invalid landscape type
+        before any tile is created.
+        """
+        with pytest.raises(ValueError):
+            DecomposedIsland("OOO\nORO\nOOO", [], seed=1, processes=False)
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_result_independent_of_tiles(self, example_geogr,
+                                         example_ini_pop, vectorized):
+        """
+        Asserts that the number of animals in each cell after some years is
+        the same for different numbers of tiles.
+        """
+        counts = []
+        for tiles in (1, 1), (2, 2), (3, 2):
+            island = DecomposedIsland(example_geogr, example_ini_pop, seed=4,
+                                      tiles=tiles, vectorized=vectorized,
+                                      processes=False)
+            for _ in range(5):
+                island.run_all_seasons()
+            counts.append(island.animal_counts())
+        assert counts[0] == counts[1] == counts[2]
+        assert len(counts[0]) > 2
+
+    def test_worker_processes_give_same_result(self, example_geogr,
+                                               example_ini_pop):
+        """
+        Asserts that tiles in worker processes give the same result as tiles
+        in this process.
+        """
+        counts = []
+        for processes in False, True:
+            island = DecomposedIsland(example_geogr, example_ini_pop, seed=4,
+                                      tiles=(2, 2), vectorized=True,
+                                      processes=processes)
+            for _ in range(3):
+                island.run_all_seasons()
+            counts.append(island.animal_counts())
+            island.close()
+        assert counts[0] == counts[1]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the ensemble module.
+
+This set of tests checks the interface and functionality of the run_member
+and run_ensemble functions provided by the ensemble module of the biosim
+package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.ensemble import run_member, run_ensemble
+from biosim.animals import Herbivore
+from biosim.landscape import Jungle
+from biosim.simulation import BioSim
+import pytest
+
+
+@pytest.mark.usefixtures("teardown_params")
+class TestEnsemble:
+    """
+    Tests for the ensemble module. The island and population are the shared
+    fixtures of conftest.py.
+    """
+    def test_member_params_restored(self, example_geogr, example_ini_pop):
+        """
+        Asserts that the parameters of the classes are the same after a
+        member has run with other parameters as before.
+        """
+        BioSim.set_animal_parameters("Herbivore", {"zeta": 3.2})
+        run_member(example_geogr, example_ini_pop, 1, 2,
+                   animal_params={"Herbivore": {"F": 20}},
+                   landscape_params={"J": {"f_max": 500}})
+        assert Herbivore.params["zeta"] == 3.2
+        assert Herbivore.params["F"] == Herbivore.GET_DEFAULT_PARAMS()["F"]
+        assert Jungle.params["f_max"] == Jungle.GET_DEFAULT_PARAMS()["f_max"]
+
+    def test_members_isolated_from_each_other(self, example_geogr,
+                                              example_ini_pop):
+        """
+        Asserts that a member with default parameters gives the same result
+        whether or not a member with other parameters ran before it in the
+        same process, and that the parameters of the process are not used.
+        """
+        first = run_member(example_geogr, example_ini_pop, 3, 5)
+        run_member(example_geogr, example_ini_pop, 3, 5,
+                   animal_params={"Carnivore": {"DeltaPhiMax": 2}})
+        BioSim.set_animal_parameters("Herbivore", {"F": 5})
+        second = run_member(example_geogr, example_ini_pop, 3, 5)
+        assert list(first["num_herbs"]) == list(second["num_herbs"])
+        assert list(first["num_carns"]) == list(second["num_carns"])
+
+    def test_ensemble_stacks_results_of_seeds(self, example_geogr,
+                                              example_ini_pop):
+        """
+        Asserts that the ensemble has one row per seed, equal to a
+        simulation with that seed and the given parameters, with density
+        grids of each year.
+        """
+        params = {"Herbivore": {"F": 20}}
+        ensemble = run_ensemble(example_geogr, example_ini_pop, [4, 7, 9],
+                                num_years=4, animal_params=params,
+                                density_grids=True, num_workers=2)
+        assert ensemble["num_herbs"].shape == (3, 4)
+        assert ensemble["herbs"].shape == (3, 4, 5, 7)
+        assert list(ensemble["year"]) == [1, 2, 3, 4]
+        assert Herbivore.params["F"] == Herbivore.GET_DEFAULT_PARAMS()["F"]
+
+        BioSim.set_animal_parameters("Herbivore", {"F": 20})
+        sim = BioSim(example_geogr, example_ini_pop, seed=7)
+        sim.simulate(num_years=4, vis_years=None)
+        assert ensemble["num_herbs"][1, -1] == sim.island_map.num_herbs
+        assert ensemble["num_carns"][1, -1] == sim.island_map.num_carns
+        assert (ensemble["carns"][1, -1] ==
+                sim.density_grid("Carnivore")).all()
+        assert (ensemble["herbs"].sum(axis=(2, 3)) ==
+                ensemble["num_herbs"]).all()
+
+    def test_error_raised_for_invalid_params(self, example_geogr):
+        """
+        Asserts that ValueError from an invalid parameter is raised by the
+        ensemble.
+        """
+        with pytest.raises(ValueError):
+            run_ensemble(example_geogr, [], [1], num_years=1,
+                         animal_params={"Herbivore": {"eta": 2}},
+                         num_workers=1)
+
+    def test_error_raised_for_no_seeds(self, mocker, example_geogr):
+        """
+        Asserts that ValueError is raised when no seeds are given, before
+        any worker process is started.
+        """
+        pool = mocker.patch("biosim.ensemble.ProcessPoolExecutor")
+        with pytest.raises(ValueError):
+            run_ensemble(example_geogr, [], [], num_years=1)
+        assert pool.call_count == 0
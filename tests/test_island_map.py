@@ -11,7 +11,10 @@ __author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
 __email__ = "idna@nmbu.no & kjkv@nmbu.no"
 
 from biosim.island_map import IslandMap
+from biosim.animals import Herbivore
+from pytest import approx
 import pytest
+import numpy
 
 
 class TestIslandMap:
@@ -228,13 +231,72 @@ class TestIslandMap:
         for neighbour in dict_with_neighbours.keys():
             assert neighbour in neighbours
 
+    def test_adjacency_table_excludes_mountain_and_ocean(self,
+                                                        example_ini_pop):
+        """
+        Tests create_adjacency_table method.
+        Asserts that the neighbours of each cell are the surrounding cells
+        that are not Mountain or Ocean, in the order north, west, east, south.
+        """
+        test_geogr = """\
+                        OOOOO
+                        OJSJO
+                        OMJDO
+                        OOOOO
+                        """
+        island_map = IslandMap(test_geogr, example_ini_pop)
+        island_map.create_map_dict()
+        pointers = island_map.neighbour_pointers
+        indices = island_map.neighbour_indices
+
+        def neighbours(location):
+            index = island_map.location_index[location]
+            return [island_map.locations[neighbour] for neighbour in
+                    indices[pointers[index]:pointers[index + 1]]]
+
+        assert neighbours((2, 2)) == [(1, 2), (2, 3)]
+        assert neighbours((1, 2)) == [(1, 1), (1, 3), (2, 2)]
+        assert neighbours((1, 1)) == [(1, 2)]
+        assert len(pointers) == len(island_map.map) + 1
+
+    def test_migration_tables_equal_animal_probabilities(self,
+                                                         example_ini_pop):
+        """
+        Tests migration_probability_tables method.
+        Asserts that the cumulative probabilities of a cell are the same as
+        the probabilities found by each animal, for both species.
+        """
+        test_geogr = """\
+                        OOOOO
+                        OJSJO
+                        OSJDO
+                        OOOOO
+                        """
+        island_map = IslandMap(test_geogr, example_ini_pop + [{
+            "loc": (2, 2),
+            "pop": [{"species": "Carnivore", "age": 5, "weight": 20}]
+        }])
+        island_map.create_map_dict()
+        for cell in island_map.map.values():
+            cell.regrowth()
+        tables = island_map.migration_probability_tables()
+        index = island_map.location_index[(2, 2)]
+        start = island_map.neighbour_pointers[index]
+        stop = island_map.neighbour_pointers[index + 1]
+        neighbours = island_map.neighbours_of_current_cell((2, 2))
+        for animal in (island_map.map[(2, 2)].pop_herb[0],
+                       island_map.map[(2, 2)].pop_carn[0]):
+            probs = animal.prob_move_to_each_neighbour(neighbours)
+            assert tables[type(animal)][start:stop] == approx(
+                numpy.cumsum(list(probs.values())))
+
     def test_all_animals_move_if_rand_num_less_than_prob(
             self, mocker, example_geogr
     ):
         """
         Tests move_single_animal on several animals.
-        Asserts that all animal move if they have not moved this year and
-        random number is less than their probability to move.
+        Asserts that all animals move if the random number is less than their
+        probability to move.
         """
         move_ini_pop = [
             {
@@ -256,31 +318,40 @@ class TestIslandMap:
         island_map = IslandMap(example_geogr, move_ini_pop)
         island_map.create_map_dict()
         for loc, cell in island_map.map.items():
-            for herbivore in cell.pop_herb:
+            for herbivore in list(cell.pop_herb):
                 assert island_map.move_single_animal(loc, herbivore) is True
-            for carnivore in cell.pop_carn:
+            for carnivore in list(cell.pop_carn):
                 assert island_map.move_single_animal(loc, carnivore) is True
 
-    def test_animal_moves_not_if_it_has_already_moved_this_year(
-            self, example_geogr, example_ini_pop
-    ):
+    def test_single_animal_move_updates_counts(self, mocker, example_geogr,
+                                               example_ini_pop):
         """
         Tests move_single_animal.
-        Asserts that animal does not move if it has already moved this year.
+        Asserts that a moved animal leaves its old cell, and that the counts
+        of both cells and of the island match the animals in the cells.
         """
+        mocker.patch('numpy.random.random', return_value=0.01)
         island_map = IslandMap(example_geogr, example_ini_pop)
         island_map.create_map_dict()
         herbivore = island_map.map[(1, 2)].pop_herb[0]
-        herbivore.has_moved_this_year = True
-        assert island_map.move_single_animal((1, 2), herbivore) is None
+        assert island_map.move_single_animal((1, 2), herbivore) is True
+        assert herbivore not in island_map.map[(1, 2)].pop_herb
+        assert island_map.cell_counts.tolist() == [
+            [cell.num_herbs, cell.num_carns] for cell in island_map.cells
+        ]
+        assert island_map.num_herbs == 6
+        assert island_map.active_indices() == [
+            index for index, cell in enumerate(island_map.cells)
+            if cell.num_herbs > 0
+        ]
 
     def test_single_animal_moves_not_if_rand_num_higher_than_prob(
             self, mocker, example_geogr, example_ini_pop
     ):
         """
         Tests move_single_animal.
-        Asserts that animal does not move if it has not moved this year, but
-        the random number is higher than the probability of moving.
+        Asserts that animal does not move if the random number is higher than
+        the probability of moving.
         """
         mocker.patch('numpy.random.random', return_value=1)
         island_map = IslandMap(example_geogr, example_ini_pop)
@@ -328,16 +399,16 @@ class TestIslandMap:
     ):
         """
         Test for migration_season method.
-        Asserts that all animals have moved after the migration season,
-        by checking their has_moved_this_year attribute.
+        Asserts that all animals have left their cell after the migration
+        season, and that none were lost.
         """
         mocker.patch('numpy.random.random', return_value=0.0001)
         island_map = IslandMap(example_geogr, [example_ini_pop[0]])
         island_map.create_map_dict()
         island_map.migration_season()
-        for loc, cell in island_map.map.items():
-            for animal in cell.pop_herb+cell.pop_carn:
-                assert animal.has_moved_this_year is True
+        assert island_map.map[(1, 2)].num_herbs == 0
+        assert sum(cell.num_herbs for cell in island_map.map.values()) == \
+            len(example_ini_pop[0]["pop"])
 
     def test_all_animals_age_during_aging_season(
             self, example_ini_pop, example_geogr
@@ -385,3 +456,223 @@ class TestIslandMap:
             sum_animals += len(cell.pop_herb)
             sum_animals += len(cell.pop_carn)
         assert sum_animals == 0
+
+    def test_all_animals_migrate_vectorized(
+            self, mocker, example_ini_pop, example_geogr
+    ):
+        """
+        Test for migration_season method in vectorized mode.
+        Asserts that all animals leave their cell when the random number is
+        less than their probability to move.
+        """
+        mocker.patch('numpy.random.random',
+                     side_effect=lambda size=None: numpy.zeros(size)
+                     if size else 0.0001)
+        island_map = IslandMap(example_geogr, [example_ini_pop[0]],
+                               vectorized=True)
+        island_map.create_map_dict()
+        island_map.migration_season()
+        assert len(island_map.map[(1, 2)].herbs) == 0
+        num_moved = 0
+        for cell in island_map.map.values():
+            num_moved += len(cell.herbs)
+        assert num_moved == 3
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_animals_move_only_one_cell_in_migration_season(
+            self, mocker, example_ini_pop, example_geogr, vectorized
+    ):
+        """
+        Test for migration_season method.
+        Asserts that animals arriving in a cell are not moved again in the
+        same season, so no animal reaches a cell two steps away, even if
+        all animals move.
+        """
+        mocker.patch('numpy.random.random',
+                     side_effect=lambda size=None: numpy.zeros(size)
+                     if size else 0.0001)
+        island_map = IslandMap(example_geogr, [example_ini_pop[0]],
+                               vectorized=vectorized)
+        island_map.create_map_dict()
+        island_map.migration_season()
+        num_herbs = {loc: cell.num_herbs
+                     for loc, cell in island_map.map.items()}
+        assert num_herbs[(1, 2)] == 0
+        assert num_herbs[(2, 1)] == 0
+        assert num_herbs[(1, 1)] + num_herbs[(2, 2)] == 3
+
+    def test_arrivals_committed_in_order_of_old_cell(self, example_geogr):
+        """
+        Test for commit_migration_buffers method.
+        Asserts that arriving animals are added in order of the index of
+        the cell they left, regardless of the order of the buffer.
+        """
+        island_map = IslandMap(example_geogr, [])
+        island_map.create_map_dict()
+        first = Herbivore({"age": 1, "weight": 10})
+        second = Herbivore({"age": 2, "weight": 10})
+        destination = island_map.location_index[(1, 1)]
+        island_map.commit_migration_buffers({
+            destination: [(3, "pop_herb", [second]),
+                          (1, "pop_herb", [first])]
+        })
+        assert island_map.map[(1, 1)].pop_herb == [first, second]
+
+    def test_vectorized_island_runs_all_seasons(self, example_geogr):
+        """
+        Asserts that all seasons can be run in vectorized mode, and that the
+        animals stay in population arrays.
+        """
+        ini_pop = [{
+            "loc": (1, 1),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20}
+                    for _ in range(20)] +
+                   [{"species": "Carnivore", "age": 5, "weight": 20}
+                    for _ in range(5)]
+        }]
+        island_map = IslandMap(example_geogr, ini_pop, vectorized=True)
+        island_map.create_map_dict()
+        for _ in range(10):
+            island_map.run_all_seasons()
+        for cell in island_map.map.values():
+            assert cell.pop_herb == [] and cell.pop_carn == []
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_fitness_updated_for_whole_island(self, example_geogr,
+                                              example_ini_pop, vectorized):
+        """
+        Tests update_fitness method.
+        Asserts that fitness of all animals on the island is updated after
+        aging, in both storage modes.
+        """
+        island_map = IslandMap(example_geogr, example_ini_pop, vectorized)
+        island_map.create_map_dict()
+        island_map.update_fitness()
+        island_map.aging_season()
+        island_map.update_fitness()
+        for cell in island_map.map.values():
+            for animal in cell.pop_herb:
+                assert animal.fitness_must_be_updated is False
+                assert animal.fitness == approx(
+                    Herbivore.batch_fitness(animal.age, animal.weight))
+            assert not cell.herbs.fitness_must_be_updated.any()
+            assert cell.herbs.fitness == approx(
+                Herbivore.batch_fitness(cell.herbs.age, cell.herbs.weight))
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_counts_kept_up_to_date_by_seasons(self, example_geogr,
+                                               vectorized):
+        """
+        Tests update_counts method.
+        Asserts that the counts of each cell and the totals of the island
+        equal the number of animals in the cells after every season, in
+        both storage modes, and after a population is added.
+        """
+        ini_pop = [{
+            "loc": (1, 1),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20}
+                    for _ in range(20)] +
+                   [{"species": "Carnivore", "age": 5, "weight": 20}
+                    for _ in range(5)]
+        }]
+        island_map = IslandMap(example_geogr, ini_pop, vectorized=vectorized)
+        island_map.create_map_dict()
+
+        def assert_counts_correct():
+            counts = [[cell.num_herbs, cell.num_carns]
+                      for cell in island_map.cells]
+            assert island_map.cell_counts.tolist() == counts
+            assert island_map.num_herbs == sum(count[0] for count in counts)
+            assert island_map.num_carns == sum(count[1] for count in counts)
+
+        assert_counts_correct()
+        island_map.add_population([{
+            "loc": (2, 2),
+            "pop": [{"species": "Carnivore", "age": 5, "weight": 20}]
+        }])
+        assert_counts_correct()
+        for _ in range(5):
+            for season in (island_map.feeding_season,
+                           island_map.procreation_season,
+                           island_map.migration_season,
+                           island_map.aging_season,
+                           island_map.weight_loss_season,
+                           island_map.dying_season):
+                season()
+                assert_counts_correct()
+        assert island_map.num_herbs > 0
+
+    def test_density_grid_arranged_as_map(self, example_geogr,
+                                          example_ini_pop):
+        """
+        Tests density_grid method.
+        Asserts that the grid has the shape of the map, with the number of
+        animals of the species in each cell at its location, and that
+        ValueError is raised for an invalid species name.
+        """
+        island_map = IslandMap(example_geogr, example_ini_pop)
+        island_map.create_map_dict()
+        grid = island_map.density_grid("Herbivore")
+        assert grid.shape == (4, 4)
+        for (row, col), cell in island_map.map.items():
+            assert grid[row, col] == cell.num_herbs
+        assert grid.sum() == island_map.num_herbs
+        with pytest.raises(ValueError):
+            island_map.density_grid("Omnivore")
+
+    def test_seasons_only_visit_cells_with_animals(self, mocker):
+        """
+        Asserts that active_indices gives the cells with animals, that the
+        seasons do not visit cells without animals, and that the fodder of
+        empty cells is still updated during the feeding season.
+        """
+        island_map = IslandMap("""\
+                               OOOOO
+                               OJSJO
+                               OOOOO
+                               """, [{
+            "loc": (1, 1),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20}]
+        }])
+        island_map.create_map_dict()
+        assert island_map.active_indices() == \
+            [island_map.location_index[(1, 1)]]
+
+        savannah = island_map.map[(1, 2)]
+        savannah.fodder_amount = 100
+        mocker.spy(savannah, "feed_all_herbivores")
+        mocker.spy(savannah, "add_newborn_animals")
+        mocker.spy(savannah, "remove_all_dead_animals")
+        island_map.feeding_season()
+        island_map.procreation_season()
+        island_map.dying_season()
+        assert savannah.feed_all_herbivores.call_count == 0
+        assert savannah.add_newborn_animals.call_count == 0
+        assert savannah.remove_all_dead_animals.call_count == 0
+        alpha = savannah.params["alpha"]
+        assert savannah.fodder_amount == approx(
+            (1 - alpha) * 100 + alpha * savannah.params["f_max"]
+        )
+        assert island_map.map[(1, 3)].fodder_amount == \
+            island_map.map[(1, 3)].params["f_max"]
+
+    def test_cells_share_fodder_array_of_map(self, example_geogr,
+                                             example_ini_pop):
+        """
+        Asserts that the fodder of each cell is stored in the fodder array of
+        the map, and that regrow_fodder updates the array.
+        """
+        island_map = IslandMap(example_geogr, example_ini_pop)
+        island_map.create_map_dict()
+        index = island_map.location_index[(1, 1)]
+        cell = island_map.cells[index]
+        cell.fodder_amount = 100
+        assert island_map.fodder[index] == 100
+        island_map.fodder[index] = 200
+        assert cell.fodder_amount == 200
+
+        island_map.regrow_fodder()
+        assert cell.fodder_amount == cell.params["f_max"]
+        assert island_map.fodder.tolist() == [
+            cell.fodder_amount for cell in island_map.cells
+        ]
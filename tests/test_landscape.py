@@ -11,7 +11,7 @@ __email__ = "idaln@hotmail.com & kjkv@nmbu.no"
 
 from biosim.landscape import Landscape, Jungle, Savannah, Desert, Mountain, \
     Ocean
-from biosim.animals import Herbivore
+from biosim.animals import Herbivore, Carnivore
 from pytest import approx
 import pytest
 import numpy
@@ -191,6 +191,55 @@ class TestLandscape:
         assert old_weight < landscape.pop_carn[0].weight
         assert len(landscape.pop_herb) == 0
 
+    def test_eaten_herbs_removed_by_id(self, example_pop_herb):
+        """
+        Tests remove_herbivores_by_id method.
+        Asserts that only herbivores whose id is in the set are removed, and
+        that the others keep their order.
+        """
+        landscape = Landscape(example_pop_herb)
+        first, second, third = landscape.pop_herb
+        landscape.remove_herbivores_by_id({id(second)})
+        assert landscape.pop_herb == [first, third]
+
+    def test_herbivore_eaten_by_one_carnivore_only(
+            self, example_pop_herb, example_pop_carn, mocker
+    ):
+        """
+        Tests feed_all_carnivores method.
+        Asserts that each herbivore is eaten at most once when all kill
+        attempts succeed, and that all eaten herbivores are removed.
+        """
+        mocker.patch('numpy.random.random', return_value=0)
+        mocker.patch.object(Carnivore, "prob_kill", return_value=1)
+        landscape = Landscape(example_pop_herb + example_pop_carn)
+        eaten = []
+        original = Carnivore.attempt_eating_all_herbivores_in_cell
+
+        def record(carn, pop_herb, eaten_ids=None, rng=None):
+            killed = original(carn, pop_herb, eaten_ids, rng)
+            eaten.extend(killed)
+            return killed
+        mocker.patch.object(Carnivore, "attempt_eating_all_herbivores_in_cell",
+                            record)
+        landscape.feed_all_carnivores()
+        assert len(eaten) == len(set(map(id, eaten))) == 3
+        assert landscape.pop_herb == []
+
+    def test_herbivores_sorted_once_when_carnivores_eat(
+            self, example_pop_herb, example_pop_carn, mocker
+    ):
+        """
+        Tests feed_all_carnivores method.
+        Asserts that the herbivores are sorted once, and not once per
+        carnivore.
+        """
+        mocker.patch('numpy.random.random', return_value=1)
+        landscape = Landscape(example_pop_herb + example_pop_carn)
+        mocker.spy(landscape, "sort_herb_population_by_fitness")
+        landscape.feed_all_carnivores()
+        assert landscape.sort_herb_population_by_fitness.call_count == 1
+
     def test_have_all_herbivores_been_fed(self):
         """
         Tests feed_all_herbivores method.
@@ -246,6 +295,30 @@ class TestLandscape:
         assert len(landscape.pop_herb) == 2 * len(test_population_birth)
         # length of population has doubled when all animals have given birth
 
+    def test_mothers_lose_weight_when_newborns_are_created(self, mocker):
+        """
+        Tests add_newborn_animals method.
+        Asserts that each mother loses xi times the weight of her baby when
+        all animals give birth.
+        """
+        mocker.patch('numpy.random.random',
+                     side_effect=lambda size: numpy.zeros(size))
+        mocker.patch(
+            'numpy.random.normal',
+            side_effect=lambda loc, scale, size: numpy.full(size, 5.0)
+        )
+        landscape = Landscape([
+            {"species": "Carnivore", "age": 3, "weight": 70.0}
+            for _ in range(3)
+        ])
+        landscape.add_newborn_animals()
+        assert len(landscape.pop_carn) == 6
+        for mother in landscape.pop_carn[:3]:
+            assert mother.weight == approx(70.0 - 5.0 * Carnivore.params["xi"])
+        for baby in landscape.pop_carn[3:]:
+            assert type(baby) is Carnivore
+            assert baby.age == 0 and baby.weight == 5.0
+
     def test_have_all_animals_aged(self, example_pop_herb):
         """
         Tests make_all_animals_older method.
@@ -283,6 +356,148 @@ class TestLandscape:
         assert len(landscape.pop_herb) == 2
         # two of three animals are left in population
 
+    def test_all_animals_die_with_one_random_vector(self, example_pop_herb,
+                                                    example_pop_carn, mocker):
+        """
+        Test for remove_all_dead_animals method.
+        Asserts that one vector of random numbers is drawn per species, and
+        that all animals die when all random numbers are zero.
+        """
+        random = mocker.patch('numpy.random.random',
+                              side_effect=lambda size: numpy.zeros(size))
+        landscape = Landscape(example_pop_herb + example_pop_carn)
+        landscape.remove_all_dead_animals()
+        assert random.call_count == 2
+        assert landscape.pop_herb == [] and landscape.pop_carn == []
+
+    def test_population_packed_into_arrays(self, example_pop_herb,
+                                           example_pop_carn):
+        """
+        Tests pack_population and unpack_population methods.
+        Asserts that all animals are moved between population lists and
+        population arrays.
+        """
+        landscape = Landscape(example_pop_herb + example_pop_carn)
+        landscape.pack_population()
+        assert landscape.pop_herb == [] and landscape.pop_carn == []
+        assert len(landscape.herbs) == 3 and len(landscape.carns) == 3
+        assert landscape.num_herbs == 3 and landscape.num_carns == 3
+        landscape.unpack_population()
+        assert len(landscape.pop_herb) == 3 and len(landscape.herbs) == 0
+
+    def test_fittest_animal_eats_first_vectorized(
+            self, teardown_feeding_test, example_pop_herb
+    ):
+        """
+        Tests feed_all_herbivores_vectorized.
+        Asserts that only the strongest herbivore has eaten when there is food
+        for one herbivore.
+        """
+        landscape = Landscape(example_pop_herb)
+        landscape.pack_population()
+        landscape.params["f_max"] = Herbivore.params["F"]
+        landscape.feed_all_herbivores_vectorized()
+        assert landscape.herbs.weight[0] > example_pop_herb[1]["weight"]
+        assert landscape.herbs.weight[1] == example_pop_herb[2]["weight"]
+        assert landscape.herbs.weight[2] == example_pop_herb[0]["weight"]
+        assert landscape.fodder_amount == 0
+
+    def test_have_carnivore_been_fed_vectorized(
+            self, example_pop_herb, example_pop_carn, mocker
+    ):
+        """
+        Tests feed_all_carnivores_vectorized.
+        Asserts that a carnivore gains weight after eating, and that the eaten
+        herbivore is removed from population.
+        """
+        mocker.patch('numpy.random.random', return_value=0.00001)
+        landscape = Landscape([example_pop_herb[0]] + [example_pop_carn[1]])
+        landscape.pack_population()
+        old_weight = landscape.carns.weight[0]
+        landscape.feed_all_carnivores_vectorized()
+        assert old_weight < landscape.carns.weight[0]
+        assert len(landscape.herbs) == 0
+
+    def test_carnivore_eats_weakest_herbivores_vectorized(self, mocker):
+        """
+        Tests feed_all_carnivores_vectorized.
+        Asserts that a carnivore eats the weakest herbivores first, until its
+        appetite is satisfied.
+        """
+        mocker.patch('numpy.random.random',
+                     side_effect=lambda size=None: numpy.zeros(size))
+        landscape = Landscape(
+            [{"species": "Herbivore", "age": 5, "weight": weight}
+             for weight in [30.0, 40.0, 25.0]]
+            + [{"species": "Carnivore", "age": 5, "weight": 10.0}]
+        )
+        landscape.pack_population()
+        landscape.feed_all_carnivores_vectorized(chunk_size=1)
+        assert list(landscape.herbs.weight) == [40.0]
+        assert landscape.carns.weight[0] == approx(10.0 + 0.75 * (25 + 55))
+
+    def test_fitter_herbivores_not_killed_vectorized(self, mocker):
+        """
+        Tests feed_all_carnivores_vectorized.
+        Asserts that a carnivore does not kill herbivores with higher fitness
+        than itself, and draws no random numbers for them.
+        """
+        random = mocker.patch('numpy.random.random',
+                              side_effect=lambda size=None: numpy.zeros(size))
+        landscape = Landscape(
+            [{"species": "Herbivore", "age": 5, "weight": 25.0}]
+            + [{"species": "Carnivore", "age": 5, "weight": 5.0}]
+        )
+        landscape.pack_population()
+        landscape.feed_all_carnivores_vectorized()
+        assert len(landscape.herbs) == 1
+        random.assert_not_called()
+
+    def test_newborn_animals_have_been_created_vectorized(self, mocker):
+        """
+        Tests add_newborn_animals_vectorized.
+        Asserts that the population doubles when all animals give birth, and
+        that newborns have age zero.
+        """
+        mocker.patch('numpy.random.random',
+                     side_effect=lambda size: numpy.zeros(size))
+        landscape = Landscape([
+            {"species": "Herbivore", "age": 3, "weight": 70.0}
+            for _ in range(4)
+        ])
+        landscape.pack_population()
+        landscape.add_newborn_animals_vectorized()
+        assert len(landscape.herbs) == 8
+        assert list(landscape.herbs.age[4:]) == [0] * 4
+        assert all(landscape.herbs.weight[:4] < 70.0)
+
+    def test_have_all_animals_aged_and_lost_weight_vectorized(
+            self, example_pop_herb
+    ):
+        """
+        Tests make_all_animals_older_vectorized and
+        make_all_animals_lose_weight_vectorized.
+        """
+        landscape = Landscape(example_pop_herb)
+        landscape.pack_population()
+        landscape.make_all_animals_older_vectorized()
+        landscape.make_all_animals_lose_weight_vectorized()
+        for index, animal_info in enumerate(example_pop_herb):
+            assert landscape.herbs.age[index] == animal_info["age"] + 1
+            assert landscape.herbs.weight[index] < animal_info["weight"]
+
+    def test_has_dead_animal_been_removed_vectorized(self, example_pop_herb):
+        """
+        Tests remove_all_dead_animals_vectorized.
+        Asserts that an animal with zero weight dies.
+        """
+        landscape = Landscape(example_pop_herb)
+        landscape.pack_population()
+        landscape.herbs.weight[2] = 0
+        landscape.herbs.fitness_must_be_updated[2] = True
+        landscape.remove_all_dead_animals_vectorized()
+        assert 0 not in landscape.herbs.weight
+
 
 class TestJungle:
     """
@@ -332,6 +547,23 @@ class TestSavannah:
         savannah.regrowth()
         assert savannah.fodder_amount == 300
 
+    def test_batch_regrowth_equals_regrowth(self, example_pop_herb):
+        """
+        Asserts that batch_regrowth gives the same amount of fodder as
+        regrowth of each cell, for Savannah and Jungle.
+        """
+        for landscape_class in (Savannah, Jungle):
+            cells = [landscape_class(example_pop_herb) for _ in range(3)]
+            for cell, fodder in zip(cells, (0, 123.4, 300)):
+                cell.fodder_amount = fodder
+            fodder_amount = landscape_class.batch_regrowth(
+                numpy.array([cell.fodder_amount for cell in cells])
+            )
+            for cell in cells:
+                cell.regrowth()
+            assert fodder_amount.tolist() == \
+                [cell.fodder_amount for cell in cells]
+
 
 class TestDesert:
     """
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the parallel module.
+
+This set of tests checks the interface and functionality of the functions
+and the CellExecutor class provided by the parallel module of the biosim
+package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.parallel import CellExecutor, CELL_SEASONS, find_cell_methods, \
+    run_cell_methods, get_class_params
+from biosim.island_map import IslandMap
+from biosim.landscape import Landscape, Jungle
+from biosim.animals import Herbivore
+from biosim.random_stream import RandomStream
+import pytest
+
+
+class TestParallel:
+    """
+    Tests for the parallel module. The island and population are the
+    shared fixtures of conftest.py.
+    """
+    def test_cells_split_in_contiguous_chunks(self):
+        """
+        Asserts that split_cells covers all cells in order, with at most
+        chunks_per_worker chunks per worker.
+        """
+        executor = CellExecutor(num_workers=2, chunks_per_worker=2)
+        chunks = executor.split_cells(list(range(10)))
+        assert len(chunks) == 4
+        assert [cell for chunk in chunks for cell in chunk] == list(range(10))
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_cell_methods_exist(self, vectorized):
+        """
+        Asserts that all cell-local seasons are run by existing landscape
+        methods.
+        """
+        for name in find_cell_methods(CELL_SEASONS, vectorized):
+            assert callable(getattr(Landscape, name))
+
+    def test_class_params_set_before_methods_run(self, teardown_params):
+        """
+        Asserts that run_cell_methods sets the given class parameters before
+        running the methods.
+        """
+        class_params = get_class_params()
+        class_params[Herbivore] = dict(class_params[Herbivore], eta=0.5)
+        cell = Jungle([{"species": "Herbivore", "age": 5, "weight": 20}],
+                      RandomStream(1))
+        cells = run_cell_methods([cell], ["make_all_animals_lose_weight"],
+                                 class_params)
+        assert cells[0].pop_herb[0].weight == 10
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_result_independent_of_number_of_workers(
+            self, example_geogr, example_ini_pop, vectorized
+    ):
+        """
+        Asserts that the animals in each cell after some years are the same
+        with one and with two worker processes.
+        """
+        weights = []
+        for num_workers in 1, 2:
+            island_map = IslandMap(example_geogr, example_ini_pop,
+                                   vectorized=vectorized,
+                                   rng=RandomStream(3),
+                                   num_workers=num_workers)
+            island_map.create_map_dict()
+            for _ in range(4):
+                island_map.run_all_seasons()
+            island_map.shutdown_executor()
+            for cell in island_map.map.values():
+                cell.unpack_population()
+            weights.append({
+                location: sorted(animal.weight for animal
+                                 in cell.pop_herb + cell.pop_carn)
+                for location, cell in island_map.map.items()
+            })
+        assert weights[0] == weights[1]
+        assert sum(len(cell) for cell in weights[0].values()) > 0
+
+    def test_cells_bound_to_fodder_array_after_workers(
+            self, example_geogr, example_ini_pop
+    ):
+        """
+        Asserts that the cells returned by the worker processes are bound to
+        the fodder array of the map again, so that the fodder eaten in the
+        workers is in the array, and regrowth in the array reaches the cells.
+        """
+        island_map = IslandMap(example_geogr, example_ini_pop,
+                               rng=RandomStream(3), num_workers=2)
+        island_map.create_map_dict()
+        for _ in range(2):
+            island_map.run_all_seasons()
+        island_map.shutdown_executor()
+        assert island_map.fodder.tolist() == [
+            cell.fodder_amount for cell in island_map.cells
+        ]
+        assert any(cell.fodder_amount < cell.params["f_max"]
+                   for cell in island_map.cells)
+        island_map.regrow_fodder()
+        assert [cell.fodder_amount for cell in island_map.cells] == [
+            cell.params["f_max"] if index in island_map.passable_indices
+            else cell.fodder_amount
+            for index, cell in enumerate(island_map.cells)
+        ]
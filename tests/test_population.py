@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for Population class interface.
+
+This set of tests checks the interface and functionality of the Population
+class provided by the population module of the biosim package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.population import Population
+from biosim.animals import Herbivore, Carnivore
+from pytest import approx
+import pytest
+import numpy
+
+
+class TestPopulation:
+    """
+    Tests for Population class.
+    """
+    @pytest.fixture
+    def example_herbs(self):
+        return [
+            Herbivore({"species": "Herbivore", "age": 1, "weight": 10.0}),
+            Herbivore({"species": "Herbivore", "age": 3, "weight": 50.0}),
+            Herbivore({"species": "Herbivore", "age": 5, "weight": 20.0})
+        ]
+
+    def test_constructor(self):
+        """
+        Asserts that a population has one element per animal in each array.
+        """
+        population = Population(Carnivore, [1, 2], [10.0, 20.0])
+        assert len(population) == 2
+        assert len(population.fitness) == 2
+        assert len(population.fitness_must_be_updated) == 2
+
+    def test_error_raised_from_unequal_lengths(self):
+        """
+        Asserts that ValueError is raised if ages and weights differ in length.
+        """
+        with pytest.raises(ValueError):
+            Population(Herbivore, [1, 2], [10.0])
+
+    def test_fitness_equal_to_animal_fitness(self, example_herbs):
+        """
+        Asserts that fitness of the population is the same as the fitness of
+        each animal instance.
+        """
+        population = Population.from_animals(Herbivore, example_herbs)
+        for animal, fitness in zip(example_herbs, population.fitness):
+            animal.find_fitness()
+            assert fitness == approx(animal.fitness)
+
+    def test_fitness_zero_if_weight_zero(self):
+        """
+        Asserts that fitness is zero for animals with zero weight.
+        """
+        population = Population(Herbivore, [1], [10.0])
+        population.weight[0] = 0
+        population.find_fitness()
+        assert population.fitness[0] == 0
+
+    def test_animals_converted_back_and_forth(self, example_herbs):
+        """
+        Asserts that converting instances to a population and back keeps
+        age and weight of all animals.
+        """
+        population = Population.from_animals(Herbivore, example_herbs)
+        animals = population.to_animals()
+        assert [type(animal) for animal in animals] == [Herbivore] * 3
+        assert [animal.age for animal in animals] == [1, 3, 5]
+        assert [animal.weight for animal in animals] == [10.0, 50.0, 20.0]
+
+    def test_append_adds_animals_to_end(self):
+        """
+        Asserts that appended animals are added at the end of the population.
+        """
+        population = Population(Herbivore, [1], [10.0])
+        population.append([0, 0], [5.0, 6.0])
+        assert list(population.weight) == [10.0, 5.0, 6.0]
+
+    def test_keep_removes_animals(self):
+        """
+        Asserts that keep removes animals not selected by the mask.
+        """
+        population = Population(Herbivore, [1, 2, 3], [10.0, 20.0, 30.0])
+        population.keep(numpy.array([True, False, True]))
+        assert list(population.age) == [1, 3]
+        assert len(population.fitness) == 2
+
+    def test_select_keeps_given_order(self):
+        """
+        Asserts that select returns animals in the order of the positions.
+        """
+        population = Population(Herbivore, [1, 2, 3], [10.0, 20.0, 30.0])
+        selected = population.select([2, 0])
+        assert list(selected.age) == [3, 1]
+        assert len(population) == 3
+
+    def test_only_dirty_fitness_updated(self):
+        """
+        Asserts that update_fitness recomputes fitness only for animals whose
+        fitness must be updated.
+        """
+        population = Population(Herbivore, [1, 1], [10.0, 10.0])
+        old_fitness = population.fitness.copy()
+        population.weight[:] = 30.0
+        population.fitness_must_be_updated[1] = True
+        population.update_fitness()
+        assert population.fitness[0] == old_fitness[0]
+        assert population.fitness[1] > old_fitness[1]
+        assert not population.fitness_must_be_updated.any()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the profiling module.
+
+This set of tests checks the interface and functionality of the
+SeasonProfiler class provided by the profiling module of the biosim package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.profiling import SeasonProfiler, SEASONS, FIELDS
+from biosim.island_map import IslandMap
+from biosim.random_stream import RandomStream
+import pytest
+
+
+class TestSeasonProfiler:
+    """
+    Tests for SeasonProfiler class. The island and population are the shared
+    fixtures of conftest.py.
+    """
+    @staticmethod
+    def create_island_map(geogr, ini_pop, vectorized, profiler=None):
+        """
+        Returns island map with given profiler, with its own random stream.
+        """
+        island_map = IslandMap(geogr, ini_pop, vectorized, RandomStream(5))
+        island_map.create_map_dict()
+        island_map.profiler = profiler
+        return island_map
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_profiled_island_gives_same_result(self, example_geogr,
+                                               example_ini_pop, vectorized):
+        """
+        Asserts that running the seasons through a profiler gives the same
+        animals in each cell as running them without, and that there is one
+        record per year and season.
+        """
+        profiler = SeasonProfiler()
+        island_maps = [
+            self.create_island_map(example_geogr, example_ini_pop,
+                                   vectorized),
+            self.create_island_map(example_geogr, example_ini_pop,
+                                   vectorized, profiler)
+        ]
+        for island_map in island_maps:
+            for _ in range(5):
+                island_map.run_all_seasons()
+        assert island_maps[0].cell_counts.tolist() == \
+            island_maps[1].cell_counts.tolist()
+        arrays = profiler.as_arrays()
+        assert set(arrays) == set(FIELDS)
+        assert arrays["time"].shape == (5, len(SEASONS))
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_counters_add_up(self, example_geogr, example_ini_pop,
+                             vectorized):
+        """
+        Asserts that the number of animals at the start of each year equals
+        that of the year before, with births added and deaths and kills
+        subtracted, and that random numbers are drawn by the seasons that
+        need them.
+        """
+        profiler = SeasonProfiler()
+        island_map = self.create_island_map(example_geogr, example_ini_pop,
+                                            vectorized, profiler)
+        for _ in range(6):
+            island_map.run_all_seasons()
+        arrays = profiler.as_arrays()
+        change = arrays["births"].sum(axis=1) - \
+            arrays["deaths"].sum(axis=1) - arrays["kills"].sum(axis=1)
+        assert list(arrays["animals"][1:, 0]) == \
+            list(arrays["animals"][:-1, 0] + change[:-1])
+        assert arrays["animals"][-1, 0] + change[-1] == \
+            island_map.num_herbs + island_map.num_carns
+        assert arrays["random_draws"].sum() == island_map.rng.num_draws
+        aging = SEASONS.index("aging")
+        assert arrays["random_draws"][:, aging].sum() == 0
+        assert arrays["migrants"].sum() > 0
+        assert arrays["fitness_computations"].sum() > 0
+
+    def test_callback_called_after_every_season(self, example_geogr,
+                                                example_ini_pop):
+        """
+        Asserts that the callback gets the year and name of every season in
+        order, with a record of all fields.
+        """
+        calls = []
+        profiler = SeasonProfiler(
+            callback=lambda year, season, record: calls.append(
+                (year, season, sorted(record))
+            )
+        )
+        island_map = self.create_island_map(example_geogr, example_ini_pop,
+                                            False, profiler)
+        island_map.run_all_seasons()
+        island_map.run_all_seasons()
+        assert [(year, season) for year, season, _ in calls] == \
+            [(year, season) for year in (0, 1) for season in SEASONS]
+        assert calls[0][2] == sorted(FIELDS)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for RandomStream class interface.
+
+This set of tests checks the interface and functionality of the RandomStream
+class provided by the random_stream module of the biosim package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.random_stream import RandomStream
+from biosim.simulation import BioSim
+from pytest import approx
+import pytest
+import numpy
+import pickle
+
+
+class TestRandomStream:
+    """
+    Tests for RandomStream class. The island and population are the shared
+    fixtures of conftest.py.
+    """
+    def test_same_seed_gives_same_numbers(self):
+        """
+        Asserts that two streams with the same seed give the same numbers.
+        """
+        first, second = RandomStream(3), RandomStream(3)
+        assert first.random() == second.random()
+        assert list(first.normal(size=5)) == list(second.normal(size=5))
+
+    def test_blocks_give_numbers_of_generator(self):
+        """
+        Asserts that drawing scalars and arrays of various sizes across the
+        ends of blocks gives the numbers of the generator in order.
+        """
+        stream = RandomStream(7, block_size=4)
+        numbers = [stream.random()]
+        numbers.extend(stream.random(2))
+        numbers.extend(stream.random(10))
+        numbers.append(stream.random())
+        expected = numpy.random.default_rng(7).random(14)
+        assert numbers == approx(list(expected))
+
+    def test_pickled_stream_continues_with_same_numbers(self):
+        """
+        Asserts that a stream restored from a pickle gives the same numbers
+        as the original stream.
+        """
+        stream = RandomStream(2, block_size=8)
+        stream.random(3)
+        stream.normal()
+        copy = pickle.loads(pickle.dumps(stream))
+        assert list(copy.random(20)) == list(stream.random(20))
+        assert copy.normal() == stream.normal()
+
+    def test_spawned_streams_differ_and_are_reproducible(self):
+        """
+        Asserts that spawned streams give different numbers, and that the
+        same streams are spawned from the same seed.
+        """
+        first, second = RandomStream(4).spawn(2, block_size=16)
+        assert first.block_size == 16
+        assert first.random() != second.random()
+        again = RandomStream(4).spawn(2)[0]
+        again.random()
+        assert again.random() == first.random()
+
+    def test_shape_and_scale_of_normal_numbers(self):
+        """
+        Asserts that normal returns an array of the given shape, with mean
+        and standard deviation close to loc and scale.
+        """
+        numbers = RandomStream(1).normal(8.0, 1.5, (100, 50))
+        assert numbers.shape == (100, 50)
+        assert numbers.mean() == approx(8.0, abs=0.05)
+        assert numbers.std() == approx(1.5, abs=0.05)
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_simulations_are_independent(self, example_geogr,
+                                         example_ini_pop, vectorized):
+        """
+        Asserts that two simulations with the same seed give the same result
+        when run alternately, and that the global random state of NumPy is
+        not changed.
+        """
+        numpy.random.seed(12)
+        global_state = numpy.random.get_state()[1].copy()
+        sims = [BioSim(example_geogr, example_ini_pop, seed=5,
+                       vectorized=vectorized) for _ in range(2)]
+        for _ in range(5):
+            for sim in sims:
+                sim.island_map.run_all_seasons()
+        assert sims[0].num_animals_per_species == \
+            sims[1].num_animals_per_species
+        assert (numpy.random.get_state()[1] == global_state).all()
+
+    def test_stream_with_state_set_continues_with_same_numbers(self):
+        """
+        Asserts that a stream whose state is set from another stream gives
+        the same numbers as that stream.
+        """
+        stream = RandomStream(6, block_size=8)
+        stream.random(5)
+        stream.normal(size=3)
+        copy = RandomStream(0)
+        copy.set_state(stream.get_state())
+        assert list(copy.random(20)) == list(stream.random(20))
+        assert list(copy.normal(size=9)) == list(stream.normal(size=9))
+
+    def test_number_of_draws_counted(self):
+        """
+        Asserts that num_draws is the number of random numbers handed out,
+        also after pickling.
+        """
+        stream = RandomStream(1, block_size=8)
+        stream.random()
+        stream.random(10)
+        stream.normal(size=(2, 3))
+        stream.normal()
+        assert stream.num_draws == 18
+        copy = pickle.loads(pickle.dumps(stream))
+        copy.random(5)
+        assert copy.num_draws == 23
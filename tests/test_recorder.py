@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the recorder module.
+
+This set of tests checks the interface and functionality of the
+TrajectoryRecorder class and load_trajectory function provided by the
+recorder module of the biosim package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.recorder import TrajectoryRecorder, load_trajectory, \
+    find_chunk_files
+from biosim.simulation import BioSim
+from pytest import approx
+import pytest
+import numpy
+
+
+class TestRecorder:
+    """
+    Tests for the recorder module. The island and population are the
+    shared fixtures of conftest.py.
+    """
+    def test_error_raised_for_invalid_chunk_years(self, tmp_path):
+        """
+        Asserts that ValueError is raised if the number of years in each
+        chunk is not positive.
+        """
+        with pytest.raises(ValueError):
+            TrajectoryRecorder(str(tmp_path), chunk_years=0)
+
+    def test_error_raised_if_nothing_recorded(self, tmp_path):
+        """
+        Asserts that FileNotFoundError is raised when loading from a
+        directory without chunks.
+        """
+        with pytest.raises(FileNotFoundError):
+            load_trajectory(str(tmp_path))
+
+    @pytest.mark.parametrize("vectorized", [False, True])
+    def test_every_year_recorded_in_chunks(self, tmp_path, example_geogr,
+                                           example_ini_pop, vectorized):
+        """
+        Asserts that every year of repeated simulations is recorded, in
+        chunks of at most chunk_years years, and that the recorded totals
+        and density grids equal those of the simulation.
+        """
+        recorder = TrajectoryRecorder(str(tmp_path), chunk_years=3)
+        sim = BioSim(example_geogr, example_ini_pop, seed=2,
+                     vectorized=vectorized)
+        totals = []
+        for _ in range(7):
+            sim.simulate(num_years=1, vis_years=None, recorder=recorder)
+            totals.append(sim.num_animals_per_species["Herbivore"])
+        sim.simulate(num_years=4, vis_years=None, recorder=recorder)
+
+        trajectory = load_trajectory(str(tmp_path))
+        assert list(trajectory["year"]) == list(range(1, 12))
+        assert list(trajectory["num_herbs"][:7]) == totals
+        assert (trajectory["herbs"][-1] ==
+                sim.density_grid("Herbivore")).all()
+        assert (trajectory["carns"][-1] ==
+                sim.density_grid("Carnivore")).all()
+        assert trajectory["herbs"].shape == (11, 5, 7)
+        assert len(find_chunk_files(str(tmp_path))) == 9
+
+    def test_mean_properties_of_cells_recorded(self, tmp_path,
+                                               example_geogr,
+                                               example_ini_pop):
+        """
+        Asserts that the mean weight, age and fitness of each cell are
+        recorded if cell_properties is True, and are NaN for cells without
+        animals.
+        """
+        recorder = TrajectoryRecorder(str(tmp_path), cell_properties=True)
+        sim = BioSim(example_geogr, example_ini_pop, seed=2)
+        sim.simulate(num_years=2, vis_years=None, recorder=recorder)
+        trajectory = load_trajectory(str(tmp_path))
+        cell = sim.island_map.map[(2, 2)]
+        assert trajectory["herb_weight"][-1, 2, 2] == approx(
+            numpy.mean([animal.weight for animal in cell.pop_herb]))
+        assert trajectory["carn_age"][-1, 2, 2] == approx(
+            numpy.mean([animal.age for animal in cell.pop_carn]))
+        assert trajectory["herb_fitness"][-1, 2, 2] == approx(
+            numpy.mean([animal.fitness for animal in cell.pop_herb]))
+        assert numpy.isnan(trajectory["herb_weight"][-1, 0, 0])
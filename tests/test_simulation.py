@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the functionality of the BioSim class.
+
+This set of tests checks the functionality of the BioSim class provided by
+the simulation module of the biosim package, in addition to the interface
+tests in test_biosim_interface.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.simulation import BioSim
+import matplotlib.pyplot as plt
+import pytest
+import subprocess
+import sys
+import os
+
+
+class TestBioSim:
+    """
+    Tests for BioSim class. The island and population are the shared
+    fixtures of conftest.py.
+    """
+    def test_headless_simulation_creates_no_graphics(
+            self, mocker, example_geogr, example_ini_pop
+    ):
+        """
+        Asserts that a headless simulation runs all years without creating
+        a figure or updating graphics.
+        """
+        mocker.spy(plt, "figure")
+        mocker.spy(BioSim, "update_graphics")
+        sim = BioSim(example_geogr, example_ini_pop, seed=1)
+        sim.simulate(num_years=3, vis_years=None)
+        sim.simulate(num_years=2, vis_years=None)
+        assert sim.year == 5
+        assert sim._fig is None
+        assert plt.figure.call_count == 0
+        assert BioSim.update_graphics.call_count == 0
+
+    def test_headless_simulation_same_result_as_visualized(
+            self, example_geogr, example_ini_pop
+    ):
+        """
+        Asserts that a headless simulation gives the same result as a
+        simulation with graphics and the same seed.
+        """
+        headless = BioSim(example_geogr, example_ini_pop, seed=2)
+        headless.simulate(num_years=4, vis_years=None)
+        visualized = BioSim(example_geogr, example_ini_pop, seed=2)
+        visualized.simulate(num_years=4, vis_years=2)
+        plt.close("all")
+        assert headless.num_animals_per_species == \
+            visualized.num_animals_per_species
+
+    def test_error_raised_for_images_from_headless_simulation(
+            self, example_geogr, example_ini_pop
+    ):
+        """
+        Asserts that ValueError is raised if images are to be saved from a
+        headless simulation.
+        """
+        sim = BioSim(example_geogr, example_ini_pop, seed=1)
+        with pytest.raises(ValueError):
+            sim.simulate(num_years=2, vis_years=None, img_years=1)
+
+    def test_heavy_modules_not_imported_by_headless_simulation(
+            self, example_geogr
+    ):
+        """
+        Asserts that neither pandas nor matplotlib is imported in a fresh
+        process that imports the simulation module and runs a headless
+        simulation.
+        """
+        code = (
+            "import sys\n"
+            "from biosim.simulation import BioSim\n"
+            f"sim = BioSim({example_geogr!r}, [], seed=1)\n"
+            "sim.simulate(num_years=2, vis_years=None)\n"
+            "print(sorted(name for name in sys.modules\n"
+            "             if name.split('.')[0] in ('pandas', 'matplotlib')))"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        result = subprocess.run([sys.executable, "-c", code], env=env,
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+    def test_num_animals_found_without_counting_cells(
+            self, mocker, example_geogr, example_ini_pop
+    ):
+        """
+        Asserts that the number of animals is found from the counts kept by
+        the island map, without counting the animals of any cell.
+        """
+        sim = BioSim(example_geogr, example_ini_pop, seed=3)
+        sim.simulate(num_years=3, vis_years=None)
+        expected = sum(cell.num_herbs + cell.num_carns
+                       for cell in sim.island_map.cells)
+        for cell in sim.island_map.cells:
+            mocker.patch.object(cell, "pop_herb", None)
+            mocker.patch.object(cell, "pop_carn", None)
+        assert sim.num_animals == expected
+        assert sum(sim.num_animals_per_species.values()) == expected
+
+    @pytest.mark.parametrize("species", ["Herbivore", "Carnivore"])
+    def test_density_grid_equals_animal_distribution(
+            self, example_geogr, example_ini_pop, species
+    ):
+        """
+        Asserts that the density grid has the number of animals of each cell
+        given by animal_distribution, and that heat maps are made from it.
+        """
+        sim = BioSim(example_geogr, example_ini_pop, seed=4)
+        sim.simulate(num_years=3, vis_years=None)
+        grid = sim.density_grid(species)
+        for _, row in sim.animal_distribution.iterrows():
+            assert grid[row["Row"], row["Col"]] == row[species]
+        sim.density_grid(species)[:] = -1
+        assert (sim.density_grid(species) == grid).all()
+        assert (sim.create_array_herbs() ==
+                sim.density_grid("Herbivore")).all()
+
+    def test_worker_processes_stopped_by_with_statement(self, example_geogr,
+                                                        example_ini_pop):
+        """
+        Asserts that the worker processes of a simulation are stopped at the
+        end of a with statement, that the simulation can continue after
+        that, and that close stops the workers again.
+        """
+        with BioSim(example_geogr, example_ini_pop, seed=6,
+                    num_workers=2) as parallel_sim:
+            parallel_sim.simulate(num_years=3, vis_years=None)
+            assert parallel_sim.island_map.executor._pool is not None
+        assert parallel_sim.island_map.executor._pool is None
+        assert parallel_sim.num_animals > 0
+
+        parallel_sim.simulate(num_years=1, vis_years=None)
+        parallel_sim.close()
+        assert parallel_sim.island_map.executor._pool is None
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the sweep module.
+
+This set of tests checks the interface and functionality of the
+ParameterSweep class and grid_points function provided by the sweep module
+of the biosim package.
+"""
+
+__author__ = "Ida Lunde Naalsund & Kjersti Rustad Kvisberg"
+__email__ = "idaln@hotmail.com & kjkv@nmbu.no"
+
+from biosim.sweep import ParameterSweep, grid_points
+from biosim.ensemble import run_member
+from concurrent.futures import wait
+import pytest
+import os
+
+
+@pytest.mark.usefixtures("teardown_params")
+class TestParameterSweep:
+    """
+    Tests for ParameterSweep class. The island and population are the shared
+    fixtures of conftest.py.
+    """
+    @pytest.fixture
+    def example_sweep(self, tmp_path, example_geogr, example_ini_pop):
+        return ParameterSweep(example_geogr, example_ini_pop, num_years=3,
+                              cache_dir=str(tmp_path))
+
+    def test_grid_points_are_all_combinations(self):
+        """
+        Asserts that grid_points gives one point per combination of values.
+        """
+        points = grid_points({"Herbivore": {"F": [5, 10], "beta": [0.5]},
+                              "Carnivore": {"F": [20, 30, 40]}},
+                             {"J": {"f_max": [600, 800]}})
+        assert len(points) == 12
+        assert points[0] == {
+            "animal_params": {"Herbivore": {"F": 5, "beta": 0.5},
+                              "Carnivore": {"F": 20}},
+            "landscape_params": {"J": {"f_max": 600}}
+        }
+
+    def test_key_depends_on_every_input(self, example_sweep):
+        """
+        Asserts that the key changes with parameters and seed, but not with
+        the order of parameters or integer versus float values.
+        """
+        point = {"animal_params": {"Herbivore": {"F": 5, "beta": 0.5}}}
+        key = example_sweep.key(point, 1)
+        assert key == example_sweep.key(
+            {"animal_params": {"Herbivore": {"beta": 0.5, "F": 5.0}}}, 1)
+        assert key != example_sweep.key(point, 2)
+        assert key != example_sweep.key(
+            {"animal_params": {"Herbivore": {"F": 6, "beta": 0.5}}}, 1)
+        assert key != example_sweep.key(
+            dict(point, landscape_params={"J": {"f_max": 700}}), 1)
+
+    def test_results_equal_single_runs_and_are_cached(self, example_sweep,
+                                                      example_geogr,
+                                                      example_ini_pop):
+        """
+        Asserts that the result of each point and seed equals run_member,
+        and that a second run of the sweep only runs new points.
+        """
+        points = grid_points({"Herbivore": {"F": [5, 10]}})
+        results = example_sweep.run(points, seeds=[1, 2], num_workers=2)
+        assert example_sweep.num_computed == 4
+        assert results[0]["num_herbs"].shape == (2, 3)
+        expected = run_member(example_geogr, example_ini_pop, 2, 3,
+                              animal_params={"Herbivore": {"F": 10}})
+        assert list(results[1]["num_herbs"][1]) == \
+            list(expected["num_herbs"])
+
+        points.append({"animal_params": {"Herbivore": {"F": 20}}})
+        again = example_sweep.run(points, seeds=[1, 2], num_workers=2)
+        assert example_sweep.num_cached == 4
+        assert example_sweep.num_computed == 2
+        assert list(again[1]["num_herbs"][1]) == list(expected["num_herbs"])
+
+    def test_interrupted_sweep_resumed(self, example_sweep, tmp_path):
+        """
+        Asserts that when a point fails, the results of the other points are
+        stored, so that running the sweep again only runs the failed point,
+        and that no temporary files are left.
+        """
+        points = [{"animal_params": {"Herbivore": {"F": 5}}},
+                  {"animal_params": {"Herbivore": {"eta": 2}}},
+                  {"animal_params": {"Herbivore": {"F": 10}}}]
+        with pytest.raises(ValueError):
+            example_sweep.run(points, seeds=[1], num_workers=1)
+        assert len(os.listdir(str(tmp_path))) == 2
+        example_sweep.run([points[0], points[2]], seeds=[1], num_workers=1)
+        assert example_sweep.num_cached == 2
+        assert example_sweep.num_computed == 0
+
+    def test_finished_results_stored_when_interrupted(self, mocker,
+                                                      example_sweep):
+        """
+        Asserts that when the sweep is interrupted while collecting results,
+        the results of all simulations that finished are stored, so that
+        running the sweep again runs none of them.
+        """
+        def interrupted(futures):
+            wait(futures)
+            yield next(iter(futures))
+            raise KeyboardInterrupt
+
+        mocker.patch("biosim.sweep.as_completed", side_effect=interrupted)
+        points = grid_points({"Herbivore": {"F": [5, 10, 20]}})
+        with pytest.raises(KeyboardInterrupt):
+            example_sweep.run(points, seeds=[1], num_workers=1)
+        mocker.stopall()
+        example_sweep.run(points, seeds=[1], num_workers=1)
+        assert example_sweep.num_cached == 3
+        assert example_sweep.num_computed == 0
+
+    def test_error_raised_for_no_seeds(self, example_sweep):
+        """
+        Asserts that ValueError is raised when no seeds are given.
+        """
+        with pytest.raises(ValueError):
+            example_sweep.run(grid_points({"Herbivore": {"F": [5]}}), [])